@@ -0,0 +1,120 @@
+"""Startup cost of the lazily bound endpoint table
+
+Measures the time of `import graylog_api_client` in fresh interpreters against the import of a baseline revision
+(the first commit unless --baseline is given), the cost of the first call of a table endpoint (reading the table
+and compiling the method) against later calls, and the memory of a client instance before and after all
+endpoints were bound. No server is needed, the requests go to a stub adapter.
+
+    PYTHONPATH=src python benchmarks/bench_endpoints.py --baseline v1.0.0 --json endpoints.json
+"""
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from typing import Dict, List
+
+import graylog_api_client
+from graylog_api_client import GraylogAPI, endpoint_registry
+
+SOURCE = os.path.dirname(os.path.dirname(os.path.abspath(graylog_api_client.__file__)))
+
+
+class StubAdapter:
+    def get(self, endpoint, parameters=None):
+        return endpoint
+
+    post = put = delete = lambda self, endpoint, parameters=None, data=None: endpoint
+
+
+def import_time(runs: int, source: str) -> float:
+    """Best seconds of importing the package from source in a fresh interpreter, minus the bare interpreter start."""
+    def run(code: str) -> float:
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True, env=dict(os.environ, PYTHONPATH=source))
+        return time.perf_counter() - started
+    # The minimum is the least disturbed start, the median of a few runs still varies by several milliseconds
+    bare = min(run("pass") for _ in range(runs))
+    return min(run("import graylog_api_client") for _ in range(runs)) - bare
+
+
+def baseline_source(ref: str, directory: str) -> str:
+    """Extract the package sources of a git revision into directory and return the path to import them from."""
+    root = subprocess.run(["git", "rev-parse", "--show-toplevel"], cwd=SOURCE, check=True, capture_output=True,
+                          text=True).stdout.strip()
+    if ref is None:
+        ref = subprocess.run(["git", "rev-list", "--max-parents=0", "HEAD"], cwd=root, check=True,
+                             capture_output=True, text=True).stdout.split()[-1]
+    archive = subprocess.run(["git", "archive", ref, os.path.relpath(SOURCE, root)], cwd=root, check=True,
+                             capture_output=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(directory)
+    return os.path.join(directory, os.path.relpath(SOURCE, root))
+
+
+def import_times(runs: int, baseline: str = None) -> Dict[str, float]:
+    """Import time of this tree and of the baseline revision, interleaved so both see the same machine load."""
+    with tempfile.TemporaryDirectory() as directory:
+        base = baseline_source(baseline, directory)
+        current, previous = [], []
+        for _ in range(runs):
+            current.append(import_time(1, SOURCE))
+            previous.append(import_time(1, base))
+    return {"import_ms": min(current) * 1e3, "baseline_import_ms": min(previous) * 1e3,
+            "import_delta_ms": (min(current) - min(previous)) * 1e3}
+
+
+def instance_size(api: GraylogAPI) -> int:
+    return sys.getsizeof(api) + sys.getsizeof(api.__dict__)
+
+
+def first_call(calls: int) -> Dict[str, float]:
+    api = GraylogAPI("http://localhost/api", "token")
+    api._rest_adapter = StubAdapter()
+    size_before = instance_size(api)
+
+    started = time.perf_counter()
+    api.get_system_inputs_by_input_id("a")
+    first = time.perf_counter() - started
+    started = time.perf_counter()
+    for _ in range(calls):
+        api.get_system_inputs_by_input_id("a")
+    later = (time.perf_counter() - started) / calls
+    started = time.perf_counter()
+    for _ in range(calls):
+        api.get_jvminfo("a")
+    hand_written = (time.perf_counter() - started) / calls
+
+    started = time.perf_counter()
+    for name in endpoint_registry.names():
+        getattr(api, name)
+    bind_all = time.perf_counter() - started
+    return {"first_call_us": first * 1e6, "later_call_us": later * 1e6, "hand_written_call_us": hand_written * 1e6,
+            "bind_all_ms": bind_all * 1e3, "endpoints": len(endpoint_registry.names()),
+            "instance_bytes_before": size_before, "instance_bytes_after": instance_size(api)}
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10, help="interpreter starts per import measurement")
+    parser.add_argument("--calls", type=int, default=100000, help="calls to measure the per-call cost")
+    parser.add_argument("--baseline", help="git revision the import time is compared with, defaults to the first "
+                                           "commit")
+    parser.add_argument("--json", help="write the results to this file")
+    options = parser.parse_args(argv)
+
+    results = {**import_times(options.runs, options.baseline), **first_call(options.calls)}
+    for key, value in results.items():
+        print(f"{key:<24}{value:>12.2f}" if isinstance(value, float) else f"{key:<24}{value:>12}")
+    if options.json:
+        with open(options.json, "w") as file:
+            json.dump(results, file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+"""A stand-in Graylog HTTP server for benchmarks
+
+Serves the endpoints implemented by GraylogAPI with generated data from a separate process, so the server does not
+compete with the measured client for the GIL. Latency, payload size, pagination and error/429 injection are
+configurable.
+"""
+import json
+import multiprocessing
+import random
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+class MockGraylogConfig:
+    def __init__(self, latency: float = 0.0, users: int = 1000, views: int = 500, roles: int = 50, nodes: int = 3,
+                 padding: int = 0, buffer_dump_size: int = 1_000_000, error_rate: float = 0.0,
+                 throttle_rate: float = 0.0, seed: int = 42):
+        """
+        :param latency: Seconds every response is delayed
+        :param users: Number of users served
+        :param views: Number of views served
+        :param roles: Number of roles served
+        :param nodes: Number of cluster nodes served
+        :param padding: Extra bytes of description per user and view, to grow the payloads
+        :param buffer_dump_size: Approximate size of a processbufferdump response in bytes
+        :param error_rate: Share of requests answered with 500
+        :param throttle_rate: Share of requests answered with 429 and Retry-After: 0
+        :param seed: Seed for the error/429 injection
+        """
+        self.latency = latency
+        self.users = users
+        self.views = views
+        self.roles = roles
+        self.nodes = nodes
+        self.padding = padding
+        self.buffer_dump_size = buffer_dump_size
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.seed = seed
+
+
+def _user(i: int, padding: int) -> Dict:
+    return {"id": f"{i:024x}", "username": f"user{i}", "full_name": f"User {i}", "first_name": "User",
+            "last_name": str(i), "email": f"user{i}@example.org", "roles": ["Reader"],
+            "permissions": ["streams:read", "dashboards:read", f"users:edit:user{i}"], "read_only": False,
+            "external": False, "account_status": "enabled", "service_account": False, "session_active": False,
+            "timezone": None, "session_timeout_ms": 3600000, "preferences": {"enableSmartSearch": True},
+            "startpage": None, "description": "x" * padding}
+
+
+def _view(i: int, padding: int) -> Dict:
+    return {"id": f"{i:024x}", "type": "DASHBOARD", "title": f"View {i}", "summary": "", "description": "x" * padding,
+            "search_id": f"{i:024x}", "owner": "admin", "created_at": "2024-01-01T00:00:00.000Z",
+            "state": {"widget": {"titles": {}, "widgets": [{"id": str(w), "type": "aggregation"} for w in range(5)]}}}
+
+
+def _role(i: int) -> Dict:
+    return {"id": f"{i:024x}", "name": f"Role {i}", "description": "", "permissions": ["streams:read"],
+            "read_only": i == 0}
+
+
+def _node(i: int) -> Dict:
+    return {"node_id": f"node-{i}", "cluster_id": "cluster", "hostname": f"graylog-{i}", "version": "6.3.4",
+            "is_leader": i == 0, "is_processing": True, "lb_status": "alive", "lifecycle": "running"}
+
+
+def _page(items, query: Dict, key: str, total: int) -> Dict:
+    page = int(query.get("page", ["1"])[0])
+    per_page = int(query.get("per_page", ["50"])[0])
+    start = (page - 1) * per_page
+    entities = [items(i) for i in range(start, min(start + per_page, total))]
+    return {"total": total, "count": len(entities), "page": page, "per_page": per_page, key: entities}
+
+
+def _handler(config: MockGraylogConfig):
+    rng = random.Random(config.seed)
+    routes = [
+        (r"users/paginated", lambda m, q: _page(lambda i: _user(i, config.padding), q, "users", config.users)),
+        (r"users", lambda m, q: {"users": [_user(i, config.padding) for i in range(config.users)]}),
+        (r"users/id/(\w+)", lambda m, q: _user(int(m.group(1), 16), config.padding)),
+        (r"users/(\w+)/tokens", lambda m, q: {"tokens": []}),
+        (r"users/(\w+)", lambda m, q: _user(0, config.padding)),
+        (r"authz/roles", lambda m, q: _page(_role, q, "roles", config.roles)),
+        (r"authz/roles/(\w+)/assignees", lambda m, q: _page(lambda i: _user(i, 0), q, "users", 10)),
+        (r"authz/roles/user/(\w+)", lambda m, q: _page(_role, q, "roles", 1)),
+        (r"authz/roles/(\w+)", lambda m, q: _role(int(m.group(1), 16))),
+        (r"views", lambda m, q: _page(lambda i: _view(i, config.padding), q, "views", config.views)),
+        (r"views/(\w+)", lambda m, q: _view(int(m.group(1), 16), config.padding)),
+        (r"streams", lambda m, q: {"total": 3, "streams": [{"id": f"{i:024x}", "title": f"Stream {i}"}
+                                                           for i in range(3)]}),
+        (r"cluster", lambda m, q: {f"node-{i}": _node(i) for i in range(config.nodes)}),
+        (r"cluster/([\w-]+)/jvm", lambda m, q: {"node_id": m.group(1), "free_memory": {"bytes": 1},
+                                                 "max_memory": {"bytes": 2}}),
+        (r"cluster/([\w-]+)/processbufferdump", lambda m, q: {
+            "processbuffer_dump": {f"ProcessBufferProcessor #{i}": "idle " * 16
+                                   for i in range(max(1, config.buffer_dump_size // 100))}}),
+    ]
+    compiled = [(re.compile(pattern + "$"), build) for pattern, build in routes]
+
+    class MockGraylogHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are written separately, without TCP_NODELAY delayed ACKs would add ~40ms per request
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status: int, body: bytes = b"", headers: Tuple = ()):
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in headers:
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _handle(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                self.rfile.read(length)
+            if config.latency:
+                time.sleep(config.latency)
+            roll = rng.random()
+            if roll < config.throttle_rate:
+                return self._send(429, headers=(("Retry-After", "0"),))
+            if roll < config.throttle_rate + config.error_rate:
+                return self._send(500)
+            url = urlparse(self.path)
+            path = url.path.split("/api/", 1)[-1].strip("/")
+            if self.command != "GET":
+                return self._send(201, b"{}") if self.command == "POST" else self._send(204)
+            for pattern, build in compiled:
+                match = pattern.match(path)
+                if match:
+                    try:
+                        body = json.dumps(build(match, parse_qs(url.query))).encode()
+                    except ValueError:  # IDs that are not hex numbers
+                        break
+                    return self._send(200, body)
+            self._send(404, b'{"message": "not found"}')
+
+        do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+    return MockGraylogHandler
+
+
+def _serve(config: MockGraylogConfig, port_pipe):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(config))
+    server.daemon_threads = True
+    port_pipe.send(server.server_address[1])
+    server.serve_forever()
+
+
+class MockGraylogServer:
+    def __init__(self, config: MockGraylogConfig = None):
+        """Runs the mock server in a child process, use it as a context manager
+
+            with MockGraylogServer(MockGraylogConfig(latency=0.005)) as server:
+                api = GraylogAPI(server.url, "token")
+
+        :param config: Behaviour of the server, defaults to MockGraylogConfig()
+        """
+        self.config = config or MockGraylogConfig()
+        self.url = None
+        self._process = None
+
+    def __enter__(self):
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        self._process = multiprocessing.Process(target=_serve, args=(self.config, sender), daemon=True)
+        self._process.start()
+        self.url = f"http://127.0.0.1:{receiver.recv()}/api"
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._process.terminate()
+        self._process.join()
+
+
+if __name__ == "__main__":
+    with MockGraylogServer() as mock_server:
+        print(f"Mock Graylog API listening on {mock_server.url}, press Ctrl+C to stop")
+        try:
+            mock_server._process.join()
+        except KeyboardInterrupt:
+            pass
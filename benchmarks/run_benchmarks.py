@@ -0,0 +1,170 @@
+"""Benchmarks of the client overhead against a local mock Graylog server
+
+Every scenario drives GraylogAPI (or AsyncGraylogAPI) against benchmarks/mock_graylog.py and reports requests per
+second, p50/p99 request latency and the peak Python memory of a second, traced run of the same scenario.
+
+    PYTHONPATH=src python benchmarks/run_benchmarks.py --latency 0.002 --json bench.json
+    PYTHONPATH=src python benchmarks/run_benchmarks.py --baseline bench.json --tolerance 0.2
+
+With --baseline the exit code is 1 if a scenario lost more than --tolerance of its throughput.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from graylog_api_client import AsyncGraylogAPI, GraylogAPI, Instrumentation, RetryPolicy
+from graylog_api_client.instrumentation import RequestInfo
+
+from mock_graylog import MockGraylogConfig, MockGraylogServer
+
+
+class LatencyRecorder(Instrumentation):
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.errors = 0
+
+    def on_response(self, info: RequestInfo):
+        if info.cache != "hit":
+            self.latencies.append(info.total)
+            self.errors += info.error is not None
+
+
+def _user_ids(count: int) -> List[str]:
+    return [f"{i:024x}" for i in range(count)]
+
+
+def sequential(api: GraylogAPI, options):
+    for user_id in _user_ids(options.requests):
+        try:
+            api.get_user_by_id(user_id)
+        except Exception:
+            pass
+
+
+def threaded(api: GraylogAPI, options):
+    for _ in api.fetch_many("get_user_by_id", _user_ids(options.requests), max_workers=options.workers):
+        pass
+
+
+def async_gather(api: AsyncGraylogAPI, options):
+    async def run():
+        await asyncio.gather(*(api.get_user_by_id(user_id) for user_id in _user_ids(options.requests)),
+                             return_exceptions=True)
+    asyncio.run(run())
+
+
+def large_decode(api: GraylogAPI, options):
+    for _ in range(options.repeat):
+        api.get_views({"per_page": options.views})
+
+
+def streaming_decode(api: GraylogAPI, options):
+    for _ in range(options.repeat):
+        for _ in api._rest_adapter.iter_items("views", {"per_page": options.views}, key="views"):
+            pass
+
+
+def paginated(api: GraylogAPI, options):
+    for _ in api.iter_users(per_page=options.per_page):
+        pass
+
+
+SCENARIOS: Dict[str, Callable] = {"sequential": sequential, "threaded": threaded, "async": async_gather,
+                                  "large_decode": large_decode, "streaming_decode": streaming_decode,
+                                  "paginated": paginated}
+
+
+def _client(name: str, url: str, recorder: Instrumentation, options):
+    retry = RetryPolicy(total=3, backoff_factor=0.01)
+    if name == "async":
+        return AsyncGraylogAPI(url, "token", max_connections=options.workers, retry=retry, instrumentation=recorder)
+    return GraylogAPI(url, "token", pool_maxsize=options.workers, retry=retry, instrumentation=recorder)
+
+
+def run_scenario(name: str, url: str, options) -> Dict:
+    recorder = LatencyRecorder()
+    api = _client(name, url, recorder, options)
+    started = time.perf_counter()
+    SCENARIOS[name](api, options)
+    elapsed = time.perf_counter() - started
+    api.close()
+
+    api = _client(name, url, Instrumentation(), options)
+    gc.collect()
+    tracemalloc.start()
+    SCENARIOS[name](api, options)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    api.close()
+
+    latencies = sorted(recorder.latencies)
+    return {"requests": len(latencies), "errors": recorder.errors,
+            "requests_per_second": len(latencies) / elapsed if elapsed else 0.0,
+            "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+            "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000 if latencies else 0.0,
+            "peak_mib": peak / 2 ** 20}
+
+
+def report(results: Dict[str, Dict], baseline: Dict[str, Dict] = None, tolerance: float = 0.2) -> bool:
+    print(f"{'scenario':<18}{'requests':>9}{'errors':>8}{'req/s':>11}{'p50 ms':>9}{'p99 ms':>9}{'peak MiB':>10}")
+    ok = True
+    for name, result in results.items():
+        line = (f"{name:<18}{result['requests']:>9}{result['errors']:>8}{result['requests_per_second']:>11.1f}"
+                f"{result['p50_ms']:>9.2f}{result['p99_ms']:>9.2f}{result['peak_mib']:>10.2f}")
+        if baseline and name in baseline:
+            before = baseline[name]["requests_per_second"]
+            change = result["requests_per_second"] / before - 1 if before else 0.0
+            line += f"  {change:+.1%} vs baseline"
+            if change < -tolerance:
+                line += "  REGRESSION"
+                ok = False
+        print(line)
+    return ok
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--latency", type=float, default=0.002, help="server latency per request in seconds")
+    parser.add_argument("--requests", type=int, default=500, help="requests of the per-ID scenarios")
+    parser.add_argument("--workers", type=int, default=16, help="concurrency of the threaded and async scenarios")
+    parser.add_argument("--users", type=int, default=5000, help="users served for the paginated scenario")
+    parser.add_argument("--per-page", type=int, default=200, help="page size of the paginated scenario")
+    parser.add_argument("--views", type=int, default=2000, help="views in one response of the decode scenarios")
+    parser.add_argument("--padding", type=int, default=256, help="extra bytes per user and view")
+    parser.add_argument("--repeat", type=int, default=5, help="repetitions of the decode scenarios")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="share of requests answered with 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 500")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", help="compare with results written by --json")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed throughput loss against the baseline")
+    options = parser.parse_args(argv)
+    # Retries of injected 429/500 responses are logged as warnings, which would only add noise and overhead
+    logging.getLogger("graylog_api_client").setLevel(logging.ERROR)
+
+    config = MockGraylogConfig(latency=options.latency, users=options.users, views=options.views,
+                               padding=options.padding, throttle_rate=options.throttle_rate,
+                               error_rate=options.error_rate)
+    with MockGraylogServer(config) as server:
+        results = {name: run_scenario(name, server.url, options) for name in options.scenarios}
+
+    baseline = None
+    if options.baseline:
+        with open(options.baseline) as file:
+            baseline = json.load(file)
+    ok = report(results, baseline, options.tolerance)
+    if options.json:
+        with open(options.json, "w") as file:
+            json.dump(results, file, indent=2)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
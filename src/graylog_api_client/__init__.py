@@ -1,3 +1,31 @@
+import importlib
+
 from graylog_api_client.graylog_api_client import GraylogAPI
+from graylog_api_client.bulk import BulkReport, UserOperation
+from graylog_api_client.cache import ResponseCache
+from graylog_api_client.instrumentation import InMemoryCollector, Instrumentation
+from graylog_api_client.policies import CircuitBreaker, RateLimiter, RetryPolicy
+
+# Optional components are imported on first access, so `import graylog_api_client` does not load asyncio or sqlite3
+_LAZY = {
+    "AsyncGraylogAPI": "graylog_api_client.async_graylog_api_client",
+    "GraylogFleet": "graylog_api_client.fleet",
+    "DiskCache": "graylog_api_client.disk_cache",
+    "EntityStore": "graylog_api_client.entity_store",
+    "ClusterPoller": "graylog_api_client.telemetry",
+    "HTTP2Adapter": "graylog_api_client.transport",
+}
+
+__all__ = ["GraylogAPI", "AsyncGraylogAPI", "GraylogFleet", "BulkReport", "UserOperation", "ResponseCache", "DiskCache", "EntityStore", "InMemoryCollector", "Instrumentation", "CircuitBreaker", "RateLimiter", "RetryPolicy", "ClusterPoller", "HTTP2Adapter"]
+
+
+def __getattr__(name: str):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY[name]), name)
+    globals()[name] = value
+    return value
+
 
-__all__ = ["GraylogAPI"]
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
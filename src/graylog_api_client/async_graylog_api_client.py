@@ -0,0 +1,340 @@
+import asyncio
+import functools
+import itertools
+import logging
+import time
+from collections import deque
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Tuple, Union
+
+from .async_rest_adapter import AsyncRestAdapter
+from .bulk import BulkItemResult, BulkReport, UserOperation, plan_bulk
+from .cache import ResponseCache
+from .instrumentation import Instrumentation
+from .policies import CircuitBreaker, RateLimiter, RetryPolicy, TokenBucket
+from .data_structures import GraylogApiResult, GraylogBatchResult
+from .exceptions import GraylogApiException
+from .graylog_api_client import GraylogAPI
+from .search import (EXPORT_FORMATS, Timestamp, _Done, decode_messages, messages_request, poll_intervals,
+                     split_time_range)
+from .telemetry import ClusterPoller
+
+
+async def async_ordered_prefetch(producers: List[Callable[[], AsyncIterator]], max_workers: int = 4,
+                                 buffer: int = 10000) -> AsyncIterator:
+    """Async version of search.ordered_prefetch, the producers run as tasks of the event loop.
+
+    :param producers: Functions without arguments that return an async iterator over their items.
+    :param max_workers: Maximum number of producers running at the same time.
+    :param buffer: Maximum number of items held per producer.
+    :return: An async iterator over the items of all producers.
+    """
+    if max_workers < 1:
+        raise ValueError(f"max_workers must be at least 1 but was: {max_workers}")
+
+    async def run(producer: Callable[[], AsyncIterator], target: asyncio.Queue):
+        items = None
+        try:
+            items = producer()
+            async for item in items:
+                await target.put(item)
+            await target.put(_Done())
+        except Exception as e:
+            await target.put(_Done(e))
+        finally:
+            aclose = getattr(items, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    def start(producer: Callable[[], AsyncIterator]) -> Tuple[asyncio.Task, asyncio.Queue]:
+        target = asyncio.Queue(maxsize=max(1, buffer))
+        return asyncio.ensure_future(run(producer, target)), target
+
+    started = deque(start(producer) for producer in producers[:max_workers])
+    try:
+        for index in range(len(producers)):
+            _, source = started[0]
+            while True:
+                item = await source.get()
+                if isinstance(item, _Done):
+                    if item.error is not None:
+                        raise item.error
+                    break
+                yield item
+            started.popleft()
+            if index + max_workers < len(producers):
+                started.append(start(producers[index + max_workers]))
+    finally:
+        for task, _ in started:
+            task.cancel()
+
+
+class AsyncGraylogAPI(GraylogAPI):
+    def __init__(self, host: str, api_key: str, ssl_verify: Union[str, bool] = True, logger: logging.Logger = None,
+                 max_connections: int = 10, cache: ResponseCache = None, coalesce: bool = False,
+                 retry: RetryPolicy = None, rate_limiter: RateLimiter = None, circuit_breaker: CircuitBreaker = None,
+                 instrumentation: Instrumentation = None, http2: bool = False, compression: bool = True,
+                 compress_requests: int = None):
+        """Asyncio twin of GraylogAPI
+
+        Exposes the same endpoint methods as GraylogAPI, but each of them returns a coroutine resolving to a
+        GraylogApiResult and the iter_* methods return async iterators. Use asyncio.gather to fan out many calls
+        over the shared connection pool:
+
+            async with AsyncGraylogAPI(host, api_key) as api:
+                users = await asyncio.gather(*(api.get_user_by_id(user_id) for user_id in user_ids))
+
+        :param host: The hostname of the Graylog API endpoint plus the protocol. Example: https://graylog.com/api
+        :param api_key: An API Key to authenticate with Graylog
+        :param ssl_verify: Enables or Disables TLS Certificate verification. For a custom certificate, this value must a path pointing to the certificate, defaults to True
+        :param logger: The logger being used by the Adapter, will use a new one if none is given, defaults to None
+        :param max_connections: Maximum number of concurrent requests and pooled connections to the host, defaults to 10
+        :param cache: Opt-in cache for GET responses, defaults to None
+        :param coalesce: Let concurrent identical GET requests share one network call and result, defaults to False
+        :param retry: Retry failed requests with exponential backoff and Retry-After handling, defaults to None (no retries)
+        :param rate_limiter: Client side token bucket rate limiting per endpoint prefix, defaults to None
+        :param circuit_breaker: Reject requests without sending them while the server keeps failing, defaults to None
+        :param instrumentation: Hooks called before and after every request with its timings, sizes and retries. Example: InMemoryCollector(), defaults to None
+        :param http2: Multiplex the concurrent requests over one HTTP/2 connection instead of max_connections HTTP/1.1 connections, defaults to False
+        :param compression: Ask for compressed responses (gzip, deflate, br, zstd), which are decompressed while they are read, defaults to True
+        :param compress_requests: Gzip request bodies of at least this many bytes, the server must accept Content-Encoding: gzip, defaults to None (never)
+        """
+        self._rest_adapter = AsyncRestAdapter(host=host, api_key=api_key, ssl_verify=ssl_verify, logger=logger,
+                                              max_connections=max_connections, cache=cache, coalesce=coalesce,
+                                              retry=retry, rate_limiter=rate_limiter, circuit_breaker=circuit_breaker,
+                                              instrumentation=instrumentation, http2=http2,
+                                              compression=compression, compress_requests=compress_requests)
+
+    async def _iter_pages(self, fetch: Callable[[Dict], GraylogApiResult], key: str, parameters: Dict = None,
+                          per_page: int = 50, max_items: int = None) -> AsyncIterator[Dict]:
+        """Async generator version of GraylogAPI._iter_pages, the next page is prefetched as a task.
+
+        :param fetch: Endpoint method that takes the query parameters and returns one page.
+        :param key: The key of the entity list in the page. Example: users.
+        :param parameters: Additional query parameters like query or sort, page and per_page are managed here.
+        :param per_page: Number of entities requested per page.
+        :param max_items: Stop after this many entities, defaults to None (all entities).
+        :return: An async iterator over the entity dictionaries.
+        """
+        if per_page < 1:
+            raise ValueError(f"per_page must be at least 1 but was: {per_page}")
+        if max_items is not None and max_items < 1:
+            return
+        base_parameters = dict(parameters or {}, per_page=per_page)
+        page = 1
+        task = asyncio.ensure_future(fetch(dict(base_parameters, page=page)))
+        try:
+            yielded = 0
+            while task is not None:
+                entities = ((await task).data or {}).get(key) or []
+                task = None
+                if len(entities) >= per_page and (max_items is None or yielded + len(entities) < max_items):
+                    page += 1
+                    task = asyncio.ensure_future(fetch(dict(base_parameters, page=page)))
+                for entity in entities:
+                    yield entity
+                    yielded += 1
+                    if yielded == max_items:
+                        return
+        finally:
+            if task is not None:
+                task.cancel()
+
+    def fetch_many(self, method: Union[str, Callable], ids: Iterable, max_workers: int = 10,
+                   ordered: bool = True) -> AsyncIterator[GraylogBatchResult]:
+        """Async version of GraylogAPI.fetch_many, the calls run as tasks of the event loop.
+
+        IDs are read lazily and at most 4 * max_workers of them are in flight or waiting to be yielded.
+
+        :param method: The endpoint method or its name. Example: get_user_by_id
+        :param ids: The IDs to call the method with, one call per ID.
+        :param max_workers: Maximum number of requests running at the same time, also bounded by max_connections.
+        :param ordered: Yield results in input order if True, otherwise as soon as they complete.
+        :return: An async iterator over one GraylogBatchResult per ID.
+        """
+        if max_workers < 1:
+            raise ValueError(f"max_workers must be at least 1 but was: {max_workers}")
+        call = self._resolve_method(method)
+        return self._fetch_many(call, ids, max_workers, ordered)
+
+    @staticmethod
+    async def _fetch_many(call: Callable, ids: Iterable, max_workers: int,
+                          ordered: bool) -> AsyncIterator[GraylogBatchResult]:
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def run(key) -> GraylogBatchResult:
+            async with semaphore:
+                try:
+                    return GraylogBatchResult(key, result=await call(key))
+                except Exception as e:
+                    return GraylogBatchResult(key, error=e)
+
+        ids = iter(ids)
+
+        def start_next(count: int = 1) -> List[asyncio.Task]:
+            return [asyncio.ensure_future(run(key)) for key in itertools.islice(ids, count)]
+
+        pending = deque() if ordered else set()
+        try:
+            if ordered:
+                pending.extend(start_next(max_workers * 4))
+                while pending:
+                    result = await pending[0]
+                    pending.popleft()
+                    pending.extend(start_next())
+                    yield result
+            else:
+                pending.update(start_next(max_workers * 4))
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        pending.update(start_next())
+                        yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def bulk_users(self, operations: Iterable[UserOperation], max_workers: int = 10, rate_limit: float = None,
+                         dry_run: bool = False, per_page: int = 500) -> BulkReport:
+        """Async version of GraylogAPI.bulk_users, the changes run as tasks of the event loop.
+
+        :param operations: The operations to apply, at most one is executed per username (the last one).
+        :param max_workers: Maximum number of requests running at the same time, also bounded by max_connections.
+        :param rate_limit: Maximum number of change requests per second, defaults to None (unlimited)
+        :param dry_run: Only diff the operations and report what would be changed, defaults to False
+        :param per_page: Page size used to read the existing users.
+        :return: A report with one BulkItemResult per operation, in input order.
+        """
+        if max_workers < 1:
+            raise ValueError(f"max_workers must be at least 1 but was: {max_workers}")
+        started = time.perf_counter()
+        operations = list(operations)
+        wanted = {operation.username for operation in operations}
+        existing = []
+        if wanted:
+            existing = [user async for user in self.iter_users(per_page=per_page) if user.get("username") in wanted]
+        items, pending, snapshot = plan_bulk(operations, existing)
+
+        if not dry_run and pending:
+            bucket = TokenBucket(rate_limit) if rate_limit else None
+            semaphore = asyncio.Semaphore(max_workers)
+
+            async def run(item: BulkItemResult):
+                async with semaphore:
+                    if bucket is not None:
+                        await asyncio.to_thread(bucket.acquire)
+                    try:
+                        item.result = await self._execute_user_operation(item, snapshot.get(item.operation.username))
+                    except Exception as e:
+                        item.status, item.error, item.reason = BulkItemResult.FAILED, e, "error"
+
+            await asyncio.gather(*(run(item) for item in pending))
+        return BulkReport(items, duration=time.perf_counter() - started, dry_run=dry_run)
+
+    def export_messages(self, query: str, from_: Timestamp, to: Timestamp, streams: List[str] = None,
+                        fields: List[str] = None, limit: int = None, export_format: str = "ndjson",
+                        chunk_size: int = 64 * 1024) -> AsyncIterator[Dict]:
+        """Async version of GraylogAPI.export_messages, the body is read and decoded on the worker threads.
+
+        :param query: The search query. Example: source:fw01 AND level:3
+        :param from_: Start of the time range, a datetime or an ISO 8601 string, naive values are UTC.
+        :param to: End of the time range, included in the export.
+        :param streams: IDs of the streams to search in, defaults to None (all streams the API key may read)
+        :param fields: Fields of the messages in export order, defaults to None (timestamp, source, message)
+        :param limit: Maximum number of messages, defaults to None (all)
+        :param export_format: ndjson yields decoded message objects, csv yields one dictionary of strings per row.
+        :param chunk_size: Number of bytes read from the connection at once.
+        :raises ValueError: If the export format is unknown.
+        :return: An async iterator over the messages.
+        """
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"export_format must be one of {', '.join(EXPORT_FORMATS)} but was: {export_format}")
+        request = messages_request(query, from_, to, streams, fields, limit)
+        return self._rest_adapter.iter_lines("POST", "views/search/messages", data=request,
+                                             accept=EXPORT_FORMATS[export_format], chunk_size=chunk_size,
+                                             decode=functools.partial(decode_messages, export_format=export_format))
+
+    def export_messages_parallel(self, query: str, from_: Timestamp, to: Timestamp, streams: List[str] = None,
+                                 fields: List[str] = None, export_format: str = "ndjson", slices: int = 8,
+                                 max_workers: int = 4, buffer: int = 10000) -> AsyncIterator[Dict]:
+        """Async version of GraylogAPI.export_messages_parallel, the sub-range exports run as tasks.
+
+        :param query: The search query. Example: source:fw01 AND level:3
+        :param from_: Start of the time range, a datetime or an ISO 8601 string, naive values are UTC.
+        :param to: End of the time range, included in the export.
+        :param streams: IDs of the streams to search in, defaults to None (all streams the API key may read)
+        :param fields: Fields of the messages in export order, defaults to None (timestamp, source, message)
+        :param export_format: ndjson yields decoded message objects, csv yields one dictionary of strings per row.
+        :param slices: Number of sub-ranges the time range is split into.
+        :param max_workers: Maximum number of exports running at the same time, also bounded by max_connections.
+        :param buffer: Maximum number of messages held per running export.
+        :raises ValueError: If the export format, slices or max_workers are invalid.
+        :return: An async iterator over the messages.
+        """
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"export_format must be one of {', '.join(EXPORT_FORMATS)} but was: {export_format}")
+        if max_workers < 1:
+            raise ValueError(f"max_workers must be at least 1 but was: {max_workers}")
+        producers = [functools.partial(self.export_messages, query, start, end, streams, fields,
+                                       export_format=export_format)
+                     for start, end in split_time_range(from_, to, slices)]
+        return async_ordered_prefetch(producers, max_workers=max_workers, buffer=buffer)
+
+    async def wait_for_search_job(self, job: Dict, timeout: float = 300, poll_interval: float = 0.1,
+                                  max_poll_interval: float = 2.0) -> GraylogApiResult:
+        """Async version of GraylogAPI.wait_for_search_job, the event loop keeps running between the polls.
+
+        :param job: The search job as returned by execute_search.
+        :param timeout: Seconds to wait for the job before giving up.
+        :param poll_interval: Seconds to wait before the first poll.
+        :param max_poll_interval: Upper bound for the seconds between two polls.
+        :raises GraylogApiException: If the job did not finish within timeout.
+        :return: The status of the finished job including its results.
+        """
+        job_id, node_id = job["id"], job.get("executing_node")
+        status = GraylogApiResult(200, data=job)
+        deadline = time.monotonic() + timeout
+        for interval in poll_intervals(poll_interval, max_poll_interval):
+            if ((status.data or {}).get("execution") or {}).get("done"):
+                return status
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise GraylogApiException(f"Search job {job_id} did not finish within {timeout} seconds")
+            await asyncio.sleep(min(interval, remaining))
+            status = await self.get_search_job_status(job_id, node_id)
+
+    async def search(self, search: Dict, parameters: Dict = None, timeout: float = 300) -> GraylogApiResult:
+        """Async version of GraylogAPI.search: create a search, execute it and wait for its results.
+
+        :param search: The search definition with its queries. Example: {"queries": [{"id": "q1", ...}]}
+        :param parameters: Execution state like parameter bindings, defaults to None
+        :param timeout: Seconds to wait for the search job.
+        :return: The status of the finished search job including its results.
+        """
+        search_id = (await self.create_search(search)).data["id"]
+        job = (await self.execute_search(search_id, parameters)).data
+        return await self.wait_for_search_job(job, timeout=timeout)
+
+    def cluster_poller(self, interval: float = 10, **kwargs) -> ClusterPoller:
+        """Create a ClusterPoller that scrapes the telemetry of every node of this cluster every interval seconds.
+
+        Example: poller = api.cluster_poller(interval=10, history=5000); poller.start()
+
+        :param interval: Seconds between two polls.
+        :param kwargs: Further arguments of ClusterPoller like timeout, jitter, history, collectors or callback.
+        :return: The ClusterPoller, call start() or run() from within the event loop.
+        """
+        return ClusterPoller(self, interval=interval, **kwargs)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    async def aclose(self):
+        """Like close, but waits for the running requests on a separate thread so the event loop keeps running."""
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    def close(self):
+        """Release the worker threads and pooled connections."""
+        self._rest_adapter.close()
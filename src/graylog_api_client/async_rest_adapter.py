@@ -0,0 +1,156 @@
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Union
+
+from .cache import ResponseCache
+from .instrumentation import Instrumentation
+from .policies import CircuitBreaker, RateLimiter, RetryPolicy
+from .rest_adapter import RestAdapter
+from .data_structures import GraylogApiResult
+
+
+class AsyncRestAdapter:
+    def __init__(self, host: str, api_key: str, ssl_verify: Union[str, bool] = True, logger: logging.Logger = None,
+                 max_connections: int = 10, cache: ResponseCache = None, coalesce: bool = False,
+                 retry: RetryPolicy = None, rate_limiter: RateLimiter = None, circuit_breaker: CircuitBreaker = None,
+                 instrumentation: Instrumentation = None, http2: bool = False, compression: bool = True,
+                 compress_requests: int = None):
+        """Asyncio counterpart of RestAdapter
+
+        Requests are executed by a RestAdapter on a dedicated thread pool, so the HTTP/1.1 keep-alive pool,
+        authentication, error handling and results are exactly the same as for the synchronous client.
+
+        :param host: The hostname of the Graylog API endpoint plus the protocol. Example: https://graylog.com/api
+        :param api_key: An API Key to authenticate with Graylog
+        :param ssl_verify: Enables or Disables TLS Certificate verification. For a custom certificate, this value must a path pointing to the certificate, defaults to True
+        :param logger: The logger being used by the Adapter, will use a new one if none is given, defaults to None
+        :param max_connections: Maximum number of concurrent requests and pooled connections to the host, defaults to 10
+        :param cache: Opt-in cache for GET responses, defaults to None
+        :param coalesce: Let concurrent identical GET requests share one network call and result, defaults to False
+        :param retry: Retry failed requests with exponential backoff and Retry-After handling, defaults to None (no retries)
+        :param rate_limiter: Client side token bucket rate limiting per endpoint prefix, defaults to None
+        :param circuit_breaker: Reject requests without sending them while the server keeps failing, defaults to None
+        :param instrumentation: Hooks called before and after every request with its timings, sizes and retries. Example: InMemoryCollector(), defaults to None
+        :param http2: Multiplex the concurrent requests over one HTTP/2 connection instead of max_connections HTTP/1.1 connections, defaults to False
+        :param compression: Ask for compressed responses (gzip, deflate, br, zstd), which are decompressed while they are read, defaults to True
+        :param compress_requests: Gzip request bodies of at least this many bytes, the server must accept Content-Encoding: gzip, defaults to None (never)
+        """
+        if max_connections < 1:
+            raise ValueError(f"max_connections must be at least 1 but was: {max_connections}")
+        self._rest_adapter = RestAdapter(host=host, api_key=api_key, ssl_verify=ssl_verify, logger=logger,
+                                         pool_maxsize=max_connections, cache=cache, coalesce=coalesce,
+                                         retry=retry, rate_limiter=rate_limiter, circuit_breaker=circuit_breaker,
+                                         instrumentation=instrumentation, http2=http2,
+                                         compression=compression, compress_requests=compress_requests)
+        self._executor = ThreadPoolExecutor(max_workers=max_connections, thread_name_prefix="graylog-api")
+        self.host = self._rest_adapter.host
+
+    async def _do(self, method: str, endpoint: str, parameters: Dict = None, data: Dict = None) -> GraylogApiResult:
+        """Run the HTTP Request without blocking the event loop.
+
+        :param method: The HTTP Method that this request will use.
+        :param endpoint: The API endpoint that this request goes to. Example: /streams.
+        :param parameters: Dictionary to be sent in the query string of the Request.
+        :param data: Dictionary to be sent in the body of the Request.
+        :raises GraylogApiException: Generic Exception for Errors caused within the Adapter.
+        :return: An object containing the Result of the API request.
+        """
+        loop = asyncio.get_running_loop()
+        call = functools.partial(self._rest_adapter._do, method=method, endpoint=endpoint, parameters=parameters, data=data)
+        return await loop.run_in_executor(self._executor, call)
+
+    async def _iterate(self, items: Iterator) -> AsyncIterator[Any]:
+        """Pull the items of a blocking iterator on the worker threads, so reading the body never blocks the loop."""
+        done = object()
+        future = None
+        try:
+            while True:
+                future = self._executor.submit(next, items, done)
+                item = await asyncio.wrap_future(future)
+                if item is done:
+                    return
+                yield item
+        finally:
+            if future is not None and not future.done():
+                # A worker is still inside next(), the iterator may only be closed once it returned
+                future.add_done_callback(lambda _: items.close())
+            else:
+                items.close()
+
+    def iter_items(self, endpoint: str, parameters: Dict = None, key: str = None,
+                   chunk_size: int = 64 * 1024) -> AsyncIterator[Any]:
+        """Async version of RestAdapter.iter_items, the body is read and decoded on the worker threads.
+
+        :param endpoint: The API endpoint that this request goes to. Example: /streams.
+        :param parameters: Dictionary to be sent in the query string of the Request.
+        :param key: Member of the top-level object that holds the array. Example: streams. None if the body is an array.
+        :param chunk_size: Number of bytes read from the connection at once.
+        :raises GraylogApiException: Generic Exception for Errors caused within the Adapter.
+        :return: An async iterator over the decoded items.
+        """
+        return self._iterate(self._rest_adapter.iter_items(endpoint, parameters, key, chunk_size))
+
+    def iter_lines(self, method: str, endpoint: str, parameters: Dict = None, data: Dict = None,
+                   accept: str = "application/x-ndjson", chunk_size: int = 64 * 1024,
+                   decode: Callable[[Iterator[bytes]], Iterator[Any]] = None) -> AsyncIterator[Any]:
+        """Async version of RestAdapter.iter_lines, the body is read on the worker threads.
+
+        :param method: The HTTP Method that this request will use.
+        :param endpoint: The API endpoint that this request goes to. Example: views/search/messages.
+        :param parameters: Dictionary to be sent in the query string of the Request.
+        :param data: Dictionary to be sent in the body of the Request.
+        :param accept: Media type requested from the server. Example: text/csv
+        :param chunk_size: Number of bytes read from the connection at once.
+        :param decode: Turns the lines into items on the worker threads as well, defaults to None (lines as bytes)
+        :raises GraylogApiException: Generic Exception for Errors caused within the Adapter.
+        :return: An async iterator over the lines, or the items decode made of them.
+        """
+        lines = self._rest_adapter.iter_lines(method, endpoint, parameters, data=data, accept=accept,
+                                              chunk_size=chunk_size)
+        return self._iterate(decode(lines) if decode is not None else lines)
+
+    async def get(self, endpoint: str, parameters: Dict = None) -> GraylogApiResult:
+        """Send a GET request to the API.
+
+        :param endpoint: The API endpoint that this request goes to. Example: /streams.
+        :param parameters: Dictionary to be sent in the query string of the Request.
+        :return: An object containing the Result of the API request.
+        """
+        return await self._do(method="GET", endpoint=endpoint, parameters=parameters)
+
+    async def post(self, endpoint: str, parameters: Dict = None, data: Dict = None) -> GraylogApiResult:
+        """Send a POST request to the API.
+
+        :param endpoint: The API endpoint that this request goes to. Example: /streams.
+        :param parameters: Dictionary to be sent in the query string of the Request.
+        :param data: Dictionary to be sent in the body of the Request.
+        :return: An object containing the Result of the API request.
+        """
+        return await self._do(method="POST", endpoint=endpoint, parameters=parameters, data=data)
+
+    async def delete(self, endpoint: str, parameters: Dict = None, data: Dict = None) -> GraylogApiResult:
+        """Send a DELETE request to the API.
+
+        :param endpoint: The API endpoint that this request goes to. Example: /streams.
+        :param parameters: Dictionary to be sent in the query string of the Request.
+        :param data: Dictionary to be sent in the body of the Request.
+        :return: An object containing the Result of the API request.
+        """
+        return await self._do(method="DELETE", endpoint=endpoint, parameters=parameters, data=data)
+
+    async def put(self, endpoint: str, parameters: Dict = None, data: Dict = None) -> GraylogApiResult:
+        """Send a PUT request to the API.
+
+        :param endpoint: The API endpoint that this request goes to. Example: /streams.
+        :param parameters: Dictionary to be sent in the query string of the Request.
+        :param data: Dictionary to be sent in the body of the Request.
+        :return: An object containing the Result of the API request.
+        """
+        return await self._do(method="PUT", endpoint=endpoint, parameters=parameters, data=data)
+
+    def close(self):
+        """Wait for running requests, then release the worker threads and pooled connections."""
+        self._executor.shutdown(wait=True)
+        self._rest_adapter.close()
@@ -0,0 +1,226 @@
+import time
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .data_structures import GraylogApiResult
+
+
+class UserOperation:
+    CREATE = "create"
+    UPDATE = "update"
+    DISABLE = "disable"
+    DELETE = "delete"
+    ACTIONS = (CREATE, UPDATE, DISABLE, DELETE)
+
+    def __init__(self, action: str, username: str, fields: Dict = None):
+        """A single change of a bulk user sync
+
+        :param action: One of create, update, disable or delete
+        :param username: The username the change applies to
+        :param fields: User fields for create and update. Example: {"email": "foo@example.com", "roles": ["Reader"]}
+        """
+        if action not in self.ACTIONS:
+            raise ValueError(f"Action must be one of {', '.join(self.ACTIONS)} but was: {action}")
+        if not username:
+            raise ValueError("username must not be empty")
+        self.action = action
+        self.username = username
+        self.fields = dict(fields) if fields else {}
+
+    @classmethod
+    def create(cls, username: str, first_name: str, last_name: str, email: str, password: str,
+               permissions: List[str] = None, **fields) -> "UserOperation":
+        """Create the user, or update the given fields if it already exists."""
+        fields.update(first_name=first_name, last_name=last_name, email=email, password=password)
+        if permissions:
+            fields["permissions"] = permissions
+        return cls(cls.CREATE, username, fields)
+
+    @classmethod
+    def update(cls, username: str, **fields) -> "UserOperation":
+        return cls(cls.UPDATE, username, fields)
+
+    @classmethod
+    def disable(cls, username: str) -> "UserOperation":
+        return cls(cls.DISABLE, username)
+
+    @classmethod
+    def delete(cls, username: str) -> "UserOperation":
+        return cls(cls.DELETE, username)
+
+    def __repr__(self):
+        return f"UserOperation({self.action!r}, {self.username!r})"
+
+
+class BulkItemResult:
+    CREATED = "created"
+    UPDATED = "updated"
+    DISABLED = "disabled"
+    DELETED = "deleted"
+    SKIPPED = "skipped"
+    FAILED = "failed"
+
+    def __init__(self, operation: UserOperation, status: str, reason: str = "", changes: Dict = None,
+                 result: GraylogApiResult = None, error: Exception = None):
+        """Outcome of a single operation of a bulk user sync
+
+        :param operation: The operation this result is for
+        :param status: One of created, updated, disabled, deleted, skipped or failed
+        :param reason: Why the operation was skipped or failed. Example: unchanged
+        :param changes: The fields that differed from the existing user and were sent
+        :param result: The result of the request if one was sent and succeeded
+        :param error: The exception raised by the request if it failed
+        """
+        self.operation = operation
+        self.status = status
+        self.reason = reason
+        self.changes = changes
+        self.result = result
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.status != self.FAILED
+
+    def __repr__(self):
+        reason = f", {self.reason}" if self.reason else ""
+        return f"BulkItemResult({self.operation.action!r}, {self.operation.username!r}, {self.status}{reason})"
+
+
+class BulkReport:
+    def __init__(self, items: List[BulkItemResult], duration: float = 0.0, dry_run: bool = False):
+        """Per-item report of a bulk user sync in the order the operations were given
+
+        :param items: One result per operation
+        :param duration: Seconds the sync took, including the snapshot of existing users
+        :param dry_run: True if no changes were sent
+        """
+        self.items = items
+        self.duration = duration
+        self.dry_run = dry_run
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        return dict(Counter(item.status for item in self.items))
+
+    @property
+    def failed(self) -> List[BulkItemResult]:
+        return [item for item in self.items if not item.ok]
+
+    @property
+    def ok(self) -> bool:
+        return all(item.ok for item in self.items)
+
+    def to_dicts(self) -> List[Dict]:
+        """The report as plain dictionaries, ready to be written as JSON."""
+        return [{"action": item.operation.action, "username": item.operation.username, "status": item.status,
+                 "reason": item.reason, "changes": sorted(item.changes) if item.changes else [],
+                 "error": str(item.error) if item.error is not None else None} for item in self.items]
+
+    def __repr__(self):
+        return f"BulkReport({self.counts}, duration={self.duration:.2f}s)"
+
+
+# Fields that are never compared with or sent as part of an update of an existing user
+_UPDATE_IGNORED = frozenset(("username", "password"))
+
+
+def _differs(wanted, existing) -> bool:
+    if isinstance(wanted, (list, tuple)) and isinstance(existing, (list, tuple)):
+        try:
+            return set(wanted) != set(existing)
+        except TypeError:
+            return list(wanted) != list(existing)
+    return wanted != existing
+
+
+def diff_user(fields: Dict, existing: Dict) -> Dict:
+    """The fields whose values differ from the existing user, lists are compared regardless of their order."""
+    return {key: value for key, value in fields.items()
+            if key not in _UPDATE_IGNORED and _differs(value, existing.get(key))}
+
+
+def plan(operation: UserOperation, existing: Optional[Dict]) -> BulkItemResult:
+    """Decide what has to be sent for an operation, given the existing user or None if there is none.
+
+    The returned result has the status the operation will have once its request succeeded, or skipped if
+    nothing has to be sent.
+    """
+    action = operation.action
+    if action == UserOperation.CREATE:
+        if existing is None:
+            return BulkItemResult(operation, BulkItemResult.CREATED, changes=operation.fields)
+        action = UserOperation.UPDATE
+    if existing is None:
+        status = BulkItemResult.FAILED if action == UserOperation.UPDATE else BulkItemResult.SKIPPED
+        return BulkItemResult(operation, status, reason="absent")
+    if action == UserOperation.UPDATE:
+        changes = diff_user(operation.fields, existing)
+        if not changes:
+            return BulkItemResult(operation, BulkItemResult.SKIPPED, reason="unchanged")
+        return BulkItemResult(operation, BulkItemResult.UPDATED, changes=changes)
+    if action == UserOperation.DISABLE:
+        if existing.get("account_status") == "disabled":
+            return BulkItemResult(operation, BulkItemResult.SKIPPED, reason="already disabled")
+        return BulkItemResult(operation, BulkItemResult.DISABLED)
+    return BulkItemResult(operation, BulkItemResult.DELETED)
+
+
+def plan_bulk(operations: List[UserOperation],
+              existing_users: Iterable[Dict]) -> Tuple[List[BulkItemResult], List[BulkItemResult], Dict[str, Dict]]:
+    """Diff the operations against the existing users without sending anything.
+
+    If a username occurs more than once only its last operation is planned, the earlier ones are reported as
+    skipped, so that no two requests for the same user run at the same time.
+
+    :param operations: The operations in the order they are reported.
+    :param existing_users: The users currently in Graylog, only username, id, account_status and the fields of
+        the operations are kept. Not read at all if there are no operations.
+    :return: One item per operation, the items that need a request and the kept fields of the existing users by username.
+    """
+    last = {operation.username: index for index, operation in enumerate(operations)}
+    wanted = set(last)
+    compared = {key for operation in operations for key in operation.fields} | {"id", "account_status"}
+    snapshot = {}
+    if wanted:
+        snapshot = {user.get("username"): {key: user.get(key) for key in compared if key in user}
+                    for user in existing_users if user.get("username") in wanted}
+
+    items: List[BulkItemResult] = []
+    pending = []
+    for index, operation in enumerate(operations):
+        if last[operation.username] != index:
+            items.append(BulkItemResult(operation, BulkItemResult.SKIPPED, reason="superseded"))
+            continue
+        item = plan(operation, snapshot.get(operation.username))
+        items.append(item)
+        if item.status != BulkItemResult.SKIPPED and item.ok:
+            pending.append(item)
+    return items, pending, snapshot
+
+
+def run_bulk(operations: Iterable[UserOperation], existing_users: Iterable[Dict],
+             execute: Callable[[BulkItemResult, Optional[Dict]], GraylogApiResult],
+             run_all: Callable[[Callable, List], Iterable], dry_run: bool = False) -> BulkReport:
+    """Diff the operations against the existing users and execute the remaining changes, see plan_bulk.
+
+    :param operations: The operations in the order they are reported.
+    :param existing_users: The users currently in Graylog.
+    :param execute: Sends the request for a planned item, gets the existing user or None.
+    :param run_all: Calls a function for every item of a list concurrently and returns the results.
+    :param dry_run: Only plan the changes without sending them.
+    """
+    started = time.perf_counter()
+    items, pending, snapshot = plan_bulk(list(operations), existing_users)
+
+    if not dry_run and pending:
+        def run(item: BulkItemResult) -> BulkItemResult:
+            try:
+                item.result = execute(item, snapshot.get(item.operation.username))
+            except Exception as e:
+                item.status, item.error, item.reason = BulkItemResult.FAILED, e, "error"
+            return item
+
+        for _ in run_all(run, pending):
+            pass
+    return BulkReport(items, duration=time.perf_counter() - started, dry_run=dry_run)
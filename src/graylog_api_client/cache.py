@@ -0,0 +1,149 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from .data_structures import GraylogApiResult
+
+
+class CacheEntry:
+    __slots__ = ("result", "expires", "etag", "last_modified")
+
+    def __init__(self, result: GraylogApiResult, expires: float, etag: str = None, last_modified: str = None):
+        """A cached GET response
+
+        :param result: The decoded result that is handed out on a hit
+        :param expires: Monotonic timestamp after which the entry has to be revalidated
+        :param etag: The ETag header of the response, if any
+        :param last_modified: The Last-Modified header of the response, if any
+        """
+        self.result = result
+        self.expires = expires
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @property
+    def fresh(self) -> bool:
+        return time.monotonic() < self.expires
+
+    @property
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers to revalidate a stale entry."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    def __init__(self, default_ttl: float = 60, ttls: Dict[str, float] = None, max_entries: int = 1024):
+        """TTL and LRU bounded cache for GET responses of a RestAdapter
+
+        Entries are keyed on host, API key, endpoint and query parameters. A POST, PUT or DELETE invalidates every entry of
+        the same resource, which is the first segment of the endpoint, so create_user drops the cached users*.
+        Cached GraylogApiResult objects are shared between callers and must not be modified.
+
+        :param default_ttl: Seconds an entry is served without asking the server, defaults to 60
+        :param ttls: TTL per endpoint prefix, the longest matching prefix wins. Example: {"ca": 3600, "cluster": 5}
+        :param max_entries: Maximum number of entries, the least recently used one is evicted first, defaults to 1024
+        """
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be at least 1 but was: {max_entries}")
+        self.default_ttl = default_ttl
+        self.ttls = dict(ttls or {})
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+
+    @staticmethod
+    def make_key(host: str, endpoint: str, parameters: Dict = None, credential: str = None) -> Tuple:
+        """Key of a GET response. credential identifies the API key, so clients with different keys never share
+        entries, as Graylog answers the same request differently depending on the permissions of the key."""
+        params = tuple(sorted((str(k), str(v)) for k, v in parameters.items())) if parameters else ()
+        return host, endpoint.strip("/"), params, credential
+
+    @staticmethod
+    def credential_of(api_key: str) -> str:
+        """A digest of an API key for make_key, the key itself is never stored."""
+        return hashlib.blake2b(api_key.encode(), digest_size=16, person=b"graylog-api-key").hexdigest()
+
+    @staticmethod
+    def _resource(endpoint: str) -> str:
+        return endpoint.strip("/").split("/", 1)[0]
+
+    def ttl_for(self, endpoint: str) -> float:
+        endpoint = endpoint.strip("/")
+        matches = [prefix for prefix in self.ttls if endpoint.startswith(prefix.strip("/"))]
+        if not matches:
+            return self.default_ttl
+        return self.ttls[max(matches, key=len)]
+
+    def get(self, key: Tuple) -> Optional[CacheEntry]:
+        """Return the entry for key, stale entries are only returned if they can be revalidated."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                return self._serve(key, entry)
+        entry = self._load(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self._put(key, entry)
+            return self._serve(key, entry)
+
+    def _serve(self, key: Tuple, entry: CacheEntry) -> Optional[CacheEntry]:
+        if entry.fresh:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+        if not entry.validators:
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _load(self, key: Tuple) -> Optional[CacheEntry]:
+        """Look up an entry that is not held in memory, overridden by caches with a second tier."""
+        return None
+
+    def _put(self, key: Tuple, entry: CacheEntry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def set(self, key: Tuple, result: GraylogApiResult, etag: str = None, last_modified: str = None):
+        expires = time.monotonic() + self.ttl_for(key[1])
+        with self._lock:
+            self._put(key, CacheEntry(result, expires, etag, last_modified))
+
+    def revalidated(self, key: Tuple) -> Optional[CacheEntry]:
+        """Mark an entry as fresh again after the server answered 304 Not Modified."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.expires = time.monotonic() + self.ttl_for(key[1])
+                self.revalidations += 1
+            return entry
+
+    def invalidate(self, host: str, endpoint: str):
+        """Drop all entries of the resource endpoint belongs to."""
+        resource = self._resource(endpoint)
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == host and self._resource(key[1]) == resource]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
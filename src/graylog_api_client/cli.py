@@ -0,0 +1,267 @@
+"""graylog-api: query Graylog from the shell
+
+    export GRAYLOG_HOST=https://graylog.example.com/api GRAYLOG_API_KEY=...
+    graylog-api list users > users.ndjson
+    graylog-api list streams --format csv --fields id,title,disabled
+    cut -f1 user_ids.txt | graylog-api get tokens --concurrency 32 --rate-limit 100
+    graylog-api call get_system_cluster_nodes
+    graylog-api export "source:fw01" --from 2024-05-01T00:00:00Z --to 2024-05-02T00:00:00Z --slices 24
+
+Output is written item by item as NDJSON or CSV while it is received, so memory does not grow with the size of the
+inventory. Failed IDs of get are reported on stderr and make the exit code 1.
+"""
+import argparse
+import csv
+import io
+import itertools
+import json
+import logging
+import os
+import sys
+from typing import Any, Callable, Dict, IO, Iterable, Iterator, List
+
+from .data_structures import GraylogApiResult
+from .disk_cache import DiskCache, default_path
+from .exceptions import GraylogApiException
+from .graylog_api_client import GraylogAPI
+from .json_codec import get_dumps
+from .policies import RateLimiter, RetryPolicy
+
+LISTS: Dict[str, Callable[..., Iterator[Dict]]] = {
+    "users": lambda api, parameters, per_page, limit: api.iter_users(parameters, per_page=per_page, max_items=limit),
+    "roles": lambda api, parameters, per_page, limit: api.iter_auth_roles(parameters, per_page=per_page,
+                                                                          max_items=limit),
+    "views": lambda api, parameters, per_page, limit: api.iter_views(parameters, per_page=per_page, max_items=limit),
+    "streams": lambda api, parameters, per_page, limit: itertools.islice(api.iter_streams(), limit),
+    "cluster": lambda api, parameters, per_page, limit: itertools.islice((api.get_cluster().data or {}).values(),
+                                                                         limit),
+}
+# Lists that are paged by the server, only these take query parameters and a page size
+PAGED_LISTS = frozenset(("users", "roles", "views"))
+DEFAULT_PER_PAGE = 200
+
+# Per-ID methods by the kind of ID, any other GraylogAPI method name is accepted as well
+GETS = {
+    "users": "get_user_by_id",
+    "usernames": "get_user_by_username",
+    "tokens": "get_user_tokens_by_id",
+    "roles": "get_auth_role_by_id",
+    "views": "get_view_by_id",
+    "streams": "get_streams_by_stream_id",
+    "nodes": "get_system_cluster_nodes_by_node_id",
+    "jvm": "get_jvminfo",
+}
+
+
+class NdjsonWriter:
+    def __init__(self, stream: IO[bytes]):
+        """Writes one JSON document per line"""
+        self._stream = stream
+        self._dumps = get_dumps()
+
+    def write(self, item: Any):
+        self._stream.write(self._dumps(item) + b"\n")
+
+    def close(self):
+        self._stream.flush()
+
+
+class CsvWriter:
+    def __init__(self, stream: IO[bytes], fields: List[str] = None):
+        """Writes one row per item, the columns are fields or the keys of the first item
+
+        Nested values are written as JSON, keys that are not a column are dropped.
+        """
+        self._text = io.TextIOWrapper(stream, encoding="utf-8", newline="", write_through=True)
+        self._fields = fields
+        self._writer = None
+
+    def write(self, item: Any):
+        if not isinstance(item, dict):
+            item = {"value": item}
+        if self._writer is None:
+            self._writer = csv.DictWriter(self._text, fieldnames=self._fields or list(item), extrasaction="ignore")
+            self._writer.writeheader()
+        self._writer.writerow({key: json.dumps(value) if isinstance(value, (dict, list)) else value
+                               for key, value in item.items()})
+
+    def close(self):
+        self._text.flush()
+        self._text.detach()
+
+
+def read_ids(stream: IO[str]) -> Iterator[str]:
+    """Non-empty lines of stream, stripped, read lazily."""
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield line
+
+
+def parse_parameters(pairs: Iterable[str]) -> Dict[str, str]:
+    """Example: ["query=admin", "page=2"] -> {"query": "admin", "page": "2"}"""
+    parameters = {}
+    for pair in pairs:
+        key, separator, value = pair.partition("=")
+        if not separator or not key:
+            raise ValueError(f"Parameters must look like key=value but was: {pair}")
+        parameters[key] = value
+    return parameters
+
+
+def parse_data(value: str) -> Any:
+    """A JSON document, @path reads it from a file and @- from stdin."""
+    if value.startswith("@"):
+        with (sys.stdin if value == "@-" else open(value[1:], encoding="utf-8")) as file:
+            return json.load(file)
+    return json.loads(value)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="graylog-api", description="Query the Graylog REST API.")
+    parser.add_argument("--host", default=os.environ.get("GRAYLOG_HOST"),
+                        help="API URL, defaults to $GRAYLOG_HOST. Example: https://graylog.example.com/api")
+    parser.add_argument("--api-key", default=os.environ.get("GRAYLOG_API_KEY"),
+                        help="API token, defaults to $GRAYLOG_API_KEY")
+    parser.add_argument("--ca-cert", help="CA bundle to verify the server certificate with")
+    parser.add_argument("--insecure", action="store_true", help="do not verify the server certificate")
+    parser.add_argument("--format", choices=("ndjson", "csv"), default="ndjson", help="output format")
+    parser.add_argument("--fields", help="comma separated CSV columns, defaults to the keys of the first item")
+    parser.add_argument("--concurrency", type=int, default=8, help="requests running at the same time")
+    parser.add_argument("--rate-limit", type=float, help="maximum requests per second")
+    parser.add_argument("--retries", type=int, default=3, help="retries of failed idempotent requests")
+    parser.add_argument("--cache", action="store_true", help="cache GET responses on disk")
+    parser.add_argument("--cache-path", metavar="PATH", help=f"cache file, implies --cache, defaults to {default_path()}")
+    parser.add_argument("--cache-ttl", type=float, default=300, help="seconds cached responses are used")
+    parser.add_argument("--http2", action="store_true", help="multiplex requests over one HTTP/2 connection")
+    parser.add_argument("-v", "--verbose", action="count", default=0,
+                        help="log retries and failed requests, twice to log every request")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    list_command = commands.add_parser("list", help="stream a paginated list")
+    list_command.add_argument("kind", choices=sorted(LISTS))
+    list_command.add_argument("--param", action="append", default=[], metavar="KEY=VALUE", help="query parameter")
+    list_command.add_argument("--per-page", type=int,
+                              help=f"page size of {', '.join(sorted(PAGED_LISTS))}, defaults to {DEFAULT_PER_PAGE}")
+    list_command.add_argument("--limit", type=int, help="maximum number of items")
+
+    get_command = commands.add_parser("get", help="fetch many IDs in parallel")
+    get_command.add_argument("method", help=f"one of {', '.join(GETS)} or a GraylogAPI method taking one ID")
+    get_command.add_argument("ids", nargs="*", help="the IDs, read from stdin (one per line) if none are given")
+    get_command.add_argument("--unordered", action="store_true", help="write results as soon as they arrive")
+
+    call_command = commands.add_parser("call", help="call any GraylogAPI method once")
+    call_command.add_argument("method", help="Example: get_system_cluster_nodes")
+    call_command.add_argument("args", nargs="*", help="positional arguments, for example IDs")
+    call_command.add_argument("--param", action="append", default=[], metavar="KEY=VALUE", help="query parameter")
+    call_command.add_argument("--data", help="JSON body, @file or @- for stdin")
+
+    export_command = commands.add_parser("export", help="stream the messages of a time range")
+    export_command.add_argument("query")
+    export_command.add_argument("--from", dest="from_", required=True, help="ISO 8601 start, included")
+    export_command.add_argument("--to", required=True, help="ISO 8601 end, included")
+    export_command.add_argument("--stream", action="append", dest="streams", help="stream ID, can be repeated")
+    export_command.add_argument("--field", action="append", dest="export_fields", help="message field, can be repeated")
+    export_command.add_argument("--slices", type=int, default=1, help="sub-ranges exported in parallel")
+    return parser
+
+
+def build_api(args: argparse.Namespace) -> GraylogAPI:
+    if not args.host or not args.api_key:
+        raise ValueError("--host and --api-key (or GRAYLOG_HOST and GRAYLOG_API_KEY) are required")
+    if args.concurrency < 1:
+        raise ValueError(f"--concurrency must be at least 1 but was: {args.concurrency}")
+    return GraylogAPI(args.host.rstrip("/"), args.api_key,
+                      ssl_verify=False if args.insecure else (args.ca_cert or True),
+                      pool_maxsize=args.concurrency,
+                      cache=DiskCache(args.cache_path, default_ttl=args.cache_ttl)
+                      if args.cache or args.cache_path else None,
+                      retry=RetryPolicy(total=args.retries) if args.retries else None,
+                      rate_limiter=RateLimiter({"": args.rate_limit}) if args.rate_limit else None,
+                      http2=args.http2)
+
+
+def _items(result: Any) -> Iterator[Any]:
+    """Items of what a GraylogAPI method returned: iterators are streamed, results yield their data."""
+    if isinstance(result, GraylogApiResult):
+        yield result.data
+    elif isinstance(result, Iterator):
+        yield from result
+    elif result is not None:
+        yield result
+
+
+def run(args: argparse.Namespace, api: GraylogAPI, write: Callable[[Any], None], stdin: IO[str],
+        stderr: IO[str]) -> int:
+    if args.command == "list":
+        if args.kind not in PAGED_LISTS and (args.param or args.per_page is not None):
+            raise ValueError(f"--param and --per-page only apply to {', '.join(sorted(PAGED_LISTS))} "
+                             f"but kind was: {args.kind}")
+        per_page = DEFAULT_PER_PAGE if args.per_page is None else args.per_page
+        for item in LISTS[args.kind](api, parse_parameters(args.param) or None, per_page, args.limit):
+            write(item)
+        return 0
+    if args.command == "get":
+        failed = 0
+        ids = args.ids if args.ids and args.ids != ["-"] else read_ids(stdin)
+        for outcome in api.fetch_many(GETS.get(args.method, args.method), ids, max_workers=args.concurrency,
+                                      ordered=not args.unordered):
+            if outcome.ok:
+                write(outcome.result.data)
+            else:
+                failed += 1
+                stderr.write(json.dumps({"id": outcome.key, "error": str(outcome.error)}) + "\n")
+        return 1 if failed else 0
+    if args.command == "call":
+        kwargs = {}
+        if args.param:
+            kwargs["parameters"] = parse_parameters(args.param)
+        if args.data is not None:
+            kwargs["data"] = parse_data(args.data)
+        for item in _items(api._resolve_method(args.method)(*args.args, **kwargs)):
+            write(item)
+        return 0
+    if args.command == "export":
+        for message in api.export_messages_parallel(args.query, args.from_, args.to, streams=args.streams,
+                                                    fields=args.export_fields, slices=args.slices,
+                                                    max_workers=min(args.concurrency, args.slices)):
+            write(message)
+        return 0
+    raise ValueError(f"Unknown command: {args.command}")
+
+
+def main(argv: List[str] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.verbose:
+        logging.basicConfig(level=logging.DEBUG if args.verbose > 1 else logging.WARNING,
+                            format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    else:
+        # Failures are reported on stderr by the commands, the log lines would only repeat them
+        logging.getLogger(__package__).addHandler(logging.NullHandler())
+    fields = [field.strip() for field in args.fields.split(",")] if args.fields else None
+    stdout = sys.stdout.buffer
+    writer = CsvWriter(stdout, fields) if args.format == "csv" else NdjsonWriter(stdout)
+    api = None
+    try:
+        api = build_api(args)
+        return run(args, api, writer.write, sys.stdin, sys.stderr)
+    except BrokenPipeError:
+        # The reader went away, for example head. Buffered output still to be flushed goes nowhere
+        os.dup2(os.open(os.devnull, os.O_WRONLY), stdout.fileno())
+        return 0
+    except (GraylogApiException, ValueError, TypeError, OSError) as e:
+        sys.stderr.write(f"graylog-api: {e}\n")
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        try:
+            writer.close()
+        except (BrokenPipeError, ValueError):
+            pass
+        if api is not None:
+            api.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
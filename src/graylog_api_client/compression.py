@@ -0,0 +1,29 @@
+import gzip
+from typing import Any
+
+from urllib3.util.request import ACCEPT_ENCODING as _DECODABLE
+
+# Encodings urllib3 decompresses while streaming: gzip and deflate always, br with brotli and zstd with
+# compression.zstd (Python 3.14) or backports.zstd installed
+ACCEPT_ENCODING = ", ".join(_DECODABLE.split(","))
+
+REQUEST_ENCODING = "gzip"
+
+
+def compress(body: bytes, level: int = 6) -> bytes:
+    """Gzip a request body. mtime is fixed so equal bodies compress to equal bytes."""
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def wire_bytes(raw: Any, decoded: int) -> int:
+    """Bytes of a response body as received, before its Content-Encoding was decoded.
+
+    :param raw: The raw response of requests, it counts the bytes read from the connection.
+    :param decoded: Length of the decoded body, returned if raw does not count.
+    """
+    tell = getattr(raw, "tell", None)
+    try:
+        received = tell() if tell is not None else 0
+    except (OSError, ValueError):  # Closed or unseekable file objects
+        received = 0
+    return received or decoded
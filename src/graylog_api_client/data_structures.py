@@ -12,3 +12,52 @@ class GraylogApiResult:
         self.status_code = int(status_code)
         self.message = str(message)
         self.data = data if data else []
+
+    def as_models(self, model: type = None, key: str = None) -> List:
+        """Convert the entities in data into compact typed models.
+
+        Without arguments, the entity list and its model are detected from the known list keys (users, roles,
+        views, streams). Example: api.get_users().as_models() or api.get_cluster().as_models(ClusterNode)
+
+        :param model: The model class to use, required for single entities and the node map of get_cluster.
+        :param key: The key of the entity list in data, detected if not given.
+        :raises ValueError: If no model could be determined for data.
+        :return: A list of model instances.
+        """
+        from .models import ClusterNode, MODELS_BY_KEY
+
+        data = self.data
+        if isinstance(data, dict):
+            if key is None:
+                key = next((k for k in MODELS_BY_KEY if isinstance(data.get(k), list)), None)
+            if key is not None:
+                model = model or MODELS_BY_KEY.get(key)
+                data = data.get(key) or []
+            elif model is ClusterNode:
+                data = list(data.values())
+            elif model is not None:
+                data = [data]
+        if model is None:
+            raise ValueError("Could not detect the entity model, pass model explicitly")
+        return [model(entity) for entity in data]
+
+
+class GraylogBatchResult:
+    def __init__(self, key, result: GraylogApiResult = None, error: Exception = None):
+        """Outcome of a single item of a batch request
+
+        :param key: The input the request was made for, for example the ID
+        :param result: The result of the request if it succeeded
+        :param error: The exception raised by the request if it failed
+        """
+        self.key = key
+        self.result = result
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __repr__(self):
+        status = self.result.status_code if self.ok else repr(self.error)
+        return f"GraylogBatchResult(key={self.key!r}, {status})"
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+from typing import Dict, Optional, Tuple
+
+from .cache import CacheEntry, ResponseCache
+from .data_structures import GraylogApiResult
+from .json_codec import DECODE_ERRORS, get_dumps, get_loads
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key BLOB PRIMARY KEY,
+    host TEXT NOT NULL,
+    resource TEXT NOT NULL,
+    expires REAL NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    accessed REAL NOT NULL,
+    size INTEGER NOT NULL,
+    value BLOB NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS responses_resource ON responses (host, resource);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed);
+"""
+
+# status code, flags and length of the message, followed by the message and the JSON body
+_HEADER = struct.Struct("!HBH")
+_COMPRESSED = 1
+_COMPRESS_FROM = 1024
+# Reads only refresh the access time of an entry this often, so concurrent readers rarely need the write lock
+_TOUCH_INTERVAL = 60.0
+
+
+def default_path() -> str:
+    """Per-user cache file, below $XDG_CACHE_HOME or ~/.cache."""
+    root = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(root, "graylog-api-client", "responses.sqlite")
+
+
+class DiskCache(ResponseCache):
+    def __init__(self, path: str = None, default_ttl: float = 300, ttls: Dict[str, float] = None,
+                 max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024, mmap_size: int = 256 * 1024 * 1024,
+                 json_backend: str = None, logger: logging.Logger = None):
+        """ResponseCache with a persistent second tier in a SQLite file, for short-lived processes like cron jobs
+
+        Entries live in memory as with ResponseCache and are also written to the file, so the next process using
+        the same file starts warm and only asks the server for what expired. Bodies are stored as compact JSON,
+        zlib compressed from 1 KiB, and read through a memory map. Several threads and processes can share the
+        file: it runs in WAL mode, so readers never wait for a writer. Failing disk access is logged and treated
+        as a miss, it never fails a request. Entries are keyed on a digest of the API key as well, so clients with
+        different keys sharing a file never see each other's responses.
+
+        :param path: The cache file, defaults to None (default_path(), below ~/.cache)
+        :param default_ttl: Seconds an entry is served without asking the server, defaults to 300
+        :param ttls: TTL per endpoint prefix, the longest matching prefix wins. Example: {"ca": 86400, "cluster": 5}
+        :param max_entries: Maximum number of entries held in memory, defaults to 1024
+        :param max_bytes: Maximum size of the stored bodies, the least recently used entries are evicted first,
+            defaults to 64 MiB
+        :param mmap_size: Bytes of the file read through a memory map instead of read calls, defaults to 256 MiB
+        :param json_backend: JSON backend for the stored bodies, one of orjson, msgspec or json, defaults to None
+            (fastest installed)
+        :param logger: The logger for failing disk access, defaults to None
+        """
+        super().__init__(default_ttl=default_ttl, ttls=ttls, max_entries=max_entries)
+        if max_bytes < 1:
+            raise ValueError(f"max_bytes must be at least 1 but was: {max_bytes}")
+        self.path = path or default_path()
+        self.max_bytes = max_bytes
+        self._loads = get_loads(json_backend)
+        self._dumps = get_dumps(json_backend)
+        self._logger = logger or logging.getLogger(__name__)
+        self._db_lock = threading.RLock()
+        self.disk_hits = 0
+        self._db = self._connect(mmap_size)
+
+    def _connect(self, mmap_size: int) -> sqlite3.Connection:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        # Responses may contain sensitive data, the file is only readable by its owner
+        os.close(os.open(self.path, os.O_CREAT | os.O_RDWR, 0o600))
+        db = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(f"PRAGMA mmap_size={int(mmap_size)}")
+        db.executescript(_SCHEMA)
+        return db
+
+    def close(self):
+        with self._db_lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @staticmethod
+    def _digest(key: Tuple) -> bytes:
+        return hashlib.blake2b(json.dumps(key).encode(), digest_size=16).digest()
+
+    def _pack(self, result: GraylogApiResult) -> bytes:
+        message = result.message.encode()
+        body = self._dumps(result.data)
+        flags = 0
+        if len(body) >= _COMPRESS_FROM:
+            compressed = zlib.compress(body, 1)
+            if len(compressed) < len(body):
+                body, flags = compressed, _COMPRESSED
+        return _HEADER.pack(result.status_code, flags, len(message)) + message + body
+
+    def _unpack(self, value: bytes) -> GraylogApiResult:
+        status_code, flags, length = _HEADER.unpack_from(value)
+        start = _HEADER.size + length
+        body = memoryview(value)[start:]
+        if flags & _COMPRESSED:
+            body = zlib.decompress(body)
+        return GraylogApiResult(status_code, message=value[_HEADER.size:start].decode(), data=self._loads(bytes(body)))
+
+    def _execute(self, sql: str, parameters: Tuple = ()) -> Optional[list]:
+        """Run a statement, failures are logged and reported as None."""
+        try:
+            with self._db_lock:
+                return self._db.execute(sql, parameters).fetchall()
+        except sqlite3.Error as e:
+            self._logger.warning("disk cache %s failed: %s", self.path, e)
+            return None
+
+    def _load(self, key: Tuple) -> Optional[CacheEntry]:
+        rows = self._execute("SELECT expires, etag, last_modified, accessed, value FROM responses WHERE key = ?",
+                             (self._digest(key),))
+        if not rows:
+            return None
+        expires, etag, last_modified, accessed, value = rows[0]
+        now = time.time()
+        if expires <= now and not (etag or last_modified):
+            return None
+        try:
+            result = self._unpack(value)
+        except (struct.error, zlib.error, UnicodeDecodeError) + DECODE_ERRORS as e:
+            self._logger.warning("disk cache %s has a corrupt entry for %s: %s", self.path, key[1], e)
+            self._execute("DELETE FROM responses WHERE key = ?", (self._digest(key),))
+            return None
+        if now - accessed > _TOUCH_INTERVAL:
+            self._execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, self._digest(key)))
+        with self._db_lock:
+            self.disk_hits += 1
+        return CacheEntry(result, time.monotonic() + (expires - now), etag, last_modified)
+
+    def set(self, key: Tuple, result: GraylogApiResult, etag: str = None, last_modified: str = None):
+        super().set(key, result, etag, last_modified)
+        value = self._pack(result)
+        now = time.time()
+        self._execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                      (self._digest(key), key[0], self._resource(key[1]), now + self.ttl_for(key[1]), etag,
+                       last_modified, now, len(value), value))
+        self._evict()
+
+    def _evict(self):
+        """Drop unusable entries, then the least recently used ones until the stored size is below max_bytes."""
+        with self._db_lock:
+            size = self._execute("SELECT total(size) FROM responses")
+            if not size or size[0][0] <= self.max_bytes:
+                return
+            self._execute("DELETE FROM responses WHERE expires <= ? AND etag IS NULL AND last_modified IS NULL",
+                          (time.time(),))
+            # Evict down to 90% of the limit, so the next writes do not have to evict again right away
+            self._execute("DELETE FROM responses WHERE key IN (SELECT key FROM (SELECT key, sum(size) OVER "
+                          "(ORDER BY accessed DESC, key) AS kept FROM responses) WHERE kept > ?)",
+                          (int(self.max_bytes * 0.9),))
+
+    def revalidated(self, key: Tuple) -> Optional[CacheEntry]:
+        entry = super().revalidated(key)
+        now = time.time()
+        self._execute("UPDATE responses SET expires = ?, accessed = ? WHERE key = ?",
+                      (now + self.ttl_for(key[1]), now, self._digest(key)))
+        return entry
+
+    def invalidate(self, host: str, endpoint: str):
+        super().invalidate(host, endpoint)
+        self._execute("DELETE FROM responses WHERE host = ? AND resource = ?", (host, self._resource(endpoint)))
+
+    def clear(self):
+        super().clear()
+        self._execute("DELETE FROM responses")
+
+    @property
+    def disk_entries(self) -> int:
+        rows = self._execute("SELECT count(*) FROM responses")
+        return rows[0][0] if rows else 0
+
+    @property
+    def disk_bytes(self) -> int:
+        rows = self._execute("SELECT total(size) FROM responses")
+        return int(rows[0][0]) if rows else 0
@@ -0,0 +1,219 @@
+import functools
+import json
+import os
+import re
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote
+
+ENDPOINTS_FILE = os.path.join(os.path.dirname(__file__), "endpoints.json")
+
+HTTP_METHODS = ("GET", "POST", "PUT", "DELETE")
+
+_PARAMETER = re.compile(r"{([^}/]+)}")
+_CAMEL = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+_NON_WORD = re.compile(r"[^0-9a-zA-Z]+")
+_lock = threading.Lock()
+
+
+def snake_case(name: str) -> str:
+    """Example: entityGRN -> entity_grn, index_sets -> index_sets, grants-overview -> grants_overview"""
+    return _NON_WORD.sub("_", _CAMEL.sub("_", name)).strip("_").lower()
+
+
+def endpoint_name(method: str, path: str) -> str:
+    """Method name derived from the HTTP method and the path template.
+
+    Example: GET system/inputs/{inputId}/extractors -> get_system_inputs_extractors_by_input_id
+    """
+    words, parameters = [method.lower()], []
+    for segment in path.strip("/").split("/"):
+        match = _PARAMETER.fullmatch(segment)
+        if match:
+            parameters.append(snake_case(match.group(1)))
+        elif segment:
+            words.append(snake_case(segment))
+    name = "_".join(words)
+    return name + "_by_" + "_and_".join(parameters) if parameters else name
+
+
+class Endpoint:
+    __slots__ = ("name", "method", "path", "query", "body", "summary", "parameters", "_literals")
+
+    def __init__(self, name: str, method: str, path: str, query: Iterable[str] = (), body: bool = False,
+                 summary: str = ""):
+        """A single REST endpoint with a precompiled path template
+
+        :param name: The name of the generated method. Example: get_streams_by_stream_id
+        :param method: The HTTP method, one of GET, POST, PUT or DELETE
+        :param path: The path template relative to the API root. Example: streams/{streamId}
+        :param query: The names of the query parameters the endpoint accepts, empty to not validate them
+        :param body: Whether the endpoint takes a JSON body
+        :param summary: Short description of the endpoint
+        """
+        if method not in HTTP_METHODS:
+            raise ValueError(f"HTTP method must be one of {', '.join(HTTP_METHODS)} but was: {method}")
+        self.name = name
+        self.method = method
+        self.path = path.strip("/")
+        self.query = frozenset(query)
+        self.body = bool(body)
+        self.summary = summary
+        # The template is split once into its literal parts with the path parameters in between
+        pieces = _PARAMETER.split(self.path)
+        self._literals: Tuple[str, ...] = tuple(pieces[0::2])
+        self.parameters: Tuple[str, ...] = tuple(snake_case(piece) for piece in pieces[1::2])
+
+    def render(self, args: Tuple, kwargs: Dict[str, Any]) -> str:
+        """Fill the path template with the path parameters given positionally or by name.
+
+        :raises TypeError: If path parameters are missing, unknown or given twice.
+        :raises ValueError: If a path parameter is empty.
+        """
+        literals = self._literals
+        if not kwargs and len(args) == len(self.parameters):
+            # Fast path for the common call with all path parameters given positionally
+            path = literals[0]
+            for value, literal in zip(args, literals[1:]):
+                path += self._quote(value) + literal
+            return path
+        if len(args) > len(self.parameters):
+            raise TypeError(f"{self.name}() takes {len(self.parameters)} path parameters but {len(args)} were given")
+        values = dict(zip(self.parameters, args))
+        for key, value in kwargs.items():
+            if key not in self.parameters:
+                raise TypeError(f"{self.name}() got an unexpected keyword argument {key!r}")
+            if key in values:
+                raise TypeError(f"{self.name}() got multiple values for argument {key!r}")
+            values[key] = value
+        missing = [parameter for parameter in self.parameters if parameter not in values]
+        if missing:
+            raise TypeError(f"{self.name}() missing path parameters: {', '.join(missing)}")
+        path = literals[0]
+        for parameter, literal in zip(self.parameters, literals[1:]):
+            path += self._quote(values[parameter]) + literal
+        return path
+
+    def _quote(self, value: Any) -> str:
+        value = str(value)
+        if value.isascii() and value.isalnum():  # IDs and most names need no escaping
+            return value
+        if not value:
+            raise ValueError(f"Path parameters of {self.name}() must not be empty")
+        return quote(value, safe="")
+
+    def check(self, parameters: Optional[Dict], data: Optional[Any]):
+        """Validate query parameters and body against the endpoint.
+
+        :raises ValueError: If a query parameter is unknown or a body is given to an endpoint without one.
+        """
+        if parameters and self.query:
+            unknown = [key for key in parameters if key not in self.query]
+            if unknown:
+                raise ValueError(f"Unknown query parameters for {self.name}(): {', '.join(map(str, unknown))}. "
+                                 f"Allowed are: {', '.join(sorted(self.query))}")
+        if data is not None and not self.body:
+            raise ValueError(f"{self.name}() does not take a request body")
+
+    def make_method(self) -> Callable:
+        """Build the method that calls this endpoint over self._rest_adapter."""
+        endpoint = self
+        verb = self.method.lower()
+
+        def method(self, *args, parameters: Dict = None, data: Any = None, **kwargs):
+            path = endpoint.render(args, kwargs)
+            endpoint.check(parameters, data)
+            adapter = getattr(self._rest_adapter, verb)
+            if verb == "get":
+                return adapter(path, parameters)
+            return adapter(path, parameters, data)
+
+        method.__name__ = method.__qualname__ = self.name
+        arguments = ", ".join(self.parameters)
+        method.__doc__ = (f"{self.summary or self.name}\n\n{self.method} {self.path}\n\n"
+                          f"Path parameters: {arguments or '-'}\n"
+                          f"Query parameters: {', '.join(sorted(self.query)) or 'not validated'}\n"
+                          f"Request body: {'yes' if self.body else 'no'}")
+        return method
+
+    def __repr__(self):
+        return f"Endpoint({self.name!r}, {self.method} {self.path})"
+
+
+@functools.lru_cache(maxsize=None)
+def _table(path: str = ENDPOINTS_FILE) -> Dict[str, List]:
+    """The raw rows of the endpoint table by name, read once on the first lookup."""
+    with open(path, "rb") as file:
+        rows = json.load(file)["endpoints"]
+    return {row[0]: row for row in rows}
+
+
+def names() -> List[str]:
+    return list(_table())
+
+
+def lookup(name: str) -> Optional[Endpoint]:
+    """The endpoint called name, None for unknown and private names."""
+    if name.startswith("_"):
+        return None
+    row = _table().get(name)
+    return Endpoint(*row) if row is not None else None
+
+
+def bind(cls: type, name: str) -> Optional[Callable]:
+    """Compile the endpoint called name into a method of cls, so later lookups are plain attribute lookups.
+
+    :return: The function set on cls, None if there is no such endpoint.
+    """
+    with _lock:
+        function = cls.__dict__.get(name)
+        if function is not None:
+            return function
+        endpoint = lookup(name)
+        if endpoint is None:
+            return None
+        function = endpoint.make_method()
+        setattr(cls, name, function)
+        return function
+
+
+def endpoints_from_spec(spec: Dict, known: Dict[Tuple[str, str], str] = None) -> List[List]:
+    """Convert a Graylog API spec into rows of the endpoint table.
+
+    Both the Swagger 1.2 resource listings served under /api-docs (one document per resource, pass them merged
+    into {"apis": [...]}) and OpenAPI 3 documents with "paths" are understood.
+
+    :param spec: The decoded spec.
+    :param known: Names to keep for (method, path) pairs, for example of an existing table or hand-written methods.
+    :return: Rows of [name, method, path, query parameters, body, summary] sorted by path and method.
+    """
+    known = known or {}
+    operations = []
+    if "paths" in spec:
+        for path, methods in spec["paths"].items():
+            for method, operation in methods.items():
+                if method.upper() not in HTTP_METHODS:
+                    continue
+                parameters = operation.get("parameters") or []
+                operations.append((method.upper(), path, [p["name"] for p in parameters if p.get("in") == "query"],
+                                   "requestBody" in operation, operation.get("summary") or ""))
+    else:
+        for api in spec.get("apis") or []:
+            for operation in api.get("operations") or []:
+                method = (operation.get("method") or operation.get("httpMethod") or "").upper()
+                if method not in HTTP_METHODS:
+                    continue
+                parameters = operation.get("parameters") or []
+                operations.append((method, api["path"],
+                                   [p["name"] for p in parameters if p.get("paramType") == "query"],
+                                   any(p.get("paramType") == "body" for p in parameters),
+                                   operation.get("summary") or ""))
+    rows, used = [], set()
+    for method, path, query, body, summary in sorted(operations, key=lambda operation: (operation[1], operation[0])):
+        path = path.strip("/")
+        name = known.get((method, path)) or endpoint_name(method, path)
+        if name in used:
+            continue
+        used.add(name)
+        rows.append([name, method, path, sorted(query), int(body), summary])
+    return rows
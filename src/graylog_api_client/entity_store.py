@@ -0,0 +1,271 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entities (
+    kind TEXT NOT NULL,
+    id TEXT NOT NULL,
+    name TEXT,
+    modified TEXT,
+    fingerprint TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (kind, id)
+);
+CREATE INDEX IF NOT EXISTS entities_name ON entities (kind, name);
+CREATE TABLE IF NOT EXISTS user_roles (
+    user_id TEXT NOT NULL,
+    role_name TEXT NOT NULL,
+    PRIMARY KEY (user_id, role_name)
+);
+CREATE INDEX IF NOT EXISTS user_roles_role ON user_roles (role_name);
+CREATE TABLE IF NOT EXISTS grants (
+    grantee TEXT NOT NULL,
+    grantee_type TEXT,
+    grantee_id TEXT,
+    capability TEXT NOT NULL,
+    target TEXT NOT NULL,
+    target_type TEXT,
+    target_id TEXT
+);
+CREATE INDEX IF NOT EXISTS grants_grantee ON grants (grantee);
+CREATE INDEX IF NOT EXISTS grants_target ON grants (target_type, target_id);
+CREATE TABLE IF NOT EXISTS sync_state (
+    kind TEXT PRIMARY KEY,
+    synced_at REAL NOT NULL,
+    fingerprint TEXT
+);
+"""
+
+
+class SyncStats:
+    __slots__ = ("kind", "added", "updated", "deleted", "unchanged", "duration")
+
+    def __init__(self, kind: str):
+        """Outcome of refreshing one entity kind
+
+        :param kind: The entity kind. Example: users
+        """
+        self.kind = kind
+        self.added = 0
+        self.updated = 0
+        self.deleted = 0
+        self.unchanged = 0
+        self.duration = 0.0
+
+    def __repr__(self):
+        return (f"SyncStats({self.kind!r}, added={self.added}, updated={self.updated}, deleted={self.deleted}, "
+                f"unchanged={self.unchanged}, duration={self.duration:.2f}s)")
+
+
+class _Kind:
+    __slots__ = ("name_key", "modified_key", "fetch")
+
+    def __init__(self, name_key: str, fetch: Callable[[bool], Iterator[Dict]], modified_key: str = None):
+        """How an entity kind is listed
+
+        :param name_key: Field that is indexed as the name of an entity. Example: username
+        :param fetch: Lists the entities, gets True if they may be sorted by modified_key in descending order.
+        :param modified_key: Field with the last modification time, lets a refresh stop at unchanged entities.
+        """
+        self.name_key = name_key
+        self.fetch = fetch
+        self.modified_key = modified_key
+
+
+def _fingerprint(text: str) -> str:
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+def _parse_grn(grn: str) -> Tuple[Optional[str], Optional[str]]:
+    """Type and ID of a Graylog resource name. Example: grn::::stream:5e1f... -> (stream, 5e1f...)"""
+    parts = (grn or "").split(":")
+    if len(parts) < 3:
+        return None, None
+    return parts[-2], parts[-1]
+
+
+class EntityStore:
+    KINDS = ("users", "roles", "streams", "views", "grants")
+
+    def __init__(self, api, path: str = ":memory:", per_page: int = 200):
+        """Local SQLite index of users, roles, streams, views and grants for fast audit queries
+
+        refresh() lists the entities page by page and only writes entities whose content changed, the ones that
+        are gone are deleted. Views are listed newest first by last_updated_at, so an incremental refresh stops at
+        the first view that did not change since the last sync. Role assignees are derived from the roles of the
+        users instead of one request per role. The store survives restarts if path is a file.
+
+        :param api: The GraylogAPI client used to fetch the entities
+        :param path: SQLite database file, defaults to ":memory:"
+        :param per_page: Page size used to list the entities
+        :raises TypeError: If api is an AsyncGraylogAPI, whose iter_* methods cannot be iterated synchronously.
+        """
+        # Imported here, so opening a store does not load asyncio
+        from .async_graylog_api_client import AsyncGraylogAPI
+        if isinstance(api, AsyncGraylogAPI):
+            raise TypeError("EntityStore needs a GraylogAPI, an AsyncGraylogAPI cannot be used to refresh it")
+        self._api = api
+        self.per_page = per_page
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self._kinds: Dict[str, _Kind] = {
+            "users": _Kind("username", lambda newest_first: api.iter_users(per_page=per_page)),
+            "roles": _Kind("name", lambda newest_first: api.iter_auth_roles(per_page=per_page)),
+            "streams": _Kind("title", lambda newest_first: api.iter_streams()),
+            "views": _Kind("title", self._fetch_views, modified_key="last_updated_at"),
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _fetch_views(self, newest_first: bool) -> Iterator[Dict]:
+        parameters = {"sort": "last_updated_at", "order": "desc"} if newest_first else None
+        return self._api.iter_views(parameters=parameters, per_page=self.per_page)
+
+    def synced_at(self, kind: str) -> Optional[float]:
+        """Unix time of the last refresh of kind, None if it was never synced."""
+        with self._lock:
+            row = self._db.execute("SELECT synced_at FROM sync_state WHERE kind = ?", (kind,)).fetchone()
+        return row[0] if row else None
+
+    def refresh(self, kinds: Iterable[str] = None, full: bool = False) -> Dict[str, SyncStats]:
+        """Bring the store up to date with Graylog.
+
+        :param kinds: The entity kinds to refresh, defaults to all of KINDS
+        :param full: List all views instead of stopping at the first unchanged one, which also removes deleted
+            views. Kinds without modification time are always listed completely.
+        :raises ValueError: If a kind is unknown.
+        :return: The number of added, updated, deleted and unchanged entities per kind.
+        """
+        kinds = list(kinds or self.KINDS)
+        unknown = [kind for kind in kinds if kind not in self.KINDS]
+        if unknown:
+            raise ValueError(f"Kinds must be in {', '.join(self.KINDS)} but were: {', '.join(unknown)}")
+        return {kind: self._refresh_grants() if kind == "grants" else self._refresh_kind(kind, full)
+                for kind in kinds}
+
+    def _refresh_kind(self, kind: str, full: bool) -> SyncStats:
+        started = time.perf_counter()
+        stats = SyncStats(kind)
+        spec = self._kinds[kind]
+        with self._lock:
+            stored = dict(self._db.execute("SELECT id, fingerprint FROM entities WHERE kind = ?", (kind,)))
+            watermark = None
+            if spec.modified_key is not None and not full and self.synced_at(kind) is not None:
+                watermark = self._db.execute("SELECT max(modified) FROM entities WHERE kind = ?", (kind,)).fetchone()[0]
+        complete = watermark is None
+        seen = set()
+        upserts, user_roles = [], []
+        for entity in spec.fetch(watermark is not None):
+            entity_id = entity.get("id")
+            if entity_id is None:
+                continue
+            modified = entity.get(spec.modified_key) if spec.modified_key else None
+            if watermark is not None and modified is not None and str(modified) < watermark:
+                break
+            seen.add(entity_id)
+            data = json.dumps(entity, sort_keys=True, separators=(",", ":"))
+            fingerprint = _fingerprint(data)
+            previous = stored.get(entity_id)
+            if previous == fingerprint:
+                stats.unchanged += 1
+                continue
+            if previous is None:
+                stats.added += 1
+            else:
+                stats.updated += 1
+            upserts.append((kind, entity_id, entity.get(spec.name_key), modified, fingerprint, data))
+            if kind == "users":
+                user_roles.append((entity_id, entity.get("roles") or []))
+
+        with self._lock, self._db:
+            self._db.executemany("INSERT OR REPLACE INTO entities VALUES (?, ?, ?, ?, ?, ?)", upserts)
+            for user_id, roles in user_roles:
+                self._db.execute("DELETE FROM user_roles WHERE user_id = ?", (user_id,))
+                self._db.executemany("INSERT OR IGNORE INTO user_roles VALUES (?, ?)",
+                                     [(user_id, role) for role in roles])
+            if complete:
+                gone = [(kind, entity_id) for entity_id in stored if entity_id not in seen]
+                stats.deleted = len(gone)
+                self._db.executemany("DELETE FROM entities WHERE kind = ? AND id = ?", gone)
+                if kind == "users":
+                    self._db.executemany("DELETE FROM user_roles WHERE user_id = ?", [(i,) for _, i in gone])
+            self._db.execute("INSERT OR REPLACE INTO sync_state VALUES (?, ?, NULL)", (kind, time.time()))
+        stats.duration = time.perf_counter() - started
+        return stats
+
+    def _refresh_grants(self) -> SyncStats:
+        """The grants overview is a single unpaginated response, it is only rewritten if its content changed."""
+        started = time.perf_counter()
+        stats = SyncStats("grants")
+        grants = (self._api.get_auth_grants_overview().data or {}).get("grants") or []
+        rows = sorted({(grant.get("grantee"), grant.get("capability"), grant.get("target")) for grant in grants},
+                      key=lambda row: tuple(value or "" for value in row))
+        fingerprint = _fingerprint(json.dumps(rows))
+        with self._lock, self._db:
+            row = self._db.execute("SELECT fingerprint FROM sync_state WHERE kind = 'grants'").fetchone()
+            if row is not None and row[0] == fingerprint:
+                stats.unchanged = len(rows)
+            else:
+                stats.deleted = self._db.execute("DELETE FROM grants").rowcount
+                stats.added = len(rows)
+                self._db.executemany("INSERT INTO grants VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                     [(grantee, *_parse_grn(grantee), capability, target, *_parse_grn(target))
+                                      for grantee, capability, target in rows])
+            self._db.execute("INSERT OR REPLACE INTO sync_state VALUES ('grants', ?, ?)", (time.time(), fingerprint))
+        stats.duration = time.perf_counter() - started
+        return stats
+
+    def _query(self, sql: str, parameters: Tuple = ()) -> List[Tuple]:
+        with self._lock:
+            return self._db.execute(sql, parameters).fetchall()
+
+    def get(self, kind: str, entity_id: str) -> Optional[Dict]:
+        rows = self._query("SELECT data FROM entities WHERE kind = ? AND id = ?", (kind, entity_id))
+        return json.loads(rows[0][0]) if rows else None
+
+    def find(self, kind: str, name: str) -> List[Dict]:
+        """Entities of kind by their indexed name (username, role name or title)."""
+        rows = self._query("SELECT data FROM entities WHERE kind = ? AND name = ?", (kind, name))
+        return [json.loads(data) for data, in rows]
+
+    def all(self, kind: str) -> List[Dict]:
+        return [json.loads(data) for data, in self._query("SELECT data FROM entities WHERE kind = ?", (kind,))]
+
+    def count(self, kind: str) -> int:
+        return self._query("SELECT count(*) FROM entities WHERE kind = ?", (kind,))[0][0]
+
+    def roles_of_user(self, username: str) -> List[str]:
+        rows = self._query("SELECT r.role_name FROM entities e JOIN user_roles r ON r.user_id = e.id "
+                           "WHERE e.kind = 'users' AND e.name = ? ORDER BY r.role_name", (username,))
+        return [role for role, in rows]
+
+    def assignees_of_role(self, role_name: str) -> List[str]:
+        """Usernames of the users that have the role."""
+        rows = self._query("SELECT e.name FROM user_roles r JOIN entities e ON e.kind = 'users' AND e.id = r.user_id "
+                           "WHERE r.role_name = ? ORDER BY e.name", (role_name,))
+        return [username for username, in rows]
+
+    def grants_of(self, grantee: str) -> List[Tuple[str, str]]:
+        """Capability and target GRN of every grant of a grantee GRN. Example: grn::::user:<user_id>"""
+        return self._query("SELECT capability, target FROM grants WHERE grantee = ? ORDER BY target", (grantee,))
+
+    def owners_of_stream(self, stream_id: str) -> List[str]:
+        """Usernames of the users that own the stream, other grantees (e.g. teams) as their GRN."""
+        rows = self._query("SELECT coalesce(e.name, g.grantee) FROM grants g "
+                           "LEFT JOIN entities e ON g.grantee_type = 'user' AND e.kind = 'users' AND e.id = g.grantee_id "
+                           "WHERE g.target_type = 'stream' AND g.target_id = ? AND g.capability = 'own' "
+                           "ORDER BY 1", (stream_id,))
+        return [owner for owner, in rows]
@@ -1,2 +1,6 @@
 class GraylogApiException(Exception):
     pass
+
+
+class GraylogCircuitOpenException(GraylogApiException):
+    pass
@@ -0,0 +1,158 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple, Union
+
+import requests
+
+from . import endpoint_registry
+from .data_structures import GraylogBatchResult
+from .graylog_api_client import GraylogAPI
+from .transport import HTTP2_AVAILABLE, HTTP2Adapter
+
+ClusterConfig = Union[Tuple[str, str], Dict[str, Any]]
+
+
+class GraylogFleet:
+    def __init__(self, clusters: Dict[str, ClusterConfig] = None, pool_maxsize: int = 10, max_workers: int = 32,
+                 http2: bool = False, max_clusters: int = 10, **client_kwargs):
+        """Many Graylog clusters behind one object, queried concurrently
+
+        All clients mount one shared transport adapter, so its tuned connection pools and keep-alive connections
+        are reused by every cluster, while each cluster keeps its own session and API key. Fleet-wide calls run
+        on one shared thread pool and take about as long as the slowest cluster. Closing the client of a single
+        cluster leaves the shared pools open, close() of the fleet closes them.
+        Example: GraylogFleet({"eu": ("https://graylog-eu/api", eu_key), "us": {"host": ..., "api_key": ...}})
+
+        :param clusters: Host and API key, or the GraylogAPI arguments, per cluster name
+        :param pool_maxsize: Keep-alive connections kept open per host, defaults to 10
+        :param max_workers: Maximum number of requests running at the same time across all clusters, defaults to 32
+        :param http2: Multiplex the requests to each cluster over one HTTP/2 connection, defaults to False
+        :param max_clusters: Number of clusters the shared pools are sized for, clusters added beyond it evict each
+            other's idle connections, defaults to 10 (or the number of clusters given, if more)
+        :param client_kwargs: Default GraylogAPI arguments for every cluster, like retry or cache
+        """
+        if max_workers < 1:
+            raise ValueError(f"max_workers must be at least 1 but was: {max_workers}")
+        if max_clusters < 1:
+            raise ValueError(f"max_clusters must be at least 1 but was: {max_clusters}")
+        self.client_kwargs = client_kwargs
+        self.max_clusters = max(max_clusters, len(clusters or ()))
+        self._logger = logging.getLogger(__name__)
+        if http2 and HTTP2_AVAILABLE:
+            # httpx limits the connections of all hosts together
+            self._http_adapter = HTTP2Adapter(pool_maxsize=pool_maxsize * self.max_clusters)
+        else:
+            if http2:
+                self._logger.warning("httpx and h2 are not installed, falling back to HTTP/1.1")
+            self._http_adapter = requests.adapters.HTTPAdapter(pool_connections=self.max_clusters,
+                                                               pool_maxsize=pool_maxsize)
+        self._clients: Dict[str, GraylogAPI] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="graylog-api-fleet")
+        for name, config in (clusters or {}).items():
+            if isinstance(config, dict):
+                self.add(name, **config)
+            else:
+                self.add(name, *config)
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._clients)
+
+    def __getitem__(self, name: str) -> GraylogAPI:
+        return self._clients[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._clients
+
+    def __len__(self):
+        return len(self._clients)
+
+    def add(self, name: str, host: str, api_key: str, **kwargs) -> GraylogAPI:
+        """Add a cluster, kwargs override the default GraylogAPI arguments of the fleet."""
+        with self._lock:
+            if name in self._clients:
+                raise ValueError(f"Cluster already exists: {name}")
+            client = GraylogAPI(host, api_key, **dict(self.client_kwargs, **kwargs), http_adapter=self._http_adapter)
+            self._clients[name] = client
+            if len(self._clients) == self.max_clusters + 1:
+                self._logger.warning("GraylogFleet has more than max_clusters=%d clusters, their connection pools "
+                                     "evict each other", self.max_clusters)
+        return client
+
+    def remove(self, name: str):
+        """Remove a cluster, the shared connection pools stay open for the others."""
+        with self._lock:
+            del self._clients[name]
+
+    def run(self, method: Union[str, Callable[[GraylogAPI], Any]], *args, clusters: Iterable[str] = None,
+            timeout: Union[float, Dict[str, float]] = None, **kwargs) -> Dict[str, GraylogBatchResult]:
+        """Call a GraylogAPI method on all or selected clusters concurrently.
+
+        A failing or late cluster does not fail the call, its exception is reported in its GraylogBatchResult.
+        Iterators returned by iter_* methods are collected into lists on the worker threads.
+        Example: fleet.run("get_user_by_username", "jdoe", timeout=5)
+
+        :param method: The name of a GraylogAPI method, or a function that gets the client of a cluster.
+        :param args: Positional arguments of the method.
+        :param clusters: Names of the clusters to call, defaults to None (all clusters)
+        :param timeout: Seconds to wait for a cluster, or seconds per cluster name, defaults to None (no deadline).
+            A cluster that misses its deadline is reported with a TimeoutError, its request is not interrupted.
+        :param kwargs: Keyword arguments of the method.
+        :raises ValueError: If a cluster or the method is unknown.
+        :return: One GraylogBatchResult per cluster name, in the order of clusters.
+        """
+        names = list(clusters) if clusters is not None else self.names
+        unknown = [name for name in names if name not in self._clients]
+        if unknown:
+            raise ValueError(f"Unknown clusters: {', '.join(unknown)}")
+        calls = {name: self._bind(self._clients[name], method, args, kwargs) for name in names}
+        started = time.monotonic()
+        futures: Dict[str, Future] = {name: self._executor.submit(call) for name, call in calls.items()}
+        results = {}
+        for name, future in futures.items():
+            limit = timeout.get(name) if isinstance(timeout, dict) else timeout
+            try:
+                remaining = None if limit is None else max(0.0, started + limit - time.monotonic())
+                results[name] = GraylogBatchResult(name, result=future.result(timeout=remaining))
+            except TimeoutError:
+                future.cancel()
+                results[name] = GraylogBatchResult(name, error=TimeoutError(f"Cluster {name} took longer than {limit}s"))
+            except Exception as e:
+                results[name] = GraylogBatchResult(name, error=e)
+        return results
+
+    @staticmethod
+    def _bind(client: GraylogAPI, method: Union[str, Callable], args: Tuple, kwargs: Dict) -> Callable[[], Any]:
+        if callable(method):
+            return lambda: method(client, *args, **kwargs)
+        call = client._resolve_method(method)
+
+        def run():
+            result = call(*args, **kwargs)
+            if isinstance(result, Iterator):
+                return list(result)
+            return result
+        return run
+
+    def __getattr__(self, name: str) -> Callable[..., Dict[str, GraylogBatchResult]]:
+        """Fleet-wide version of every public GraylogAPI method. Example: fleet.get_streams(timeout=5)"""
+        if name.startswith("_") or not (callable(getattr(GraylogAPI, name, None)) or endpoint_registry.lookup(name)):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self.run(name, *args, **kwargs)
+
+    def close(self):
+        """Wait for running calls, then close the connections of all clusters."""
+        self._executor.shutdown(wait=True)
+        for client in self._clients.values():
+            client.close()
+        self._http_adapter.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
@@ -1,20 +1,224 @@
+import functools
+import itertools
 import logging
-from typing import List, Union, Dict
+import time
+import requests
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional, Union
 
+from . import endpoint_registry
+from .bulk import BulkItemResult, BulkReport, UserOperation, run_bulk
+from .cache import ResponseCache
+from .instrumentation import Instrumentation
+from .policies import CircuitBreaker, RateLimiter, RetryPolicy, TokenBucket
 from .rest_adapter import RestAdapter
-from .data_structures import GraylogApiResult
+from .exceptions import GraylogApiException
+from .search import (EXPORT_FORMATS, Timestamp, decode_messages, format_timestamp, messages_request,
+                     ordered_prefetch, poll_intervals, split_time_range)
+from .data_structures import GraylogApiResult, GraylogBatchResult
+
+if TYPE_CHECKING:
+    from .entity_store import EntityStore
 
 
 class GraylogAPI:
-    def __init__(self, host: str, api_key: str, ssl_verify: Union[str, bool] = True, logger: logging.Logger = None):
+    def __init__(self, host: str, api_key: str, ssl_verify: Union[str, bool] = True, logger: logging.Logger = None,
+                 pool_maxsize: int = None, cache: ResponseCache = None, coalesce: bool = False,
+                 retry: RetryPolicy = None, rate_limiter: RateLimiter = None, circuit_breaker: CircuitBreaker = None,
+                 instrumentation: Instrumentation = None, http_adapter: requests.adapters.BaseAdapter = None,
+                 http2: bool = False, compression: bool = True, compress_requests: int = None):
         """GraylogAPI client
 
         :param host: The hostname of the Graylog API endpoint plus the protocol. Example: https://graylog.com/api
         :param api_key: An API Key to authenticate with Graylog
         :param ssl_verify: Enables or Disables TLS Certificate verification. For a custom certificate, this value must a path pointing to the certificate, defaults to True
         :param logger: The logger being used by the Adapter, will use a new one if none is given, defaults to None
+        :param pool_maxsize: Number of keep-alive connections kept open to the host, should be at least the max_workers used with fetch_many, defaults to None (requests default)
+        :param cache: Opt-in cache for GET responses. Example: ResponseCache(default_ttl=30, ttls={"ca": 3600}), defaults to None
+        :param coalesce: Let concurrent identical GET requests share one network call and result, defaults to False
+        :param retry: Retry failed requests with exponential backoff and Retry-After handling, defaults to None (no retries)
+        :param rate_limiter: Client side token bucket rate limiting per endpoint prefix, defaults to None
+        :param circuit_breaker: Reject requests without sending them while the server keeps failing, defaults to None
+        :param instrumentation: Hooks called before and after every request with its timings, sizes and retries. Example: InMemoryCollector(), defaults to None
+        :param http_adapter: Transport adapter with its connection pools, can be shared by several clients and is left open by close(), defaults to None
+        :param http2: Multiplex concurrent requests over one HTTP/2 connection, needs the http2 extra and falls back to HTTP/1.1 without it, defaults to False
+        :param compression: Ask for compressed responses (gzip, deflate, br, zstd), which are decompressed while they are read, defaults to True
+        :param compress_requests: Gzip request bodies of at least this many bytes, the server must accept Content-Encoding: gzip, defaults to None (never)
+        """
+        self._rest_adapter = RestAdapter(host=host, api_key=api_key, ssl_verify=ssl_verify, logger=logger,
+                                         pool_maxsize=pool_maxsize, cache=cache, coalesce=coalesce,
+                                         retry=retry, rate_limiter=rate_limiter, circuit_breaker=circuit_breaker,
+                                         instrumentation=instrumentation, http_adapter=http_adapter, http2=http2,
+                                         compression=compression, compress_requests=compress_requests)
+
+    def close(self):
+        """Close all pooled connections."""
+        self._rest_adapter.close()
+
+    def __getattr__(self, name: str):
+        # Only called for names that are not defined, endpoints of the table are compiled into GraylogAPI on first use
+        function = endpoint_registry.bind(GraylogAPI, name)
+        if function is None:
+            raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+        return function.__get__(self, type(self))
+
+    def __dir__(self):
+        return sorted(set(super().__dir__()) | set(endpoint_registry.names()))
+
+    def _resolve_method(self, method: Union[str, Callable]) -> Callable:
+        if callable(method):
+            return method
+        call = None if method.startswith("_") else getattr(self, method, None)
+        if not callable(call):
+            raise ValueError(f"Unknown endpoint method: {method}")
+        return call
+
+    def fetch_many(self, method: Union[str, Callable], ids: Iterable, max_workers: int = 10,
+                   ordered: bool = True) -> Iterator[GraylogBatchResult]:
+        """Call a per-ID endpoint method for many IDs concurrently over the shared session.
+
+        A failing item does not abort the batch, its exception is reported in the GraylogBatchResult instead.
+        IDs are read lazily and at most 4 * max_workers of them are in flight or waiting to be yielded, so memory
+        stays bounded for any number of IDs, for example read from a file or stdin.
+        Example: api.fetch_many("get_jvminfo", node_ids)
+
+        :param method: The endpoint method or its name. Example: get_user_by_id
+        :param ids: The IDs to call the method with, one call per ID.
+        :param max_workers: Maximum number of requests running at the same time.
+        :param ordered: Yield results in input order if True, otherwise as soon as they complete.
+        :return: An iterator over one GraylogBatchResult per ID.
+        """
+        if max_workers < 1:
+            raise ValueError(f"max_workers must be at least 1 but was: {max_workers}")
+        call = self._resolve_method(method)
+        return self._fetch_many(call, ids, max_workers, ordered)
+
+    @staticmethod
+    def _fetch_many(call: Callable, ids: Iterable, max_workers: int, ordered: bool) -> Iterator[GraylogBatchResult]:
+        def run(key) -> GraylogBatchResult:
+            try:
+                return GraylogBatchResult(key, result=call(key))
+            except Exception as e:
+                return GraylogBatchResult(key, error=e)
+
+        ids = iter(ids)
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="graylog-api-batch")
+
+        def submit_next(count: int = 1) -> List[Future]:
+            return [executor.submit(run, key) for key in itertools.islice(ids, count)]
+
+        try:
+            if ordered:
+                pending = deque(submit_next(max_workers * 4))
+                while pending:
+                    result = pending.popleft().result()
+                    pending.extend(submit_next())
+                    yield result
+            else:
+                pending = set(submit_next(max_workers * 4))
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        pending.update(submit_next())
+                        yield future.result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def bulk_users(self, operations: Iterable[UserOperation], max_workers: int = 10, rate_limit: float = None,
+                   dry_run: bool = False, per_page: int = 500) -> BulkReport:
+        """Create, update, disable and delete many users concurrently.
+
+        The operations are diffed against a paginated snapshot of the existing users first, so only real changes
+        are sent: existing users are updated instead of created, unchanged users and users that are already
+        disabled or absent are skipped. A failing item does not abort the sync, it is reported in the BulkReport.
+        Example: api.bulk_users([UserOperation.disable("jdoe"), UserOperation.update("mmuster", email="m@example.com")])
+
+        :param operations: The operations to apply, at most one is executed per username (the last one).
+        :param max_workers: Maximum number of requests running at the same time.
+        :param rate_limit: Maximum number of change requests per second, defaults to None (unlimited)
+        :param dry_run: Only diff the operations and report what would be changed, defaults to False
+        :param per_page: Page size used to read the existing users.
+        :return: A report with one BulkItemResult per operation, in input order.
         """
-        self._rest_adapter = RestAdapter(host=host, api_key=api_key, ssl_verify=ssl_verify, logger=logger)
+        if max_workers < 1:
+            raise ValueError(f"max_workers must be at least 1 but was: {max_workers}")
+        bucket = TokenBucket(rate_limit) if rate_limit else None
+
+        def execute(item: BulkItemResult, existing: Optional[Dict]) -> GraylogApiResult:
+            if bucket is not None:
+                bucket.acquire()
+            return self._execute_user_operation(item, existing)
+
+        def run_all(run: Callable, items: List) -> List:
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="graylog-api-bulk") as executor:
+                return list(executor.map(run, items))
+
+        return run_bulk(operations, self.iter_users(per_page=per_page), execute, run_all, dry_run=dry_run)
+
+    def _execute_user_operation(self, item: BulkItemResult, existing: Optional[Dict]) -> GraylogApiResult:
+        if item.status == BulkItemResult.CREATED:
+            fields = dict(item.operation.fields)
+            return self.create_user(item.operation.username, fields.pop("first_name", None),
+                                    fields.pop("last_name", None), fields.pop("email", None),
+                                    fields.pop("password", None), fields.pop("permissions", None), data=fields)
+        if item.status == BulkItemResult.UPDATED:
+            return self.update_user(existing["id"], item.changes)
+        if item.status == BulkItemResult.DISABLED:
+            return self.change_user_status(existing["id"], "disabled")
+        return self.delete_user_by_id(existing["id"])
+
+    def entity_store(self, path: str = ":memory:", per_page: int = 200) -> "EntityStore":
+        """Open a local index of users, roles, streams, views and grants for audit queries.
+
+        Example: store = api.entity_store("graylog.sqlite"); store.refresh(); store.roles_of_user("admin")
+
+        :param path: SQLite database file that keeps the index between runs, defaults to ":memory:"
+        :param per_page: Page size used to list the entities.
+        :raises TypeError: If called on an AsyncGraylogAPI.
+        :return: The EntityStore, call refresh() to fill or update it.
+        """
+        # Imported here, sqlite3 is only loaded when a store is opened
+        from .entity_store import EntityStore
+        return EntityStore(self, path=path, per_page=per_page)
+
+    def _iter_pages(self, fetch: Callable[[Dict], GraylogApiResult], key: str, parameters: Dict = None,
+                    per_page: int = 50, max_items: int = None) -> Iterator[Dict]:
+        """Yield the entities of a paginated endpoint one at a time.
+
+        While the entities of one page are consumed, the next page is already fetched in the background,
+        so at most two pages are held in memory.
+
+        :param fetch: Endpoint method that takes the query parameters and returns one page.
+        :param key: The key of the entity list in the page. Example: users.
+        :param parameters: Additional query parameters like query or sort, page and per_page are managed here.
+        :param per_page: Number of entities requested per page.
+        :param max_items: Stop after this many entities, defaults to None (all entities).
+        :return: An iterator over the entity dictionaries.
+        """
+        if per_page < 1:
+            raise ValueError(f"per_page must be at least 1 but was: {per_page}")
+        if max_items is not None and max_items < 1:
+            return
+        base_parameters = dict(parameters or {}, per_page=per_page)
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="graylog-api-prefetch")
+        try:
+            page = 1
+            future = executor.submit(fetch, dict(base_parameters, page=page))
+            yielded = 0
+            while future is not None:
+                entities = (future.result().data or {}).get(key) or []
+                future = None
+                if len(entities) >= per_page and (max_items is None or yielded + len(entities) < max_items):
+                    page += 1
+                    future = executor.submit(fetch, dict(base_parameters, page=page))
+                for entity in entities:
+                    yield entity
+                    yielded += 1
+                    if yielded == max_items:
+                        return
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
 
     # The endpoints grouped like they are in the api-browser
     # /authz Authorization
@@ -38,6 +242,13 @@ class GraylogAPI:
         assignees = self._rest_adapter.get(f"authz/roles/{role_id}/assignees", parameters)
         return assignees
 
+    def iter_auth_roles(self, parameters: Dict = None, per_page: int = 50, max_items: int = None) -> Iterator[Dict]:
+        return self._iter_pages(self.get_auth_roles, "roles", parameters, per_page, max_items)
+
+    def iter_auth_assignees_of_role(self, role_id: str, parameters: Dict = None, per_page: int = 50, max_items: int = None) -> Iterator[Dict]:
+        fetch = functools.partial(self.get_auth_assignees_of_role, role_id)
+        return self._iter_pages(fetch, "users", parameters, per_page, max_items)
+
     # /ca
     def get_ca(self) -> GraylogApiResult:
         result = self._rest_adapter.get("ca")
@@ -61,6 +272,18 @@ class GraylogAPI:
         result = self._rest_adapter.get(f"cluster/{node_id}/jvm")
         return result
 
+    def get_buffers(self, node_id: str) -> GraylogApiResult:
+        result = self._rest_adapter.get(f"cluster/{node_id}/buffers")
+        return result
+
+    def get_journal(self, node_id: str) -> GraylogApiResult:
+        result = self._rest_adapter.get(f"cluster/{node_id}/journal")
+        return result
+
+    def get_node_metrics(self, node_id: str, metrics: List[str]) -> GraylogApiResult:
+        result = self._rest_adapter.post(f"cluster/{node_id}/metrics/multiple", data={"metrics": list(metrics)})
+        return result
+
     # /contentstream
     # /dashboards
     # /datanodes
@@ -76,6 +299,13 @@ class GraylogAPI:
     # /views/fields FieldTypes
     # /system/indexer Indexer
     # /search/universal/absolute Legacy Message Search
+    def search_absolute(self, query: str, from_: Timestamp, to: Timestamp, parameters: Dict = None) -> GraylogApiResult:
+        search_parameters = {"query": query, "from": format_timestamp(from_), "to": format_timestamp(to)}
+        if parameters:
+            search_parameters.update(parameters)
+        result = self._rest_adapter.get("search/universal/absolute", search_parameters)
+        return result
+
     # /messages
     # /migration
     # /system/pipelines Pipelines
@@ -83,8 +313,116 @@ class GraylogAPI:
     # /remote-reindex-migration
     # /roles
     # /views/search Search
+    def create_search(self, search: Dict) -> GraylogApiResult:
+        result = self._rest_adapter.post("views/search", data=search)
+        return result
+
+    def execute_search(self, search_id: str, parameters: Dict = None) -> GraylogApiResult:
+        result = self._rest_adapter.post(f"views/search/{search_id}/execute", data=parameters or {})
+        return result
+
+    def export_messages(self, query: str, from_: Timestamp, to: Timestamp, streams: List[str] = None,
+                        fields: List[str] = None, limit: int = None, export_format: str = "ndjson",
+                        chunk_size: int = 64 * 1024) -> Iterator[Dict]:
+        """Stream the messages of an absolute time range from the export endpoint, oldest message first.
+
+        The body is decoded line by line while it is received, so memory does not grow with the number of messages.
+        Example: for message in api.export_messages("source:fw01", "2024-01-01T00:00:00Z", "2024-01-02T00:00:00Z")
+
+        :param query: The search query. Example: source:fw01 AND level:3
+        :param from_: Start of the time range, a datetime or an ISO 8601 string, naive values are UTC.
+        :param to: End of the time range, included in the export.
+        :param streams: IDs of the streams to search in, defaults to None (all streams the API key may read)
+        :param fields: Fields of the messages in export order, defaults to None (timestamp, source, message)
+        :param limit: Maximum number of messages, defaults to None (all)
+        :param export_format: ndjson yields decoded message objects, csv yields one dictionary of strings per row.
+        :param chunk_size: Number of bytes read from the connection at once.
+        :raises ValueError: If the export format is unknown.
+        :return: An iterator over the messages.
+        """
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"export_format must be one of {', '.join(EXPORT_FORMATS)} but was: {export_format}")
+        request = messages_request(query, from_, to, streams, fields, limit)
+        lines = self._rest_adapter.iter_lines("POST", "views/search/messages", data=request,
+                                              accept=EXPORT_FORMATS[export_format], chunk_size=chunk_size)
+        return decode_messages(lines, export_format)
+
+    def export_messages_parallel(self, query: str, from_: Timestamp, to: Timestamp, streams: List[str] = None,
+                                 fields: List[str] = None, export_format: str = "ndjson", slices: int = 8,
+                                 max_workers: int = 4, buffer: int = 10000) -> Iterator[Dict]:
+        """Export a large time range as parallel sub-range exports, merged back in chronological order.
+
+        The range is split into slices consecutive sub-ranges that are exported concurrently, each sorted by
+        timestamp ascending. The messages of earlier sub-ranges are yielded first, later ones are buffered up to
+        buffer messages per export. An export is only started once its sub-range is at most max_workers
+        sub-ranges ahead of the one being yielded, so memory is bounded by max_workers * buffer messages
+        whatever the number of slices.
+
+        :param query: The search query. Example: source:fw01 AND level:3
+        :param from_: Start of the time range, a datetime or an ISO 8601 string, naive values are UTC.
+        :param to: End of the time range, included in the export.
+        :param streams: IDs of the streams to search in, defaults to None (all streams the API key may read)
+        :param fields: Fields of the messages in export order, defaults to None (timestamp, source, message)
+        :param export_format: ndjson yields decoded message objects, csv yields one dictionary of strings per row.
+        :param slices: Number of sub-ranges the time range is split into.
+        :param max_workers: Maximum number of exports running at the same time.
+        :param buffer: Maximum number of messages held per running export.
+        :raises ValueError: If the export format, slices or max_workers are invalid.
+        :return: An iterator over the messages.
+        """
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"export_format must be one of {', '.join(EXPORT_FORMATS)} but was: {export_format}")
+        if max_workers < 1:
+            raise ValueError(f"max_workers must be at least 1 but was: {max_workers}")
+        producers = [functools.partial(self.export_messages, query, start, end, streams, fields,
+                                       export_format=export_format)
+                     for start, end in split_time_range(from_, to, slices)]
+        return ordered_prefetch(producers, max_workers=max_workers, buffer=buffer)
+
     # /search Search Options (Decorators, Export, Functions etc.)
     # /views/searchjobs Searchjobs
+    def get_search_job_status(self, job_id: str, node_id: str = None) -> GraylogApiResult:
+        endpoint = f"views/searchjobs/{node_id}/{job_id}/status" if node_id else f"views/searchjobs/{job_id}/status"
+        result = self._rest_adapter.get(endpoint)
+        return result
+
+    def wait_for_search_job(self, job: Dict, timeout: float = 300, poll_interval: float = 0.1,
+                            max_poll_interval: float = 2.0) -> GraylogApiResult:
+        """Poll a search job returned by execute_search until it is done.
+
+        The poll interval starts short for quick searches and doubles up to max_poll_interval for long ones.
+
+        :param job: The search job as returned by execute_search.
+        :param timeout: Seconds to wait for the job before giving up.
+        :param poll_interval: Seconds to wait before the first poll.
+        :param max_poll_interval: Upper bound for the seconds between two polls.
+        :raises GraylogApiException: If the job did not finish within timeout.
+        :return: The status of the finished job including its results.
+        """
+        job_id, node_id = job["id"], job.get("executing_node")
+        status = GraylogApiResult(200, data=job)
+        deadline = time.monotonic() + timeout
+        for interval in poll_intervals(poll_interval, max_poll_interval):
+            if ((status.data or {}).get("execution") or {}).get("done"):
+                return status
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise GraylogApiException(f"Search job {job_id} did not finish within {timeout} seconds")
+            time.sleep(min(interval, remaining))
+            status = self.get_search_job_status(job_id, node_id)
+
+    def search(self, search: Dict, parameters: Dict = None, timeout: float = 300) -> GraylogApiResult:
+        """Create a search, execute it and wait for its results.
+
+        :param search: The search definition with its queries. Example: {"queries": [{"id": "q1", ...}]}
+        :param parameters: Execution state like parameter bindings, defaults to None
+        :param timeout: Seconds to wait for the search job.
+        :return: The status of the finished search job including its results.
+        """
+        search_id = self.create_search(search).data["id"]
+        job = self.execute_search(search_id, parameters).data
+        return self.wait_for_search_job(job, timeout=timeout)
+
     # /sidecars
     # /sidecar
     # /startpage
@@ -94,6 +432,9 @@ class GraylogAPI:
         result = self._rest_adapter.get("streams")
         return result
 
+    def iter_streams(self) -> Iterator[Dict]:
+        return self._rest_adapter.iter_items("streams", key="streams")
+
     # /system Main System endpoints
     # /telemetry
     # /token_usage
@@ -121,6 +462,9 @@ class GraylogAPI:
         result = self._rest_adapter.get("users/paginated", parameters)
         return result
 
+    def iter_users(self, parameters: Dict = None, per_page: int = 50, max_items: int = None) -> Iterator[Dict]:
+        return self._iter_pages(self.get_users_paginated, "users", parameters, per_page, max_items)
+
     def get_user_by_id(self, user_id: str) -> GraylogApiResult:
         result = self._rest_adapter.get(f"users/id/{user_id}")
         return result
@@ -133,6 +477,10 @@ class GraylogAPI:
         result = self._rest_adapter.get(f"users/{user_id}/tokens")
         return result
 
+    def update_user(self, user_id: str, data: Dict) -> GraylogApiResult:
+        result = self._rest_adapter.put(f"users/{user_id}", data=data)
+        return result
+
     def delete_user_by_id(self, user_id: str) -> GraylogApiResult:
         result = self._rest_adapter.delete(f"users/id/{user_id}")
         return result
@@ -152,6 +500,9 @@ class GraylogAPI:
         result = self._rest_adapter.get("views", parameters)
         return result
 
+    def iter_views(self, parameters: Dict = None, per_page: int = 50, max_items: int = None) -> Iterator[Dict]:
+        return self._iter_pages(self.get_views, "views", parameters, per_page, max_items)
+
     def get_view_by_id(self, view_id: str) -> GraylogApiResult:
         result = self._rest_adapter.get(f"views/{view_id}")
         return result
@@ -0,0 +1,222 @@
+import bisect
+import re
+import threading
+from typing import Callable, Dict, List, Sequence, Tuple
+
+PHASES = ("wait", "transfer", "decode", "total")
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_ID_SEGMENT = re.compile(r"^(?:[0-9a-f]{24}|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|\d+)$", re.I)
+
+
+class RequestInfo:
+    __slots__ = ("method", "endpoint", "status_code", "retries", "bytes_out", "bytes_in", "wire_bytes_out",
+                 "wire_bytes_in", "wait", "transfer", "decode", "total", "cache", "error")
+
+    def __init__(self, method: str, endpoint: str):
+        """Measurements of a single call to RestAdapter._do
+
+        Phases in seconds: wait is connect, TLS and server time until the response headers arrived (of the last
+        attempt), transfer is reading the body, decode is JSON decoding and total includes retries and backoff.
+        bytes_out and bytes_in are the sizes of the bodies, wire_bytes_out and wire_bytes_in their sizes as sent over
+        the network, which are smaller for compressed bodies.
+
+        :param method: The HTTP Method of the request
+        :param endpoint: The API endpoint of the request. Example: users/id/abc
+        """
+        self.method = method
+        self.endpoint = endpoint
+        self.status_code = None
+        self.retries = 0
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.wire_bytes_out = 0
+        self.wire_bytes_in = 0
+        self.wait = 0.0
+        self.transfer = 0.0
+        self.decode = 0.0
+        self.total = 0.0
+        self.cache = None
+        self.error = None
+
+
+class Instrumentation:
+    """Hooks called by RestAdapter, subclass and override the ones you need"""
+
+    def on_request(self, info: RequestInfo):
+        """Called before a request is sent, info only contains method and endpoint yet."""
+
+    def on_response(self, info: RequestInfo):
+        """Called when a call finished, also for cache hits (info.cache == "hit") and failures (info.error)."""
+
+
+def endpoint_label(endpoint: str) -> str:
+    """Replace ID-like path segments to keep the number of distinct endpoints low. Example: views/{id}"""
+    return "/".join("{id}" if _ID_SEGMENT.match(segment) else segment for segment in endpoint.strip("/").split("/"))
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by linear interpolation inside the matching bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+
+class _EndpointStats:
+    __slots__ = ("requests", "errors", "statuses", "retries", "bytes_in", "bytes_out", "wire_bytes_in", "wire_bytes_out",
+                 "histograms")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.requests = 0
+        self.errors = 0
+        self.statuses: Dict[Tuple[str, str], int] = {}
+        self.retries = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.wire_bytes_in = 0
+        self.wire_bytes_out = 0
+        self.histograms = {phase: Histogram(buckets) for phase in PHASES}
+
+
+class InMemoryCollector(Instrumentation):
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS, label: Callable[[str], str] = endpoint_label):
+        """Collects latency histograms and counters per endpoint in memory
+
+        :param buckets: Upper bounds of the latency histogram buckets in seconds
+        :param label: Maps an endpoint to the label it is aggregated under, defaults to replacing ID segments
+        """
+        self._buckets = tuple(buckets)
+        self._label = label
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, _EndpointStats] = {}
+        self.cache: Dict[str, int] = {"hit": 0, "miss": 0, "revalidated": 0}
+
+    def on_response(self, info: RequestInfo):
+        label = self._label(info.endpoint)
+        with self._lock:
+            if info.cache is not None:
+                self.cache[info.cache] = self.cache.get(info.cache, 0) + 1
+            if info.cache == "hit":
+                return
+            stats = self._endpoints.get(label)
+            if stats is None:
+                stats = self._endpoints[label] = _EndpointStats(self._buckets)
+            stats.requests += 1
+            if info.error is not None:
+                stats.errors += 1
+            status = (info.method, str(info.status_code or "error"))
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            stats.retries += info.retries
+            stats.bytes_in += info.bytes_in
+            stats.bytes_out += info.bytes_out
+            stats.wire_bytes_in += info.wire_bytes_in
+            stats.wire_bytes_out += info.wire_bytes_out
+            for phase in PHASES:
+                stats.histograms[phase].observe(getattr(info, phase))
+
+    @property
+    def cache_hit_ratio(self) -> float:
+        lookups = sum(self.cache.values())
+        return (self.cache["hit"] + self.cache["revalidated"]) / lookups if lookups else 0.0
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Summary per endpoint label with request, error and retry counts, bytes (decompressed and as sent over the
+        network) and p50/p99 per phase."""
+        with self._lock:
+            return {label: {"requests": stats.requests, "errors": stats.errors, "retries": stats.retries,
+                            "bytes_in": stats.bytes_in, "bytes_out": stats.bytes_out,
+                            "wire_bytes_in": stats.wire_bytes_in, "wire_bytes_out": stats.wire_bytes_out,
+                            **{f"{phase}_p50": stats.histograms[phase].quantile(0.5) for phase in PHASES},
+                            **{f"{phase}_p99": stats.histograms[phase].quantile(0.99) for phase in PHASES}}
+                    for label, stats in self._endpoints.items()}
+
+    def to_prometheus(self, prefix: str = "graylog_api") -> str:
+        """Render all metrics in the Prometheus text exposition format, for example for a /metrics handler."""
+        lines: List[str] = [f"# TYPE {prefix}_request_duration_seconds histogram"]
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            for label, stats in endpoints:
+                for phase in PHASES:
+                    histogram = stats.histograms[phase]
+                    labels = f'endpoint="{label}",phase="{phase}"'
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(f'{prefix}_request_duration_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+                    lines.append(f"{prefix}_request_duration_seconds_sum{{{labels}}} {histogram.sum}")
+                    lines.append(f"{prefix}_request_duration_seconds_count{{{labels}}} {histogram.count}")
+            lines.append(f"# TYPE {prefix}_requests_total counter")
+            for label, stats in endpoints:
+                for (method, status), count in sorted(stats.statuses.items()):
+                    lines.append(f'{prefix}_requests_total{{endpoint="{label}",method="{method}",status="{status}"}} {count}')
+            for name, attribute in (("retries", "retries"), ("received_bytes", "bytes_in"), ("sent_bytes", "bytes_out"),
+                                    ("received_wire_bytes", "wire_bytes_in"), ("sent_wire_bytes", "wire_bytes_out")):
+                lines.append(f"# TYPE {prefix}_{name}_total counter")
+                for label, stats in endpoints:
+                    lines.append(f'{prefix}_{name}_total{{endpoint="{label}"}} {getattr(stats, attribute)}')
+            lines.append(f"# TYPE {prefix}_cache_lookups_total counter")
+            for outcome, count in sorted(self.cache.items()):
+                lines.append(f'{prefix}_cache_lookups_total{{result="{outcome}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+class OpenTelemetryInstrumentation(Instrumentation):
+    def __init__(self, meter_name: str = "graylog_api_client", label: Callable[[str], str] = endpoint_label):
+        """Records the measurements with the OpenTelemetry metrics API (requires opentelemetry-api)
+
+        :param meter_name: Name of the meter the instruments are created on
+        :param label: Maps an endpoint to the endpoint attribute, defaults to replacing ID segments
+        """
+        try:
+            from opentelemetry import metrics
+        except ImportError as e:
+            raise ImportError("OpenTelemetryInstrumentation requires the opentelemetry-api package") from e
+        meter = metrics.get_meter(meter_name)
+        self._label = label
+        self._duration = meter.create_histogram("graylog_api.request.duration", unit="s",
+                                                description="Duration of Graylog API requests per phase")
+        self._requests = meter.create_counter("graylog_api.requests", description="Graylog API requests")
+        self._retries = meter.create_counter("graylog_api.retries", description="Retried Graylog API requests")
+        self._bytes = meter.create_counter("graylog_api.bytes", unit="By", description="Bytes sent and received")
+        self._wire_bytes = meter.create_counter("graylog_api.wire_bytes", unit="By",
+                                                description="Bytes sent and received over the network, after compression")
+        self._cache = meter.create_counter("graylog_api.cache.lookups", description="Response cache lookups")
+
+    def on_response(self, info: RequestInfo):
+        if info.cache is not None:
+            self._cache.add(1, {"result": info.cache})
+        if info.cache == "hit":
+            return
+        endpoint = self._label(info.endpoint)
+        self._requests.add(1, {"endpoint": endpoint, "method": info.method, "status": str(info.status_code or "error")})
+        for phase in PHASES:
+            self._duration.record(getattr(info, phase), {"endpoint": endpoint, "phase": phase})
+        if info.retries:
+            self._retries.add(info.retries, {"endpoint": endpoint})
+        self._bytes.add(info.bytes_in, {"endpoint": endpoint, "direction": "in"})
+        self._bytes.add(info.bytes_out, {"endpoint": endpoint, "direction": "out"})
+        self._wire_bytes.add(info.wire_bytes_in, {"endpoint": endpoint, "direction": "in"})
+        self._wire_bytes.add(info.wire_bytes_out, {"endpoint": endpoint, "direction": "out"})
@@ -0,0 +1,174 @@
+import codecs
+import json
+import re
+from typing import Any, Callable, Dict, Iterable, Iterator, Tuple, Type
+
+_LOADS: Dict[str, Callable[[bytes], Any]] = {"json": json.loads}
+_DUMPS: Dict[str, Callable[[Any], bytes]] = {"json": lambda obj: json.dumps(obj, separators=(",", ":")).encode()}
+DECODE_ERRORS: Tuple[Type[Exception], ...] = (ValueError,)
+
+try:
+    import orjson
+    _LOADS["orjson"] = orjson.loads
+    _DUMPS["orjson"] = orjson.dumps
+except ImportError:
+    pass
+
+try:
+    import msgspec
+    _LOADS["msgspec"] = msgspec.json.decode
+    _DUMPS["msgspec"] = msgspec.json.encode
+    DECODE_ERRORS += (msgspec.DecodeError,)
+except ImportError:
+    pass
+
+DEFAULT_BACKEND = next(name for name in ("orjson", "msgspec", "json") if name in _LOADS)
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# The first character that cannot continue a number or literal
+_SCALAR_END = re.compile(r"[^0-9A-Za-z.+\-]")
+_DECODER = json.JSONDecoder()
+
+
+def get_loads(backend: str = None) -> Callable[[bytes], Any]:
+    """Return the loads function of a JSON backend that decodes bytes directly.
+
+    :param backend: One of orjson, msgspec or json. Defaults to the fastest installed one.
+    :raises ValueError: If the backend is unknown or not installed.
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend not in _LOADS:
+        raise ValueError(f"JSON backend must be one of {sorted(_LOADS)} but was: {backend}")
+    return _LOADS[backend]
+
+
+def get_dumps(backend: str = None) -> Callable[[Any], bytes]:
+    """Return the dumps function of a JSON backend that encodes to compact bytes.
+
+    :param backend: One of orjson, msgspec or json. Defaults to the fastest installed one.
+    :raises ValueError: If the backend is unknown or not installed.
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend not in _DUMPS:
+        raise ValueError(f"JSON backend must be one of {sorted(_DUMPS)} but was: {backend}")
+    return _DUMPS[backend]
+
+
+class _ChunkReader:
+    def __init__(self, chunks: Iterable[bytes]):
+        """Buffer over a byte stream that only keeps the not yet consumed text."""
+        self._chunks = iter(chunks)
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            text = self._text_decoder.decode(b"", final=True)
+            self.eof = True
+        else:
+            text = self._text_decoder.decode(chunk)
+        self.buffer = self.buffer[self.pos:] + text
+        self.pos = 0
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character, an empty string at the end of the stream."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if self.eof:
+                return ""
+            self._fill()
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"Expected one of {chars!r} but got {char!r}")
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value, reading more chunks until it is complete."""
+        self.peek()
+        retry_at = 0
+        while True:
+            available = len(self.buffer) - self.pos
+            if available and self.buffer[self.pos] not in '[{"':
+                # A number or literal is only complete once a character follows that cannot continue it, 3. or 1e
+                # at the end of a chunk would otherwise be decoded as 3 or 1
+                match = _SCALAR_END.search(self.buffer, self.pos)
+                if match is not None or self.eof:
+                    value, end = _DECODER.raw_decode(self.buffer, self.pos)
+                    if end != (match.start() if match is not None else len(self.buffer)):
+                        raise ValueError(f"Invalid JSON value: {self.buffer[self.pos:end + 1]!r}")
+                    self.pos = end
+                    return value
+            elif available and (available >= retry_at or self.eof):
+                # Objects, arrays and strings end with their closing character, so a successful decode is complete.
+                # A failed attempt is only repeated once the buffer doubled, which keeps large values linear
+                try:
+                    value, self.pos = _DECODER.raw_decode(self.buffer, self.pos)
+                    return value
+                except json.JSONDecodeError:
+                    if self.eof:
+                        raise
+                retry_at = 2 * available
+            elif self.eof:
+                raise ValueError("Unexpected end of JSON")
+            self._fill()
+
+
+def iter_json_items(chunks: Iterable[bytes], key: str = None) -> Iterator[Any]:
+    """Incrementally decode the items of a JSON array without materializing the whole document.
+
+    Only the item currently decoded is held in memory. With key, the array is looked up in a top-level object,
+    other members in front of it are decoded and discarded. Example: iter_json_items(chunks, key="users")
+
+    :param chunks: The UTF-8 encoded body, for example response.iter_content(65536).
+    :param key: Member of the top-level object holding the array, None if the document itself is an array.
+    :raises ValueError: If the body is not valid JSON or does not have the expected structure.
+    :return: An iterator over the decoded items.
+    """
+    reader = _ChunkReader(chunks)
+    if key is not None:
+        reader.expect("{")
+        while True:
+            if reader.peek() == "}":
+                return
+            name = reader.value()
+            reader.expect(":")
+            if name == key:
+                break
+            reader.value()
+            if reader.expect(",}") == "}":
+                return
+    reader.expect("[")
+    if reader.peek() == "]":
+        return
+    while True:
+        yield reader.value()
+        if reader.expect(",]") == "]":
+            return
+
+
+def iter_lines(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Split a byte stream into lines that keep their b"\\n", the last line may lack it.
+
+    Splitting the undecoded bytes is safe for UTF-8, as b"\\n" never occurs inside a multi-byte character.
+
+    :param chunks: The body, for example response.iter_content(65536).
+    :return: An iterator over the lines.
+    """
+    rest = b""
+    for chunk in chunks:
+        if not chunk:
+            continue
+        lines = (rest + chunk).split(b"\n")
+        rest = lines.pop()
+        for line in lines:
+            yield line + b"\n"
+    if rest:
+        yield rest
@@ -0,0 +1,119 @@
+import sys
+from typing import Any, Dict, FrozenSet, Tuple
+
+from .json_codec import get_dumps, get_loads
+
+_dumps = get_dumps()
+_loads = get_loads()
+
+
+class GraylogModel:
+    """Compact, read-only view of a Graylog entity
+
+    Frequently used fields are stored in __slots__ instead of a per-entity dict. Nested fields listed in _lazy are
+    kept as compact JSON bytes and only decoded when accessed. Strings in the lists of _interned (e.g. permissions)
+    are interned, so entities share them. Fields that are not declared are kept in a small dict and are still
+    reachable as attributes.
+    """
+    __slots__ = ("_extra",)
+    _fields: Tuple[str, ...] = ()
+    _lazy: Tuple[str, ...] = ()
+    _interned: Tuple[str, ...] = ()
+    _known: FrozenSet[str] = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._known = frozenset(cls._fields + cls._lazy)
+        for name in cls._lazy:
+            setattr(cls, name, property(cls._lazy_getter(name)))
+
+    @staticmethod
+    def _lazy_getter(name: str):
+        slot = "_" + name
+
+        def getter(self):
+            encoded = getattr(self, slot)
+            return None if encoded is None else _loads(encoded)
+        getter.__name__ = name
+        return getter
+
+    def __init__(self, data: Dict):
+        """
+        :param data: The entity as returned by the API
+        """
+        for name in self._fields:
+            value = data.get(name)
+            if name in self._interned and value:
+                value = [sys.intern(item) if isinstance(item, str) else item for item in value]
+            setattr(self, name, value)
+        for name in self._lazy:
+            value = data.get(name)
+            # Copied into an exact-size bytes object, as some backends over-allocate the buffer they return
+            setattr(self, "_" + name, None if value is None else bytes(memoryview(_dumps(value))))
+        extra = {key: value for key, value in data.items() if key not in self._known}
+        self._extra = extra or None
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for names that are neither slots nor lazy properties
+        extra = object.__getattribute__(self, "_extra")
+        if extra is not None and name in extra:
+            return extra[name]
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """Dictionary-style access, also for fields that are not declared."""
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            return default
+
+    def to_dict(self) -> Dict:
+        data = {name: getattr(self, name) for name in self._fields + self._lazy}
+        data.update(self._extra or {})
+        return data
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        name = self.get("username") or self.get("title") or self.get("name") or self.get("hostname")
+        return f"{type(self).__name__}(id={self.get('id') or self.get('node_id')!r}, {name!r})"
+
+
+class User(GraylogModel):
+    _fields = ("id", "username", "full_name", "first_name", "last_name", "email", "roles", "permissions", "read_only",
+               "external", "account_status", "service_account", "session_active", "last_activity", "client_address",
+               "timezone", "session_timeout_ms", "auth_service_enabled", "auth_service_id", "auth_service_uid")
+    _lazy = ("preferences", "startpage", "grn_permissions")
+    _interned = ("roles", "permissions")
+    __slots__ = _fields + tuple("_" + name for name in _lazy)
+
+
+class Role(GraylogModel):
+    _fields = ("id", "name", "description", "permissions", "read_only")
+    _interned = ("permissions",)
+    __slots__ = _fields
+
+
+class View(GraylogModel):
+    _fields = ("id", "type", "title", "summary", "description", "search_id", "owner", "created_at",
+               "last_updated_at", "favorite")
+    _lazy = ("state", "properties", "requires")
+    __slots__ = _fields + tuple("_" + name for name in _lazy)
+
+
+class Stream(GraylogModel):
+    _fields = ("id", "title", "description", "index_set_id", "disabled", "is_default", "is_editable",
+               "matching_type", "creator_user_id", "created_at", "remove_matches_from_default_stream", "categories")
+    _lazy = ("rules", "outputs", "alert_receivers", "content_pack")
+    __slots__ = _fields + tuple("_" + name for name in _lazy)
+
+
+class ClusterNode(GraylogModel):
+    _fields = ("node_id", "cluster_id", "hostname", "version", "codename", "is_leader", "is_processing",
+               "lb_status", "lifecycle", "timezone", "started_at", "operating_system", "facility")
+    __slots__ = _fields
+
+
+# The key under which list endpoints return the entities
+MODELS_BY_KEY: Dict[str, type] = {"users": User, "roles": Role, "views": View, "streams": Stream}
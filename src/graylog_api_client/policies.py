@@ -0,0 +1,182 @@
+import email.utils
+import random
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+
+class RetryPolicy:
+    def __init__(self, total: int = 3, backoff_factor: float = 0.5, max_backoff: float = 30,
+                 status_forcelist: Iterable[int] = (429, 502, 503, 504),
+                 allowed_methods: Iterable[str] = ("GET", "PUT", "DELETE", "HEAD", "OPTIONS"),
+                 respect_retry_after: bool = True, max_retry_after: float = 120):
+        """Exponential backoff with full jitter for failed requests
+
+        Connection errors and statuses in status_forcelist are retried for idempotent methods. A 429 is retried
+        for every method, because the server rejected the request before processing it.
+
+        :param total: Maximum number of retries after the first attempt, defaults to 3
+        :param backoff_factor: Base of the backoff, the n-th retry waits up to backoff_factor * 2 ** n seconds, defaults to 0.5
+        :param max_backoff: Upper bound for a single backoff in seconds, defaults to 30
+        :param status_forcelist: HTTP statuses that are retried, defaults to (429, 502, 503, 504)
+        :param allowed_methods: Idempotent HTTP methods that may be retried, defaults to GET, PUT, DELETE, HEAD, OPTIONS
+        :param respect_retry_after: Wait as long as the Retry-After header of the response says, defaults to True
+        :param max_retry_after: Give up instead of waiting longer than this many seconds for Retry-After, defaults to 120
+        """
+        self.total = total
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.status_forcelist = frozenset(status_forcelist)
+        self.allowed_methods = frozenset(method.upper() for method in allowed_methods)
+        self.respect_retry_after = respect_retry_after
+        self.max_retry_after = max_retry_after
+
+    def can_retry(self, method: str, attempt: int, status_code: int = None) -> bool:
+        """Whether a request that failed on its attempt-th retry (0 for the first try) may be sent again.
+
+        :param method: The HTTP Method of the request.
+        :param attempt: Number of retries already made.
+        :param status_code: The HTTP status of the response, None for connection errors.
+        """
+        if attempt >= self.total:
+            return False
+        if status_code is None:
+            return method in self.allowed_methods
+        if status_code not in self.status_forcelist:
+            return False
+        return status_code == 429 or method in self.allowed_methods
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_backoff, self.backoff_factor * 2 ** attempt))
+
+    @staticmethod
+    def parse_retry_after(value: str) -> Optional[float]:
+        """Seconds to wait according to a Retry-After header, which is either seconds or an HTTP-date."""
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, retry_at.timestamp() - time.time())
+
+    def delay(self, attempt: int, retry_after: str = None) -> Optional[float]:
+        """Seconds to wait before the next retry, None if Retry-After asks for longer than max_retry_after."""
+        if self.respect_retry_after:
+            seconds = self.parse_retry_after(retry_after)
+            if seconds is not None:
+                return seconds if seconds <= self.max_retry_after else None
+        return self.backoff(attempt)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float = None):
+        """Token bucket that refills with rate tokens per second
+
+        :param rate: Sustained number of requests per second
+        :param capacity: Maximum burst size, at least one token, defaults to max(1, rate)
+        :raises ValueError: If rate is not positive or capacity is less than 1.
+        """
+        if rate <= 0:
+            raise ValueError(f"rate must be greater than 0 but was: {rate}")
+        if capacity is not None and capacity < 1:
+            raise ValueError(f"capacity must be at least 1 but was: {capacity}")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1):
+        """Block until tokens are available and take them.
+
+        :raises ValueError: If more tokens are asked for than the bucket can ever hold.
+        """
+        if tokens > self.capacity:
+            raise ValueError(f"tokens must be at most the capacity {self.capacity} but was: {tokens}")
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class RateLimiter:
+    def __init__(self, limits: Dict[str, float], burst: Dict[str, float] = None):
+        """Client side rate limiting per endpoint prefix
+
+        Every request takes a token from the bucket of the longest matching prefix. The prefix "" applies to all
+        other requests to the host.
+
+        :param limits: Requests per second per endpoint prefix. Example: {"": 50, "users": 10}
+        :param burst: Optional burst size per prefix, at least 1, defaults to the rate
+        :raises ValueError: If a rate is not positive or a burst is less than 1.
+        """
+        burst = burst or {}
+        self._buckets = {prefix.strip("/"): TokenBucket(rate, burst.get(prefix)) for prefix, rate in limits.items()}
+        self._prefixes = sorted(self._buckets, key=len, reverse=True)
+
+    def bucket_for(self, endpoint: str) -> Optional[TokenBucket]:
+        endpoint = endpoint.strip("/")
+        for prefix in self._prefixes:
+            if endpoint.startswith(prefix):
+                return self._buckets[prefix]
+        return None
+
+    def acquire(self, endpoint: str):
+        bucket = self.bucket_for(endpoint)
+        if bucket is not None:
+            bucket.acquire()
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        """Fail fast while the server is unhealthy
+
+        After failure_threshold consecutive failures the circuit opens and requests are rejected without being
+        sent. After reset_timeout seconds a single trial request is let through, its outcome closes or re-opens
+        the circuit.
+
+        :param failure_threshold: Consecutive failures that open the circuit, defaults to 5
+        :param reset_timeout: Seconds the circuit stays open before a trial request, defaults to 30
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
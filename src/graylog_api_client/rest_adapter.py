@@ -1,30 +1,88 @@
+import functools
+import time
 import requests
 import logging
-from typing import Dict, Union
+from typing import Any, Callable, Dict, Iterator, Tuple, Union
 
-from .exceptions import GraylogApiException
+from .cache import CacheEntry, ResponseCache
+from .singleflight import SingleFlight
+from .exceptions import GraylogApiException, GraylogCircuitOpenException
+from .instrumentation import Instrumentation, RequestInfo
+from .compression import ACCEPT_ENCODING, REQUEST_ENCODING, compress, wire_bytes
+from .json_codec import DECODE_ERRORS, get_dumps, get_loads, iter_json_items, iter_lines
+from .policies import CircuitBreaker, RateLimiter, RetryPolicy
+from .transport import make_http_adapter
 from .data_structures import GraylogApiResult
 
+# Log lines are only formatted when the level is enabled
+_LOG_PRE = "method=%s, url=%s, parameters=%s"
+_LOG_POST = _LOG_PRE + ", success=%s, status_code=%s, message=%s"
+
 
 class RestAdapter:
-    def __init__(self, host: str, api_key: str, ssl_verify: Union[str, bool] = True, logger: logging.Logger = None):
+    def __init__(self, host: str, api_key: str, ssl_verify: Union[str, bool] = True, logger: logging.Logger = None,
+                 pool_maxsize: int = None, cache: ResponseCache = None, coalesce: bool = False,
+                 retry: RetryPolicy = None, rate_limiter: RateLimiter = None, circuit_breaker: CircuitBreaker = None,
+                 json_backend: str = None, instrumentation: Instrumentation = None,
+                 http_adapter: requests.adapters.BaseAdapter = None, http2: bool = False, compression: bool = True,
+                 compress_requests: int = None):
         """Constructor for RestAdapter
 
         :param host: The hostname of the Graylog API endpoint plus the protocol. Example: https://graylog.com/api
         :param api_key: An API Key to authenticate with Graylog
         :param ssl_verify: Enables or Disables TLS Certificate verification. For a custom certificate, this value must a path pointing to the certificate, defaults to True
         :param logger: The logger being used by the Adapter, will use a new one if none is given, defaults to None
+        :param pool_maxsize: Number of keep-alive connections kept open to the host. When set, callers block until a connection is free instead of opening extra ones, defaults to None (requests default)
+        :param cache: Opt-in cache for GET responses, write requests invalidate the affected resource, defaults to None
+        :param coalesce: Let concurrent identical GET requests share one network call and result, the counters are available in single_flight.stats, defaults to False
+        :param retry: Retry failed requests with exponential backoff and Retry-After handling, defaults to None (no retries)
+        :param rate_limiter: Client side token bucket rate limiting per endpoint prefix, defaults to None
+        :param circuit_breaker: Reject requests without sending them while the server keeps failing, defaults to None
+        :param json_backend: JSON decoder for response bodies, one of orjson, msgspec or json, defaults to None (fastest installed)
+        :param instrumentation: Hooks called before and after every request with its timings, sizes and retries. Example: InMemoryCollector(), defaults to None
+        :param http_adapter: Transport adapter with its connection pools, can be shared by several RestAdapters and is left open by close(), takes precedence over pool_maxsize and http2, defaults to None
+        :param http2: Multiplex concurrent requests over one HTTP/2 connection, falls back to HTTP/1.1 if the server or the installed packages do not support it, defaults to False
+        :param compression: Ask for gzip, deflate, br or zstd compressed responses (br and zstd if their decoders are installed), which are decompressed while they are read. False asks for uncompressed responses, defaults to True
+        :param compress_requests: Gzip request bodies of at least this many bytes. The server must accept Content-Encoding: gzip, defaults to None (never)
         """
         self._logger = logger or logging.getLogger(__name__)
         self.host = host + "/"
         self._api_key = api_key
         self._ssl_verify = ssl_verify
+        self._cache = cache
+        self._credential = ResponseCache.credential_of(api_key) if cache is not None else None
+        self.single_flight = SingleFlight() if coalesce else None
+        self._retry = retry
+        self._rate_limiter = rate_limiter
+        self._circuit_breaker = circuit_breaker
+        self._loads = get_loads(json_backend)
+        self._dumps = get_dumps(json_backend)
+        if compress_requests is not None and compress_requests < 0:
+            raise ValueError(f"compress_requests must be at least 0 but was: {compress_requests}")
+        self._compress_requests = compress_requests
+        self._instrumentation = instrumentation
         self._session = requests.Session()
-        self._session.headers.update({"Accept": "application/json", "X-Requested-By": "python-graylog-api-client"})
+        self._session.headers.update({"Accept": "application/json", "X-Requested-By": "python-graylog-api-client",
+                                      "Accept-Encoding": ACCEPT_ENCODING if compression else "identity"})
         self._session.auth = (self._api_key, "token")  # Graylog uses the format Basic Auth: "<API-token>:token"
+        # An adapter passed in may be shared with other clients, closing this one must not close its pools
+        self._shared_http_adapter = http_adapter
+        if http_adapter is None:
+            http_adapter = make_http_adapter(http2=http2, pool_maxsize=pool_maxsize, logger=self._logger)
+        if http_adapter is not None:
+            self._session.mount("http://", http_adapter)
+            self._session.mount("https://", http_adapter)
         if not ssl_verify:
             requests.packages.urllib3.disable_warnings()
 
+    def close(self):
+        """Close all pooled connections of the underlying session, a shared http_adapter is left open."""
+        if self._shared_http_adapter is not None:
+            for prefix, adapter in list(self._session.adapters.items()):
+                if adapter is self._shared_http_adapter:
+                    del self._session.adapters[prefix]
+        self._session.close()
+
     def _do(self, method: str, endpoint: str, parameters: Dict = None, data: Dict = None) -> GraylogApiResult:
         """Run the HTTP Requests.
 
@@ -35,31 +93,262 @@ class RestAdapter:
         :raises GraylogApiException: Generic Exception for Errors caused within the Adapter.
         :return: An object containing the Result of the API request.
         """
+        cache_key, cache_entry = None, None
+        if self._cache is not None and method == "GET":
+            cache_key = self._cache.make_key(self.host, endpoint, parameters, self._credential)
+            cache_entry = self._cache.get(cache_key)
+            if cache_entry is not None and cache_entry.fresh:
+                self._logger.debug(_LOG_PRE + ", cache=hit", method, self.host + endpoint, parameters)
+                if self._instrumentation is not None:
+                    info = RequestInfo(method, endpoint)
+                    info.status_code, info.cache = cache_entry.result.status_code, "hit"
+                    self._instrumentation.on_response(info)
+                return cache_entry.result
+        if self.single_flight is not None and method == "GET":
+            flight_key = ResponseCache.make_key(self.host, endpoint, parameters)
+            request = functools.partial(self._request, method, endpoint, parameters, data, cache_key, cache_entry)
+            return self.single_flight.do(flight_key, request)
+        return self._request(method, endpoint, parameters, data, cache_key, cache_entry)
+
+    def _request(self, method: str, endpoint: str, parameters: Dict = None, data: Dict = None, cache_key: Tuple = None,
+                 cache_entry: CacheEntry = None) -> GraylogApiResult:
+        """Send the request over the session and decode the response.
+
+        :param method: The HTTP Method that this request will use.
+        :param endpoint: The API endpoint that this request goes to. Example: /streams.
+        :param parameters: Dictionary to be sent in the query string of the Request.
+        :param data: Dictionary to be sent in the body of the Request.
+        :param cache_key: Cache key of a GET request if the cache is enabled.
+        :param cache_entry: A stale cache entry that is revalidated with this request.
+        :raises GraylogApiException: Generic Exception for Errors caused within the Adapter.
+        :return: An object containing the Result of the API request.
+        """
+        info = None
+        if self._instrumentation is not None:
+            info = RequestInfo(method, endpoint)
+            info.cache = "miss" if cache_key is not None else None
+            self._instrumentation.on_request(info)
+        started = time.perf_counter()
+        try:
+            return self._receive(method, endpoint, parameters, data, cache_key, cache_entry, info)
+        except GraylogApiException as e:
+            if info is not None:
+                info.error = e
+            raise
+        finally:
+            if info is not None:
+                info.total = time.perf_counter() - started
+                self._instrumentation.on_response(info)
+
+    def _receive(self, method: str, endpoint: str, parameters: Dict, data: Dict, cache_key: Tuple,
+                 cache_entry: CacheEntry, info: RequestInfo) -> GraylogApiResult:
+        """Send the request, then decode the response while recording the phases in info."""
         url = self.host + endpoint
-        log_line_pre = f"method={method}, url={url}, parameters={parameters}"
-        log_line_post = ', '.join((log_line_pre, "success={}, status_code={}, message={}"))
+        headers = cache_entry.validators if cache_entry is not None else None
+        try:
+            # Streamed, so the body is only read below and that read is measured as transfer
+            response = self._send(method, endpoint, parameters, data, headers, stream=True, info=info)
+        finally:
+            if self._cache is not None and method != "GET":
+                self._cache.invalidate(self.host, endpoint)
+        if info is not None:
+            info.status_code = response.status_code
+            info.wait = response.elapsed.total_seconds()
+            if not info.wire_bytes_out:
+                body = getattr(response.request, "body", None)
+                info.bytes_out = info.wire_bytes_out = len(body) if body else 0
+        if cache_entry is not None and response.status_code == 304:  # Not Modified
+            self._logger.debug(_LOG_PRE + ", cache=revalidated", method, url, parameters)
+            self._cache.revalidated(cache_key)
+            response.close()
+            if info is not None:
+                info.cache = "revalidated"
+            return cache_entry.result
+        received = time.perf_counter()
         try:
-            self._logger.debug(msg=log_line_pre)
-            response = self._session.request(method=method, url=url, verify=self._ssl_verify, params=parameters, json=data)
+            content = response.content
         except requests.exceptions.RequestException as e:
             self._logger.error(msg=str(e))
             raise GraylogApiException("Invalid API Response") from e
+        finally:
+            if info is not None:
+                info.transfer = time.perf_counter() - received
+        decoding = time.perf_counter()
         try:
-            if response.content != b'':
-                data_out = response.json()
-            else:
-                data_out = None
-        except (ValueError, requests.exceptions.JSONDecodeError) as e:
-            self._logger.error(msg=log_line_post.format(False, None, e))
+            data_out = self._loads(content) if content else None
+        except DECODE_ERRORS as e:
+            self._logger.error(_LOG_POST, method, url, parameters, False, None, e)
             raise GraylogApiException("Bad JSON in response") from e
+        finally:
+            if info is not None:
+                info.bytes_in = len(content)
+                info.wire_bytes_in = wire_bytes(response.raw, len(content))
+                info.decode = time.perf_counter() - decoding
         is_success = 299 >= response.status_code >= 200  # OK
-        log_line = log_line_post.format(is_success, response.status_code, response.reason)
         if is_success:
-            self._logger.debug(msg=log_line)
-            return GraylogApiResult(status_code=response.status_code, message=response.reason, data=data_out)
-        self._logger.error(msg=log_line)
+            self._logger.debug(_LOG_POST, method, url, parameters, is_success, response.status_code, response.reason)
+            result = GraylogApiResult(status_code=response.status_code, message=response.reason, data=data_out)
+            if cache_key is not None:
+                self._cache.set(cache_key, result, etag=response.headers.get("ETag"),
+                                last_modified=response.headers.get("Last-Modified"))
+            return result
+        self._logger.error(_LOG_POST, method, url, parameters, is_success, response.status_code, response.reason)
         raise GraylogApiException(f"{response.status_code}: {response.reason}")
 
+    def _send(self, method: str, endpoint: str, parameters: Dict = None, data: Dict = None,
+              headers: Dict = None, stream: bool = False, info: RequestInfo = None) -> requests.Response:
+        """Send the request over the session, applying rate limiter, circuit breaker and retry policy.
+
+        :param method: The HTTP Method that this request will use.
+        :param endpoint: The API endpoint that this request goes to. Example: /streams.
+        :param parameters: Dictionary to be sent in the query string of the Request.
+        :param data: Dictionary to be sent in the body of the Request, gzipped if it reaches compress_requests bytes.
+        :param headers: Additional headers for this request.
+        :param stream: Only read the body when it is accessed instead of downloading it right away.
+        :param info: Measurements of this request, the number of retries and compressed body sizes are recorded in it.
+        :raises GraylogApiException: If the request failed and may not be retried (anymore).
+        :raises GraylogCircuitOpenException: If the circuit breaker rejected the request.
+        :return: The last response received, which is not necessarily a successful one.
+        """
+        url = self.host + endpoint
+        body = None
+        if data is not None and self._compress_requests is not None:
+            encoded = self._dumps(data)
+            if len(encoded) >= self._compress_requests:
+                body = compress(encoded)
+                headers = dict(headers or {}, **{"Content-Type": "application/json",
+                                                 "Content-Encoding": REQUEST_ENCODING})
+                data = None
+                if info is not None:
+                    info.bytes_out, info.wire_bytes_out = len(encoded), len(body)
+        attempt = 0
+        while True:
+            if self._circuit_breaker is not None and not self._circuit_breaker.allow():
+                self._logger.error("method=%s, url=%s, circuit=%s", method, url, self._circuit_breaker.state)
+                raise GraylogCircuitOpenException("Circuit breaker is open, request was not sent")
+            if self._rate_limiter is not None:
+                self._rate_limiter.acquire(endpoint)
+            try:
+                self._logger.debug(_LOG_PRE, method, url, parameters)
+                response = self._session.request(method=method, url=url, verify=self._ssl_verify, params=parameters,
+                                                 json=data, data=body, headers=headers, stream=stream)
+            except requests.exceptions.RequestException as e:
+                self._record_health(status_code=None)
+                if self._retry is None or not self._retry.can_retry(method, attempt):
+                    self._logger.error(msg=str(e))
+                    raise GraylogApiException("Invalid API Response") from e
+                delay = self._retry.delay(attempt)
+            else:
+                self._record_health(status_code=response.status_code)
+                if self._retry is None or not self._retry.can_retry(method, attempt, response.status_code):
+                    return response
+                delay = self._retry.delay(attempt, response.headers.get("Retry-After"))
+                if delay is None:
+                    return response
+                response.close()
+            self._logger.warning("method=%s, url=%s, retry=%d, delay=%.2f", method, url, attempt + 1, delay)
+            time.sleep(delay)
+            attempt += 1
+            if info is not None:
+                info.retries = attempt
+
+    def _record_health(self, status_code: int = None):
+        """Report the outcome of a request to the circuit breaker, None stands for a connection error."""
+        if self._circuit_breaker is None:
+            return
+        if status_code is not None and status_code < 500 and status_code != 429:
+            self._circuit_breaker.record_success()
+        else:
+            self._circuit_breaker.record_failure()
+
+    def iter_items(self, endpoint: str, parameters: Dict = None, key: str = None,
+                   chunk_size: int = 64 * 1024) -> Iterator[Any]:
+        """Stream a GET response and decode the items of its JSON array one at a time.
+
+        The body is never held in memory as a whole, which keeps peak memory low for huge responses.
+        The response cache and request coalescing are bypassed.
+
+        :param endpoint: The API endpoint that this request goes to. Example: /streams.
+        :param parameters: Dictionary to be sent in the query string of the Request.
+        :param key: Member of the top-level object that holds the array. Example: streams. None if the body is an array.
+        :param chunk_size: Number of bytes read from the connection at once.
+        :raises GraylogApiException: Generic Exception for Errors caused within the Adapter.
+        :return: An iterator over the decoded items.
+        """
+        return self._iter_body("GET", endpoint, parameters, functools.partial(iter_json_items, key=key),
+                               chunk_size=chunk_size)
+
+    def iter_lines(self, method: str, endpoint: str, parameters: Dict = None, data: Dict = None,
+                   accept: str = "application/x-ndjson", chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """Stream a response and yield the lines of its body, for example NDJSON or CSV exports.
+
+        Lines are split on b"\\n" and keep their line ending, at most one line and one chunk are held in memory.
+        The response cache and request coalescing are bypassed.
+
+        :param method: The HTTP Method that this request will use.
+        :param endpoint: The API endpoint that this request goes to. Example: views/search/messages.
+        :param parameters: Dictionary to be sent in the query string of the Request.
+        :param data: Dictionary to be sent in the body of the Request.
+        :param accept: Media type requested from the server. Example: text/csv
+        :param chunk_size: Number of bytes read from the connection at once.
+        :raises GraylogApiException: Generic Exception for Errors caused within the Adapter.
+        :return: An iterator over the lines as bytes.
+        """
+        return self._iter_body(method, endpoint, parameters, iter_lines, data=data, headers={"Accept": accept},
+                               chunk_size=chunk_size)
+
+    def _iter_body(self, method: str, endpoint: str, parameters: Dict, decode: Callable[[Iterator[bytes]], Iterator[Any]],
+                   data: Dict = None, headers: Dict = None, chunk_size: int = 64 * 1024) -> Iterator[Any]:
+        """Stream a response and decode its body incrementally with decode, which gets the body as chunks."""
+        url = self.host + endpoint
+        info = None
+        if self._instrumentation is not None:
+            info = RequestInfo(method, endpoint)
+            self._instrumentation.on_request(info)
+        started = time.perf_counter()
+        try:
+            response = self._send(method, endpoint, parameters, data, headers, stream=True, info=info)
+            if self._cache is not None and method != "GET":
+                self._cache.invalidate(self.host, endpoint)
+            with response:
+                if info is not None:
+                    info.status_code = response.status_code
+                    info.wait = response.elapsed.total_seconds()
+                if not 299 >= response.status_code >= 200:
+                    self._logger.error(_LOG_POST, method, url, parameters, False, response.status_code, response.reason)
+                    raise GraylogApiException(f"{response.status_code}: {response.reason}")
+                chunks = response.iter_content(chunk_size=chunk_size)
+                if info is not None:
+                    chunks = self._count_bytes(chunks, info)
+                receiving = time.perf_counter()
+                try:
+                    yield from decode(chunks)
+                except ValueError as e:
+                    self._logger.error(_LOG_POST, method, url, parameters, False, None, e)
+                    raise GraylogApiException("Bad JSON in response") from e
+                except requests.exceptions.RequestException as e:
+                    self._logger.error(msg=str(e))
+                    raise GraylogApiException("Invalid API Response") from e
+                finally:
+                    if info is not None:
+                        # Reading and decoding are interleaved, both are recorded as transfer
+                        info.transfer = time.perf_counter() - receiving
+                        info.wire_bytes_in = wire_bytes(response.raw, info.bytes_in)
+        except GraylogApiException as e:
+            if info is not None:
+                info.error = e
+            raise
+        finally:
+            if info is not None:
+                info.total = time.perf_counter() - started
+                self._instrumentation.on_response(info)
+
+    @staticmethod
+    def _count_bytes(chunks: Iterator[bytes], info: RequestInfo) -> Iterator[bytes]:
+        for chunk in chunks:
+            info.bytes_in += len(chunk)
+            yield chunk
+
     def get(self, endpoint: str, parameters: Dict = None) -> GraylogApiResult:
         """Send a GET request to the API.
 
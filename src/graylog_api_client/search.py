@@ -0,0 +1,195 @@
+import codecs
+import collections
+import csv
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple, Union
+
+from .exceptions import GraylogApiException
+from .json_codec import DECODE_ERRORS, get_loads
+
+_loads = get_loads()
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+Timestamp = Union[datetime, str]
+
+
+def parse_timestamp(value: Timestamp) -> datetime:
+    """A timezone aware datetime from a datetime or an ISO 8601 string, naive values are taken as UTC."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def format_timestamp(value: Timestamp) -> str:
+    """Format a timestamp like Graylog does. Example: 2024-01-31T23:59:59.999Z"""
+    value = parse_timestamp(value).astimezone(timezone.utc)
+    return value.strftime("%Y-%m-%dT%H:%M:%S.") + f"{value.microsecond // 1000:03d}Z"
+
+
+def split_time_range(from_: Timestamp, to: Timestamp, slices: int) -> List[Tuple[datetime, datetime]]:
+    """Split an absolute time range into consecutive sub-ranges of about the same length.
+
+    Graylog includes both ends of a range, so each sub-range ends one millisecond before the next one starts and
+    no message is returned twice.
+
+    :param from_: Start of the time range.
+    :param to: End of the time range.
+    :param slices: Maximum number of sub-ranges, ranges shorter than slices milliseconds are split into fewer.
+    :raises ValueError: If slices is less than 1 or the range ends before it starts.
+    :return: The sub-ranges in chronological order.
+    """
+    if slices < 1:
+        raise ValueError(f"slices must be at least 1 but was: {slices}")
+    start, end = parse_timestamp(from_), parse_timestamp(to)
+    if end < start:
+        raise ValueError(f"Time range ends before it starts: {format_timestamp(start)} - {format_timestamp(end)}")
+    millisecond = timedelta(milliseconds=1)
+    total = (end - start) // millisecond + 1
+    step = -(-total // slices) * millisecond
+    ranges = []
+    while start <= end:
+        ranges.append((start, min(start + step - millisecond, end)))
+        start += step
+    return ranges
+
+
+def messages_request(query: str, from_: Timestamp, to: Timestamp, streams: List[str] = None,
+                     fields: List[str] = None, limit: int = None) -> Dict:
+    """Body of a views/search/messages export request for an absolute time range, oldest message first.
+
+    The sort is explicit because the server sorts exports newest first by default, which would turn the
+    sub-ranges of a parallel export into descending blocks.
+    """
+    request = {
+        "query_string": {"type": "elasticsearch", "query_string": query},
+        "timerange": {"type": "absolute", "from": format_timestamp(from_), "to": format_timestamp(to)},
+        "sort": [{"field": "timestamp", "order": "ASC"}],
+    }
+    if streams:
+        request["streams"] = list(streams)
+    if fields:
+        request["fields_in_order"] = list(fields)
+    if limit is not None:
+        request["limit"] = limit
+    return request
+
+
+def iter_ndjson(lines: Iterable[bytes]) -> Iterator[Dict]:
+    for line in lines:
+        if line.strip():
+            yield _loads(line)
+
+
+def iter_csv(lines: Iterable[bytes]) -> Iterator[Dict[str, str]]:
+    """Decode CSV lines into one dictionary per row, keyed by the header row.
+
+    Quoted values spanning several lines are supported, as the reader pulls further lines as needed.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    return csv.DictReader(decoder.decode(line) for line in lines)
+
+
+DECODERS: Dict[str, Callable[[Iterable[bytes]], Iterator[Dict]]] = {"ndjson": iter_ndjson, "csv": iter_csv}
+
+
+def decode_messages(lines: Iterable[bytes], export_format: str) -> Iterator[Dict]:
+    """Decode the lines of an export body into messages.
+
+    :param lines: The lines of the body.
+    :param export_format: One of ndjson or csv.
+    :raises GraylogApiException: If a line could not be decoded.
+    :return: An iterator over the messages.
+    """
+    try:
+        yield from DECODERS[export_format](lines)
+    except DECODE_ERRORS + (csv.Error, UnicodeDecodeError) as e:
+        raise GraylogApiException(f"Bad {export_format.upper()} in response") from e
+
+
+def poll_intervals(initial: float = 0.1, maximum: float = 2.0) -> Iterator[float]:
+    """Seconds to wait between status polls, doubling from initial up to maximum."""
+    interval = initial
+    while True:
+        yield interval
+        interval = min(interval * 2, maximum)
+
+
+class _Done:
+    __slots__ = ("error",)
+
+    def __init__(self, error: Exception = None):
+        self.error = error
+
+
+def ordered_prefetch(producers: List[Callable[[], Iterator]], max_workers: int = 4,
+                     buffer: int = 10000) -> Iterator:
+    """Run producers concurrently and yield their items one producer after another, in the order given.
+
+    Producer i is only started once the consumer reached producer i - max_workers + 1, so at most max_workers
+    producers have items waiting. Each of them fills a queue of at most buffer items and blocks while it is full,
+    so memory stays bounded by max_workers * buffer items however many producers there are and however large
+    their results are. The consumer always drains the earliest producer, which is always running, so the
+    pipeline cannot stall. An exception of a producer is raised when its items are reached.
+
+    :param producers: Functions without arguments that return an iterator over their items.
+    :param max_workers: Maximum number of producers running at the same time.
+    :param buffer: Maximum number of items held per producer.
+    :return: An iterator over the items of all producers.
+    """
+    if max_workers < 1:
+        raise ValueError(f"max_workers must be at least 1 but was: {max_workers}")
+    stop = threading.Event()
+
+    def put(target: queue.Queue, item) -> bool:
+        while not stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def run(producer: Callable[[], Iterator], target: queue.Queue):
+        items = None
+        try:
+            items = producer()
+            for item in items:
+                if not put(target, item):
+                    return
+            put(target, _Done())
+        except Exception as e:
+            put(target, _Done(e))
+        finally:
+            close = getattr(items, "close", None)
+            if close is not None:
+                close()
+
+    def start(producer: Callable[[], Iterator]) -> queue.Queue:
+        target = queue.Queue(maxsize=max(1, buffer))
+        executor.submit(run, producer, target)
+        return target
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="graylog-api-export")
+    try:
+        started = collections.deque(start(producer) for producer in producers[:max_workers])
+        for index in range(len(producers)):
+            source = started.popleft()
+            while True:
+                item = source.get()
+                if isinstance(item, _Done):
+                    if item.error is not None:
+                        raise item.error
+                    break
+                yield item
+            # The producer of source is done, so its worker takes the next producer
+            if index + max_workers < len(producers):
+                started.append(start(producers[index + max_workers]))
+    finally:
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
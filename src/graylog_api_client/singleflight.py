@@ -0,0 +1,59 @@
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        """Coalesce identical concurrent calls into one
+
+        While a call for a key is running, further callers with the same key wait for it and receive the same
+        result (or exception) instead of starting their own call.
+        """
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executed = 0
+        self.merged = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Run fn unless a call with the same key is already in flight, then wait for that one instead.
+
+        :param key: Identifies identical calls. Example: (host, endpoint, parameters)
+        :param fn: The call to run without arguments.
+        :return: The result of the call that was run for key.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                self.merged += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {"executed": self.executed, "merged": self.merged, "in_flight": len(self._calls)}
@@ -0,0 +1,196 @@
+import asyncio
+import inspect
+import logging
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .data_structures import GraylogApiResult
+
+THROUGHPUT_METRICS = ("org.graylog2.throughput.input.1-sec-rate", "org.graylog2.throughput.output.1-sec-rate")
+
+Collector = Callable[[Any, str], Awaitable[GraylogApiResult]]
+
+COLLECTORS: Dict[str, Collector] = {
+    "jvm": lambda api, node_id: api.get_jvminfo(node_id),
+    "buffers": lambda api, node_id: api.get_buffers(node_id),
+    "throughput": lambda api, node_id: api.get_node_metrics(node_id, THROUGHPUT_METRICS),
+    "journal": lambda api, node_id: api.get_journal(node_id),
+}
+
+
+class NodeSample:
+    __slots__ = ("node_id", "timestamp", "duration", "data", "errors")
+
+    def __init__(self, node_id: str, timestamp: float):
+        """Telemetry of one node collected in one poll
+
+        :param node_id: The ID of the node
+        :param timestamp: Unix time the poll of this node started
+        """
+        self.node_id = node_id
+        self.timestamp = timestamp
+        self.duration = 0.0
+        self.data: Dict[str, Any] = {}
+        self.errors: Dict[str, Exception] = {}
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def __repr__(self):
+        return f"NodeSample({self.node_id!r}, metrics={sorted(self.data)}, errors={sorted(self.errors)})"
+
+
+class ClusterPoller:
+    def __init__(self, api, interval: float = 10, timeout: float = None, jitter: float = 1.0, history: int = 1000,
+                 collectors: Dict[str, Collector] = None, callback: Callable[[NodeSample], Any] = None,
+                 logger: logging.Logger = None):
+        """Poll the telemetry of every cluster node on a fixed schedule
+
+        Every interval the nodes are discovered from get_cluster and all collectors of all nodes run concurrently
+        over the connection pool of the AsyncGraylogAPI, so its max_connections bounds the requests in flight.
+        Each node starts after a random delay of up to jitter seconds to spread the load, and whatever did not
+        finish within timeout is recorded as a TimeoutError. Ticks stay aligned to the schedule, a poll that
+        overruns its interval skips the ticks it missed.
+
+        :param api: The AsyncGraylogAPI used for the requests
+        :param interval: Seconds between two polls, defaults to 10
+        :param timeout: Seconds a node may take including its jitter, defaults to 80% of the interval
+        :param jitter: Maximum random delay in seconds before a node is polled, defaults to 1.0
+        :param history: Number of samples kept in the ring buffer, the oldest are dropped first, defaults to 1000
+        :param collectors: Requests per node by metric name, defaults to COLLECTORS (jvm, buffers, throughput, journal).
+            Example: dict(COLLECTORS, processbufferdump=lambda api, node_id: api.get_processbufferdump(node_id))
+        :param callback: Called with every sample, may be a coroutine function, defaults to None
+        :param logger: The logger for failed polls, defaults to None
+        """
+        if interval <= 0:
+            raise ValueError(f"interval must be greater than 0 but was: {interval}")
+        self._api = api
+        self.interval = interval
+        self.timeout = timeout if timeout is not None else interval * 0.8
+        self.jitter = max(0.0, min(jitter, self.timeout))
+        self.collectors = dict(collectors if collectors is not None else COLLECTORS)
+        self.callback = callback
+        self._logger = logger or logging.getLogger(__name__)
+        self._samples: "deque[NodeSample]" = deque(maxlen=history)
+        self._latest: Dict[str, NodeSample] = {}
+        self._queues: List[asyncio.Queue] = []
+        self._nodes: List[str] = []
+        self._task: Optional[asyncio.Task] = None
+        self.polls = 0
+        self.skipped_ticks = 0
+
+    @property
+    def nodes(self) -> List[str]:
+        """The node IDs found by the last successful discovery."""
+        return list(self._nodes)
+
+    def samples(self, node_id: str = None) -> List[NodeSample]:
+        """The samples in the ring buffer, oldest first, optionally of a single node."""
+        return [sample for sample in self._samples if node_id is None or sample.node_id == node_id]
+
+    def latest(self, node_id: str) -> Optional[NodeSample]:
+        return self._latest.get(node_id)
+
+    def subscribe(self, maxsize: int = 1000) -> asyncio.Queue:
+        """A queue that receives every new sample. If the consumer falls behind, the oldest samples are dropped."""
+        subscription = asyncio.Queue(maxsize=maxsize)
+        self._queues.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: asyncio.Queue):
+        self._queues.remove(subscription)
+
+    async def discover(self) -> List[str]:
+        """Refresh the node IDs from get_cluster, keeping the previous ones if the request fails."""
+        try:
+            cluster = (await self._api.get_cluster()).data or {}
+        except Exception as e:
+            self._logger.warning("cluster discovery failed, using %d known nodes: %s", len(self._nodes), e)
+        else:
+            self._nodes = sorted(cluster)
+        return self.nodes
+
+    async def poll_once(self) -> List[NodeSample]:
+        """Discover the nodes and collect the telemetry of all of them concurrently.
+
+        :return: One sample per node.
+        """
+        nodes = await self.discover()
+        samples = await asyncio.gather(*(self._poll_node(node_id) for node_id in nodes))
+        self.polls += 1
+        for sample in samples:
+            await self._publish(sample)
+        return list(samples)
+
+    async def _poll_node(self, node_id: str) -> NodeSample:
+        sample = NodeSample(node_id, time.time())
+        started = time.perf_counter()
+        if self.jitter:
+            await asyncio.sleep(random.uniform(0, self.jitter))
+        remaining = max(0.0, self.timeout - (time.perf_counter() - started))
+        tasks = {asyncio.ensure_future(collect(self._api, node_id)): name for name, collect in self.collectors.items()}
+        if tasks:
+            await asyncio.wait(tasks, timeout=remaining)
+        for task, name in tasks.items():
+            if not task.done():
+                task.cancel()
+                sample.errors[name] = TimeoutError(f"{name} of node {node_id} took longer than {self.timeout}s")
+            elif task.exception() is not None:
+                sample.errors[name] = task.exception()
+            else:
+                sample.data[name] = task.result().data
+        sample.duration = time.perf_counter() - started
+        return sample
+
+    async def _publish(self, sample: NodeSample):
+        self._samples.append(sample)
+        self._latest[sample.node_id] = sample
+        for subscription in self._queues:
+            if subscription.full():
+                subscription.get_nowait()
+            subscription.put_nowait(sample)
+        if self.callback is not None:
+            try:
+                result = self.callback(sample)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                self._logger.error("telemetry callback failed for node %s: %s", sample.node_id, e)
+
+    async def run(self, iterations: int = None):
+        """Poll on the fixed schedule until cancelled or iterations polls were made.
+
+        :param iterations: Number of polls, defaults to None (until cancelled)
+        """
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while iterations is None or self.polls < iterations:
+            await self.poll_once()
+            next_tick += self.interval
+            now = loop.time()
+            if now > next_tick:
+                missed = int((now - next_tick) // self.interval) + 1
+                self.skipped_ticks += missed
+                next_tick += missed * self.interval
+                self._logger.warning("telemetry poll overran its interval, skipped %d ticks", missed)
+            if iterations is not None and self.polls >= iterations:
+                return
+            await asyncio.sleep(next_tick - now)
+
+    def start(self) -> asyncio.Task:
+        """Run the poller as a background task of the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self.run())
+        return self._task
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
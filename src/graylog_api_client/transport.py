@@ -0,0 +1,162 @@
+import datetime
+import importlib.util
+import logging
+import os
+import ssl
+import threading
+import time
+from typing import Dict, Iterator, Optional, Tuple, Union
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+# httpx is only imported once an HTTP2Adapter is created, it would double the import time of the package
+HTTP2_AVAILABLE = all(importlib.util.find_spec(name) is not None for name in ("httpx", "h2"))
+
+# Connection specific headers are not allowed in HTTP/2, the connection is managed by the transport
+_HOP_BY_HOP = frozenset(("connection", "keep-alive", "proxy-connection", "transfer-encoding", "upgrade"))
+
+
+class _StreamedBody:
+    def __init__(self, response: "httpx.Response"):
+        """File-like view of a httpx response body, as requests expects it in Response.raw"""
+        self._response = response
+
+    def stream(self, amt: int = 64 * 1024, decode_content: bool = True) -> Iterator[bytes]:
+        import httpx
+        try:
+            yield from self._response.iter_bytes(chunk_size=amt)
+        except httpx.TransportError as e:
+            raise requests.exceptions.ChunkedEncodingError(e) from e
+        except httpx.DecodingError as e:
+            raise requests.exceptions.ContentDecodingError(e) from e
+
+    def read(self, amt: int = None, decode_content: bool = True) -> bytes:
+        return b"".join(self.stream(amt or 64 * 1024))
+
+    def tell(self) -> int:
+        """Bytes received so far, before the Content-Encoding was decoded."""
+        return self._response.num_bytes_downloaded
+
+    def close(self):
+        self._response.close()
+
+    def release_conn(self):
+        self._response.close()
+
+
+class HTTP2Adapter(BaseAdapter):
+    def __init__(self, pool_maxsize: int = 10, http1: bool = True, transport: "httpx.BaseTransport" = None):
+        """Transport adapter for requests that sends requests over HTTP/2 with httpx
+
+        Concurrent requests to a host are multiplexed as streams over a single TLS connection instead of one
+        connection per request, so fan-outs of many small requests need one handshake. The protocol is negotiated
+        with ALPN, servers and load balancers without HTTP/2 and plain http:// hosts are spoken to with HTTP/1.1.
+        Authentication, headers, TLS verification and proxies are taken from the requests session as usual, so
+        session proxies and HTTP(S)_PROXY / NO_PROXY apply like they do with HTTPAdapter. https:// requests are
+        tunnelled through the proxy with CONNECT and still negotiate HTTP/2 with the server.
+        Requires the http2 extra: pip install graylog-api-client[http2]
+
+        :param pool_maxsize: Maximum number of connections per host, HTTP/2 usually needs a single one, defaults to 10
+        :param http1: Allow falling back to HTTP/1.1 if the server does not offer HTTP/2, defaults to True
+        :param transport: The httpx transport to send the requests with, defaults to None (httpx connection pool)
+        :raises ImportError: If httpx or h2 is not installed.
+        """
+        if not HTTP2_AVAILABLE:
+            raise ImportError("HTTP/2 requires httpx and h2: pip install graylog-api-client[http2]")
+        super().__init__()
+        import httpx
+        self._httpx = httpx
+        self.pool_maxsize = pool_maxsize
+        self.http1 = http1
+        self._transport = transport
+        self._clients: Dict[Tuple, "httpx.Client"] = {}
+        self._lock = threading.Lock()
+
+    def _client(self, verify: Union[str, bool], cert: Optional[Union[str, Tuple[str, str]]],
+                proxy: str = None) -> "httpx.Client":
+        """One client per TLS configuration and proxy, as httpx fixes them per connection pool."""
+        key = (verify, cert, proxy)
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+        httpx = self._httpx
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                if isinstance(verify, str):
+                    verify = (ssl.create_default_context(capath=verify) if os.path.isdir(verify)
+                              else ssl.create_default_context(cafile=verify))
+                limits = httpx.Limits(max_connections=self.pool_maxsize, max_keepalive_connections=self.pool_maxsize)
+                # The environment was already applied by requests, including NO_PROXY, when it chose the proxy
+                client = httpx.Client(http1=self.http1, http2=True, verify=verify, cert=cert, limits=limits,
+                                      proxy=proxy, transport=self._transport, trust_env=False, follow_redirects=False)
+                self._clients[key] = client
+        return client
+
+    def _timeout(self, timeout) -> "httpx.Timeout":
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            return self._httpx.Timeout(read, connect=connect)
+        return self._httpx.Timeout(timeout)
+
+    def send(self, request: requests.PreparedRequest, stream: bool = False, timeout=None, verify=True, cert=None,
+             proxies=None) -> requests.Response:
+        httpx = self._httpx
+        client = self._client(verify, cert, requests.utils.select_proxy(request.url, proxies) if proxies else None)
+        # httpx advertises the response encodings it is able to decode itself, unless compression is turned off
+        headers = [(key, value) for key, value in request.headers.items() if key.lower() not in _HOP_BY_HOP
+                   and (key.lower() != "accept-encoding" or value == "identity")]
+        body = request.body.encode() if isinstance(request.body, str) else request.body
+        started = time.perf_counter()
+        try:
+            httpx_request = client.build_request(request.method, request.url, headers=headers, content=body,
+                                                 timeout=self._timeout(timeout))
+            httpx_response = client.send(httpx_request, stream=True)
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(e, request=request) from e
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(e, request=request) from e
+        response = self.build_response(request, httpx_response)
+        response.elapsed = datetime.timedelta(seconds=time.perf_counter() - started)
+        if not stream:
+            response.content  # noqa: B018, reads and releases the stream like requests does
+        return response
+
+    @staticmethod
+    def build_response(request: requests.PreparedRequest, httpx_response: "httpx.Response") -> requests.Response:
+        response = requests.Response()
+        response.status_code = httpx_response.status_code
+        response.reason = httpx_response.reason_phrase
+        response.headers = CaseInsensitiveDict(httpx_response.headers.multi_items())
+        # The body is already decompressed by httpx
+        response.headers.pop("Content-Encoding", None)
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.raw = _StreamedBody(httpx_response)
+        response.url = request.url
+        response.request = request
+        response.http_version = httpx_response.http_version
+        return response
+
+    def close(self):
+        with self._lock:
+            for client in self._clients.values():
+                client.close()
+            self._clients.clear()
+
+
+def make_http_adapter(http2: bool = False, pool_maxsize: int = None, logger: logging.Logger = None) -> Optional[BaseAdapter]:
+    """The transport adapter for the given options, None for the requests default.
+
+    :param http2: Use HTTP/2 if httpx and h2 are installed, otherwise HTTP/1.1 is used with a warning.
+    :param pool_maxsize: Number of keep-alive connections kept open to the host, callers block while all are busy.
+    :param logger: The logger for the fallback warning.
+    """
+    if http2:
+        if HTTP2_AVAILABLE:
+            return HTTP2Adapter(pool_maxsize=pool_maxsize or 10)
+        (logger or logging.getLogger(__name__)).warning("httpx and h2 are not installed, falling back to HTTP/1.1")
+    if pool_maxsize:
+        return HTTPAdapter(pool_maxsize=pool_maxsize, pool_block=True)
+    return None
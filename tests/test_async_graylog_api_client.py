@@ -0,0 +1,186 @@
+import asyncio
+import time
+from unittest import TestCase, mock
+
+from src.graylog_api_client.async_graylog_api_client import AsyncGraylogAPI
+from src.graylog_api_client.bulk import UserOperation
+from src.graylog_api_client.data_structures import GraylogApiResult
+from src.graylog_api_client.exceptions import GraylogApiException
+
+
+class TestAsyncGraylogApiClient(TestCase):
+    def setUp(self):
+        self.graylog_api = AsyncGraylogAPI("", "")
+        self.graylog_api._rest_adapter.get = mock.AsyncMock(return_value=GraylogApiResult(200))
+        self.graylog_api._rest_adapter.put = mock.AsyncMock(return_value=GraylogApiResult(200))
+
+    def tearDown(self):
+        self.graylog_api.close()
+
+    def test_get_user_by_id(self):
+        dummy_id = "foo"
+        user = asyncio.run(self.graylog_api.get_user_by_id(dummy_id))
+        self.assertIsInstance(user, GraylogApiResult)
+        self.graylog_api._rest_adapter.get.assert_awaited_once_with(f"users/id/{dummy_id}")
+
+    def test_fan_out_with_gather(self):
+        user_ids = [str(i) for i in range(5)]
+
+        async def fan_out():
+            return await asyncio.gather(*(self.graylog_api.get_user_tokens_by_id(user_id) for user_id in user_ids))
+
+        results = asyncio.run(fan_out())
+        self.assertEqual(len(results), 5)
+        self.assertEqual(self.graylog_api._rest_adapter.get.await_count, 5)
+
+    def test_change_user_status_invalid(self):
+        with self.assertRaises(ValueError):
+            self.graylog_api.change_user_status("foo", "invalid_status")
+
+    def test_iter_users_is_async_iterator(self):
+        async def fetch(endpoint, parameters=None):
+            start = (parameters["page"] - 1) * parameters["per_page"]
+            return GraylogApiResult(200, data={"users": [{"id": str(i)} for i in range(start, min(start + parameters["per_page"], 5))]})
+
+        self.graylog_api._rest_adapter.get = mock.AsyncMock(side_effect=fetch)
+
+        async def collect():
+            return [user async for user in self.graylog_api.iter_users(per_page=2, max_items=4)]
+
+        users = asyncio.run(collect())
+        self.assertEqual([user["id"] for user in users], ["0", "1", "2", "3"])
+        self.assertEqual(self.graylog_api._rest_adapter.get.await_count, 2)
+
+    def test_fetch_many_reports_failures_without_aborting(self):
+        async def get(endpoint, parameters=None):
+            if "bad" in endpoint:
+                raise GraylogApiException("404: Not Found")
+            return GraylogApiResult(200)
+
+        self.graylog_api._rest_adapter.get = mock.AsyncMock(side_effect=get)
+
+        async def collect():
+            return [result async for result in self.graylog_api.fetch_many("get_auth_role_by_id", ["a", "bad", "c"])]
+
+        results = asyncio.run(collect())
+        self.assertEqual([result.key for result in results], ["a", "bad", "c"])
+        self.assertEqual([result.ok for result in results], [True, False, True])
+
+    def test_fetch_many_reads_ids_in_a_bounded_window(self):
+        read, running, peak = [0], [0], [0]
+
+        def ids():
+            for index in range(100):
+                read[0] += 1
+                yield str(index)
+
+        async def get(endpoint, parameters=None):
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+            await asyncio.sleep(0.001)
+            running[0] -= 1
+            return GraylogApiResult(200)
+
+        self.graylog_api._rest_adapter.get = mock.AsyncMock(side_effect=get)
+
+        async def collect(ordered):
+            read[0] = peak[0] = 0
+            results = self.graylog_api.fetch_many("get_auth_role_by_id", ids(), max_workers=2, ordered=ordered)
+            first = await results.__anext__()
+            window = read[0]
+            rest = [result async for result in results]
+            return [first] + rest, window
+
+        for ordered in (True, False):
+            with self.subTest(ordered=ordered):
+                results, window = asyncio.run(collect(ordered))
+                keys = [result.key for result in results]
+                self.assertEqual(keys if ordered else sorted(keys, key=int), [str(index) for index in range(100)])
+                self.assertLessEqual(window, 4 * 2 + 1)
+                self.assertEqual(peak[0], 2)
+
+    def test_fetch_many_invalid_max_workers_raises_ValueError(self):
+        with self.assertRaises(ValueError):
+            self.graylog_api.fetch_many("get_auth_role_by_id", ["a"], max_workers=0)
+
+    def test_search_polls_until_done(self):
+        self.graylog_api._rest_adapter.post = mock.AsyncMock(side_effect=[
+            GraylogApiResult(200, data={"id": "search"}),
+            GraylogApiResult(201, data={"id": "job", "executing_node": "node", "execution": {"done": False}}),
+        ])
+        self.graylog_api._rest_adapter.get = mock.AsyncMock(
+            return_value=GraylogApiResult(200, data={"id": "job", "execution": {"done": True}, "results": {}}))
+        with mock.patch("asyncio.sleep", new=mock.AsyncMock()) as sleep:
+            status = asyncio.run(self.graylog_api.search({"queries": []}))
+        self.assertIn("results", status.data)
+        self.graylog_api._rest_adapter.get.assert_awaited_once_with("views/searchjobs/node/job/status")
+        sleep.assert_awaited_once_with(0.1)
+
+    def test_export_messages_parallel_merges_in_time_order(self):
+        def iter_lines(method, endpoint, parameters=None, data=None, accept=None, chunk_size=None):
+            return iter([f'{{"from": "{data["timerange"]["from"]}"}}\n'.encode()])
+
+        self.graylog_api._rest_adapter._rest_adapter.iter_lines = mock.Mock(side_effect=iter_lines)
+
+        async def collect():
+            messages = self.graylog_api.export_messages_parallel("*", "2024-01-01T00:00:00Z",
+                                                                 "2024-01-01T00:00:03.999Z", slices=4, max_workers=2)
+            return [message async for message in messages]
+
+        messages = asyncio.run(collect())
+        self.assertEqual([message["from"] for message in messages], [f"2024-01-01T00:00:0{i}.000Z" for i in range(4)])
+
+    def test_export_messages_parallel_starts_slices_as_the_consumer_reaches_them(self):
+        iter_lines = mock.Mock(side_effect=lambda *args, **kwargs: iter([b'{"message": "a"}\n']))
+        self.graylog_api._rest_adapter._rest_adapter.iter_lines = iter_lines
+
+        async def collect():
+            started = []
+            messages = self.graylog_api.export_messages_parallel("*", "2024-01-01T00:00:00Z",
+                                                                 "2024-01-01T00:00:11.999Z", slices=12, max_workers=2)
+            async for _ in messages:
+                await asyncio.sleep(0.02)
+                started.append(iter_lines.call_count)
+            return started
+
+        started = asyncio.run(collect())
+        self.assertEqual(len(started), 12)
+        for consumed, count in enumerate(started):
+            self.assertLessEqual(count, consumed + 2)
+
+    def test_export_invalid_format_raises_ValueError(self):
+        with self.assertRaises(ValueError):
+            self.graylog_api.export_messages("*", "2024-01-01", "2024-01-02", export_format="xlsx")
+
+    def test_bulk_users(self):
+        async def get(endpoint, parameters=None):
+            users = [{"id": "1", "username": "foo", "account_status": "enabled"},
+                     {"id": "2", "username": "bar", "account_status": "disabled"}]
+            return GraylogApiResult(200, data={"users": users if parameters["page"] == 1 else []})
+
+        self.graylog_api._rest_adapter.get = mock.AsyncMock(side_effect=get)
+        operations = [UserOperation.disable("foo"), UserOperation.disable("bar"), UserOperation.delete("unknown")]
+        report = asyncio.run(self.graylog_api.bulk_users(operations, max_workers=2))
+        self.assertEqual([item.status for item in report.items], ["disabled", "skipped", "skipped"])
+        self.graylog_api._rest_adapter.put.assert_awaited_once_with("users/1/status/disabled")
+
+    def test_async_with_closes_off_the_event_loop(self):
+        close = mock.Mock(side_effect=lambda: time.sleep(0.2))
+        ticks = []
+
+        async def tick():
+            while True:
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.01)
+
+        async def run():
+            ticker = asyncio.ensure_future(tick())
+            with mock.patch.object(self.graylog_api, "close", close):
+                async with self.graylog_api:
+                    pass
+            ticker.cancel()
+
+        asyncio.run(run())
+        close.assert_called_once_with()
+        # The loop kept running while close waited
+        self.assertGreater(len(ticks), 5)
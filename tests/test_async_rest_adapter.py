@@ -0,0 +1,98 @@
+import asyncio
+import threading
+import time
+from unittest import TestCase, mock
+
+import requests
+
+from src.graylog_api_client.async_rest_adapter import AsyncRestAdapter
+from src.graylog_api_client.data_structures import GraylogApiResult
+from src.graylog_api_client.exceptions import GraylogApiException
+
+
+class TestAsyncRestAdapter(TestCase):
+    def setUp(self):
+        self.rest_adapter = AsyncRestAdapter("", "", max_connections=2)
+        self.response = requests.Response()
+
+    def tearDown(self):
+        self.rest_adapter.close()
+
+    def test__do_good_request_returns_result(self):
+        self.response.status_code = 200
+        self.response._content = "{}".encode()
+        with mock.patch("requests.Session.request", return_value=self.response):
+            result = asyncio.run(self.rest_adapter._do(method="GET", endpoint="/"))
+        self.assertIsInstance(result, GraylogApiResult)
+
+    def test__do_bad_status_raises_GraylogApiException(self):
+        self.response.status_code = 404
+        self.response._content = b''
+        with mock.patch("requests.Session.request", return_value=self.response):
+            with self.assertRaises(GraylogApiException):
+                asyncio.run(self.rest_adapter._do(method="GET", endpoint="/"))
+
+    def test_concurrency_is_capped_by_max_connections(self):
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def slow_do(**kwargs):
+            with lock:
+                running.append(1)
+                peak.append(len(running))
+            time.sleep(0.02)
+            with lock:
+                running.pop()
+            return GraylogApiResult(200)
+
+        self.rest_adapter._rest_adapter._do = slow_do
+
+        async def fan_out():
+            return await asyncio.gather(*(self.rest_adapter.get(f"users/id/{i}") for i in range(8)))
+
+        results = asyncio.run(fan_out())
+        self.assertEqual(len(results), 8)
+        self.assertLessEqual(max(peak), 2)
+
+    def test_get(self):
+        self.rest_adapter._rest_adapter._do = mock.Mock(return_value=GraylogApiResult(200))
+        asyncio.run(self.rest_adapter.get(endpoint="/get", parameters={"foo": "bar"}))
+        self.rest_adapter._rest_adapter._do.assert_called_once_with(method="GET", endpoint="/get",
+                                                                   parameters={"foo": "bar"}, data=None)
+
+    def test_put(self):
+        self.rest_adapter._rest_adapter._do = mock.Mock(return_value=GraylogApiResult(200))
+        asyncio.run(self.rest_adapter.put(endpoint="/put", parameters={"foo": "bar"}, data={"foo": "baz"}))
+        self.rest_adapter._rest_adapter._do.assert_called_once_with(method="PUT", endpoint="/put",
+                                                                   parameters={"foo": "bar"}, data={"foo": "baz"})
+
+    def test_invalid_max_connections_raises_ValueError(self):
+        with self.assertRaises(ValueError):
+            AsyncRestAdapter("", "", max_connections=0)
+
+    def test_iter_items(self):
+        self.rest_adapter._rest_adapter.iter_items = mock.Mock(return_value=(item for item in [{"id": "a"}, {"id": "b"}]))
+
+        async def collect():
+            return [item async for item in self.rest_adapter.iter_items("streams", key="streams")]
+
+        self.assertEqual(asyncio.run(collect()), [{"id": "a"}, {"id": "b"}])
+
+    def test_iter_lines_decodes_on_worker_threads(self):
+        self.rest_adapter._rest_adapter.iter_lines = mock.Mock(return_value=iter([b'{"a": 1}\n', b'{"a": 2}\n']))
+        threads = []
+
+        def decode(lines):
+            for line in lines:
+                threads.append(threading.current_thread().name)
+                yield line.strip()
+
+        async def collect():
+            return [item async for item in self.rest_adapter.iter_lines("POST", "views/search/messages", data={},
+                                                                        decode=decode)]
+
+        self.assertEqual(asyncio.run(collect()), [b'{"a": 1}', b'{"a": 2}'])
+        self.assertTrue(all(name.startswith("graylog-api") for name in threads))
+        self.rest_adapter._rest_adapter.iter_lines.assert_called_once_with(
+            "POST", "views/search/messages", None, data={}, accept="application/x-ndjson", chunk_size=64 * 1024)
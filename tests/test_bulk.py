@@ -0,0 +1,91 @@
+from unittest import TestCase
+
+from src.graylog_api_client.bulk import BulkItemResult, UserOperation, diff_user, plan, run_bulk
+from src.graylog_api_client.data_structures import GraylogApiResult
+from src.graylog_api_client.exceptions import GraylogApiException
+
+
+def run_sequentially(run, items):
+    return [run(item) for item in items]
+
+
+class TestUserOperation(TestCase):
+    def test_invalid_action_raises_ValueError(self):
+        with self.assertRaises(ValueError):
+            UserOperation("rename", "foo")
+
+    def test_create_collects_fields(self):
+        operation = UserOperation.create("foo", "Foo", "Bar", "foo@example.com", "secret", ["a:b"], roles=["Reader"])
+        self.assertEqual(operation.fields["permissions"], ["a:b"])
+        self.assertEqual(operation.fields["roles"], ["Reader"])
+
+
+class TestPlan(TestCase):
+    def setUp(self):
+        self.existing = {"id": "1", "username": "foo", "email": "foo@example.com", "roles": ["Reader", "Admin"],
+                         "account_status": "enabled"}
+
+    def test_diff_user_ignores_list_order_and_password(self):
+        changes = diff_user({"roles": ["Admin", "Reader"], "password": "x", "email": "new@example.com"}, self.existing)
+        self.assertEqual(changes, {"email": "new@example.com"})
+
+    def test_create_existing_user_becomes_update(self):
+        item = plan(UserOperation.create("foo", "Foo", "Bar", "foo@example.com", "secret"), self.existing)
+        self.assertEqual(item.status, BulkItemResult.UPDATED)
+        self.assertEqual(item.changes, {"first_name": "Foo", "last_name": "Bar"})
+
+    def test_noops_are_skipped(self):
+        cases = [
+            (UserOperation.update("foo", email="foo@example.com"), self.existing, "unchanged"),
+            (UserOperation.disable("foo"), dict(self.existing, account_status="disabled"), "already disabled"),
+            (UserOperation.delete("foo"), None, "absent"),
+        ]
+        for operation, existing, reason in cases:
+            with self.subTest(operation=operation):
+                item = plan(operation, existing)
+                self.assertEqual((item.status, item.reason), (BulkItemResult.SKIPPED, reason))
+
+    def test_update_absent_user_fails(self):
+        item = plan(UserOperation.update("bar", email="bar@example.com"), None)
+        self.assertFalse(item.ok)
+
+
+class TestRunBulk(TestCase):
+    def setUp(self):
+        self.existing_users = [{"id": "1", "username": "foo", "account_status": "enabled"},
+                               {"id": "2", "username": "bar", "account_status": "enabled"}]
+        self.sent = []
+
+    def execute(self, item, existing):
+        if item.operation.username == "bad":
+            raise GraylogApiException("400: Bad Request")
+        self.sent.append((item.status, item.operation.username, existing["id"] if existing else None))
+        return GraylogApiResult(200)
+
+    def test_report_in_input_order_with_failures(self):
+        operations = [UserOperation.disable("foo"), UserOperation.create("bad", "B", "A", "b@example.com", "x"),
+                      UserOperation.delete("bar"), UserOperation.delete("unknown")]
+        report = run_bulk(operations, self.existing_users, self.execute, run_sequentially)
+        self.assertEqual([item.status for item in report.items], ["disabled", "failed", "deleted", "skipped"])
+        self.assertEqual(self.sent, [("disabled", "foo", "1"), ("deleted", "bar", "2")])
+        self.assertEqual(report.counts, {"disabled": 1, "failed": 1, "deleted": 1, "skipped": 1})
+        self.assertFalse(report.ok)
+        self.assertIsInstance(report.failed[0].error, GraylogApiException)
+
+    def test_last_operation_per_username_wins(self):
+        operations = [UserOperation.disable("foo"), UserOperation.delete("foo")]
+        report = run_bulk(operations, self.existing_users, self.execute, run_sequentially)
+        self.assertEqual([item.reason for item in report.items], ["superseded", ""])
+        self.assertEqual(self.sent, [("deleted", "foo", "1")])
+
+    def test_dry_run_sends_nothing(self):
+        report = run_bulk([UserOperation.delete("foo")], self.existing_users, self.execute, run_sequentially, dry_run=True)
+        self.assertEqual(report.counts, {"deleted": 1})
+        self.assertEqual(self.sent, [])
+
+    def test_no_operations_does_not_read_users(self):
+        def existing_users():
+            raise AssertionError("users were read")
+            yield
+        report = run_bulk([], existing_users(), self.execute, run_sequentially)
+        self.assertEqual(report.items, [])
@@ -0,0 +1,59 @@
+from unittest import TestCase, mock
+
+from src.graylog_api_client.cache import ResponseCache
+from src.graylog_api_client.data_structures import GraylogApiResult
+
+
+class TestResponseCache(TestCase):
+    def setUp(self):
+        self.cache = ResponseCache(default_ttl=60, ttls={"cluster": 5, "cluster/nodes": 1}, max_entries=2)
+        self.result = GraylogApiResult(200)
+
+    def test_key_ignores_parameter_order(self):
+        self.assertEqual(ResponseCache.make_key("h/", "users", {"a": 1, "b": 2}),
+                         ResponseCache.make_key("h/", "/users", {"b": 2, "a": 1}))
+
+    def test_ttl_longest_prefix_wins(self):
+        self.assertEqual(self.cache.ttl_for("streams"), 60)
+        self.assertEqual(self.cache.ttl_for("cluster/foo/jvm"), 5)
+        self.assertEqual(self.cache.ttl_for("cluster/nodes"), 1)
+
+    def test_hit_and_miss(self):
+        key = self.cache.make_key("h/", "streams")
+        self.assertIsNone(self.cache.get(key))
+        self.cache.set(key, self.result)
+        self.assertIs(self.cache.get(key).result, self.result)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_lru_eviction(self):
+        keys = [self.cache.make_key("h/", endpoint) for endpoint in ("a", "b", "c")]
+        self.cache.set(keys[0], self.result)
+        self.cache.set(keys[1], self.result)
+        self.cache.get(keys[0])
+        self.cache.set(keys[2], self.result)
+        self.assertIsNotNone(self.cache.get(keys[0]))
+        self.assertIsNone(self.cache.get(keys[1]))
+
+    def test_stale_entry_without_validators_is_dropped(self):
+        key = self.cache.make_key("h/", "streams")
+        self.cache.set(key, self.result)
+        with mock.patch("time.monotonic", return_value=10 ** 9):
+            self.assertIsNone(self.cache.get(key))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_stale_entry_with_etag_is_kept_for_revalidation(self):
+        key = self.cache.make_key("h/", "streams")
+        self.cache.set(key, self.result, etag='"abc"')
+        with mock.patch("time.monotonic", return_value=10 ** 9):
+            entry = self.cache.get(key)
+            self.assertFalse(entry.fresh)
+            self.assertEqual(entry.validators, {"If-None-Match": '"abc"'})
+
+    def test_invalidate_drops_whole_resource_of_same_host(self):
+        cache = ResponseCache()
+        for host, endpoint in [("h/", "users"), ("h/", "users/id/1"), ("h/", "streams"), ("other/", "users")]:
+            cache.set(cache.make_key(host, endpoint), self.result)
+        cache.invalidate("h/", "users/1/status/disabled")
+        self.assertEqual(len(cache), 2)
+        self.assertIsNotNone(cache.get(cache.make_key("h/", "streams")))
+        self.assertIsNotNone(cache.get(cache.make_key("other/", "users")))
@@ -0,0 +1,145 @@
+import io
+import json
+from unittest import TestCase, mock
+
+from src.graylog_api_client import cli
+from src.graylog_api_client.data_structures import GraylogApiResult
+from src.graylog_api_client.exceptions import GraylogApiException
+from src.graylog_api_client.graylog_api_client import GraylogAPI
+
+CONNECTION = ["--host", "https://graylog.test/api", "--api-key", "token"]
+
+
+class TestCli(TestCase):
+    def setUp(self):
+        self.stdout = io.BytesIO()
+        self.stderr = io.StringIO()
+
+    def run_cli(self, *argv, stdin: str = ""):
+        stdout = io.TextIOWrapper(self.stdout)
+        with mock.patch("sys.stdout", stdout), mock.patch("sys.stderr", self.stderr), \
+                mock.patch("sys.stdin", io.StringIO(stdin)):
+            code = cli.main(CONNECTION + list(argv))
+        stdout.detach()
+        return code
+
+    @property
+    def lines(self):
+        return [json.loads(line) for line in self.stdout.getvalue().splitlines()]
+
+    def test_list_streams_pages_as_ndjson(self):
+        users = iter([{"id": "1", "username": "admin"}, {"id": "2", "username": "jdoe"}])
+        with mock.patch.object(GraylogAPI, "iter_users", return_value=users) as iter_users:
+            code = self.run_cli("list", "users", "--per-page", "500", "--limit", "10", "--param", "query=j")
+        self.assertEqual(code, 0)
+        self.assertEqual(self.lines, [{"id": "1", "username": "admin"}, {"id": "2", "username": "jdoe"}])
+        iter_users.assert_called_once_with({"query": "j"}, per_page=500, max_items=10)
+
+    def test_list_as_csv(self):
+        streams = iter([{"id": "a", "title": "All", "rules": [{"field": "x"}]}, {"id": "b", "title": "Fw", "x": 1}])
+        with mock.patch.object(GraylogAPI, "iter_streams", return_value=streams):
+            code = self.run_cli("--format", "csv", "list", "streams")
+        self.assertEqual(code, 0)
+        self.assertEqual(self.stdout.getvalue().decode().splitlines(),
+                         ["id,title,rules", 'a,All,"[{""field"": ""x""}]"', "b,Fw,"])
+
+    def test_list_limit_applies_to_unpaged_lists(self):
+        streams = iter([{"id": "a"}, {"id": "b"}, {"id": "c"}])
+        cluster = GraylogApiResult(200, data={"n1": {"node_id": "n1"}, "n2": {"node_id": "n2"}})
+        with mock.patch.object(GraylogAPI, "iter_streams", return_value=streams), \
+                mock.patch.object(GraylogAPI, "get_cluster", return_value=cluster, create=True):
+            self.assertEqual(self.run_cli("list", "streams", "--limit", "2"), 0)
+            self.assertEqual(self.run_cli("list", "cluster", "--limit", "1"), 0)
+        self.assertEqual(self.lines, [{"id": "a"}, {"id": "b"}, {"node_id": "n1"}])
+
+    def test_list_rejects_paging_options_of_unpaged_lists(self):
+        for argv in (["streams", "--param", "query=x"], ["cluster", "--per-page", "10"]):
+            with self.subTest(argv=argv):
+                with mock.patch.object(GraylogAPI, "iter_streams") as iter_streams:
+                    self.assertEqual(self.run_cli("list", *argv), 1)
+                iter_streams.assert_not_called()
+                self.assertIn("only apply to roles, users, views", self.stderr.getvalue())
+
+    def test_get_reads_ids_from_stdin_in_parallel(self):
+        def get_user(user_id):
+            if user_id == "bad":
+                raise GraylogApiException("404: Not Found")
+            return GraylogApiResult(200, data={"id": user_id})
+        with mock.patch.object(GraylogAPI, "get_user_by_id", side_effect=get_user):
+            code = self.run_cli("--concurrency", "3", "get", "users", stdin="a\n\nbad\nc\n")
+        self.assertEqual(code, 1)
+        self.assertEqual(self.lines, [{"id": "a"}, {"id": "c"}])
+        self.assertEqual(json.loads(self.stderr.getvalue()), {"id": "bad", "error": "404: Not Found"})
+
+    def test_get_accepts_method_names_and_arguments(self):
+        with mock.patch.object(GraylogAPI, "get_jvminfo", return_value=GraylogApiResult(200, data={"ok": 1})):
+            code = self.run_cli("get", "get_jvminfo", "n1", "n2")
+        self.assertEqual((code, self.lines), (0, [{"ok": 1}, {"ok": 1}]))
+
+    def test_call_with_parameters_and_body(self):
+        with mock.patch.object(GraylogAPI, "create_user", return_value=GraylogApiResult(201), create=True) as call:
+            code = self.run_cli("call", "create_user", "--param", "force=true", "--data", '{"username": "jdoe"}')
+        self.assertEqual(code, 0)
+        call.assert_called_once_with(parameters={"force": "true"}, data={"username": "jdoe"})
+        self.assertEqual(self.lines, [[]])
+
+    def test_export_streams_messages(self):
+        messages = iter([{"message": "a"}, {"message": "b"}])
+        with mock.patch.object(GraylogAPI, "export_messages_parallel", return_value=messages) as export:
+            code = self.run_cli("export", "source:fw01", "--from", "2024-01-01T00:00:00Z", "--to",
+                                "2024-01-02T00:00:00Z", "--slices", "4", "--stream", "s1")
+        self.assertEqual((code, self.lines), (0, [{"message": "a"}, {"message": "b"}]))
+        export.assert_called_once_with("source:fw01", "2024-01-01T00:00:00Z", "2024-01-02T00:00:00Z",
+                                       streams=["s1"], fields=None, slices=4, max_workers=4)
+
+    def test_errors_are_reported_on_stderr(self):
+        with mock.patch.object(GraylogAPI, "iter_views", side_effect=GraylogApiException("401: Unauthorized")):
+            code = self.run_cli("list", "views")
+        self.assertEqual(code, 1)
+        self.assertIn("401: Unauthorized", self.stderr.getvalue())
+
+    def test_missing_connection_settings(self):
+        with mock.patch.dict("os.environ", {}, clear=True), mock.patch("sys.stderr", self.stderr):
+            code = cli.main(["list", "users"])
+        self.assertEqual(code, 1)
+        self.assertIn("--host", self.stderr.getvalue())
+
+    def test_options_configure_the_client(self):
+        args = cli.build_parser().parse_args(CONNECTION + ["--concurrency", "16", "--rate-limit", "50",
+                                                           "--cache-path", "/tmp/graylog-api-cli-test.sqlite",
+                                                           "list", "users"])
+        with mock.patch.object(cli, "GraylogAPI") as api, mock.patch.object(cli, "DiskCache") as cache:
+            cli.build_api(args)
+        kwargs = api.call_args.kwargs
+        self.assertEqual(kwargs["pool_maxsize"], 16)
+        self.assertIs(kwargs["cache"], cache.return_value)
+        cache.assert_called_once_with("/tmp/graylog-api-cli-test.sqlite", default_ttl=300)
+        self.assertIsNotNone(kwargs["rate_limiter"])
+
+    def test_bare_cache_flag_before_the_command(self):
+        args = cli.build_parser().parse_args(CONNECTION + ["--cache", "list", "users"])
+        self.assertEqual((args.command, args.kind), ("list", "users"))
+        with mock.patch.object(cli, "GraylogAPI"), mock.patch.object(cli, "DiskCache") as cache:
+            cli.build_api(args)
+        cache.assert_called_once_with(None, default_ttl=300)
+
+    def test_parse_parameters(self):
+        self.assertEqual(cli.parse_parameters(["a=1", "b=x=y"]), {"a": "1", "b": "x=y"})
+        with self.assertRaises(ValueError):
+            cli.parse_parameters(["a"])
+
+
+class TestFetchManyWindow(TestCase):
+    def test_ids_are_consumed_lazily(self):
+        graylog_api = GraylogAPI("", "")
+        graylog_api._rest_adapter.get = mock.Mock(return_value=GraylogApiResult(200))
+        consumed = []
+
+        def ids():
+            for index in range(1000):
+                consumed.append(index)
+                yield str(index)
+        results = graylog_api.fetch_many("get_user_by_id", ids(), max_workers=2)
+        next(results)
+        self.assertLessEqual(len(consumed), 10)
+        self.assertEqual(sum(1 for _ in results), 999)
@@ -0,0 +1,124 @@
+import gzip
+import http.server
+import json
+import threading
+import unittest
+from unittest import TestCase
+
+from src.graylog_api_client import transport
+from src.graylog_api_client.compression import ACCEPT_ENCODING, compress, wire_bytes
+from src.graylog_api_client.instrumentation import InMemoryCollector
+from src.graylog_api_client.rest_adapter import RestAdapter
+
+USERS = json.dumps({"users": [{"username": f"user{i}", "roles": ["Reader"]} for i in range(500)]}).encode()
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    received = []
+
+    def _reply(self, body: bytes):
+        gzipped = "gzip" in self.headers.get("Accept-Encoding", "")
+        if gzipped:
+            body = gzip.compress(body)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        if gzipped:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.received.append((dict(self.headers), b""))
+        self._reply(USERS)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.received.append((dict(self.headers), body))
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        self._reply(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestCompression(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.host = f"http://127.0.0.1:{cls.server.server_port}/api"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        _Handler.received.clear()
+        self.metrics = InMemoryCollector()
+
+    def test_compressed_response_is_decoded_and_counted(self):
+        rest_adapter = RestAdapter(self.host, "token", instrumentation=self.metrics)
+        result = rest_adapter.get("users")
+        self.assertEqual(len(result.data["users"]), 500)
+        self.assertEqual(_Handler.received[0][0]["Accept-Encoding"], ACCEPT_ENCODING)
+        stats = self.metrics.snapshot()["users"]
+        self.assertEqual(stats["bytes_in"], len(USERS))
+        self.assertEqual(stats["wire_bytes_in"], len(gzip.compress(USERS)))
+
+    def test_streamed_response_is_decoded_and_counted(self):
+        rest_adapter = RestAdapter(self.host, "token", instrumentation=self.metrics)
+        users = list(rest_adapter.iter_items("users", key="users", chunk_size=1024))
+        self.assertEqual(len(users), 500)
+        stats = self.metrics.snapshot()["users"]
+        self.assertEqual(stats["bytes_in"], len(USERS))
+        self.assertLess(stats["wire_bytes_in"], len(USERS) // 5)
+
+    def test_compression_can_be_disabled(self):
+        rest_adapter = RestAdapter(self.host, "token", compression=False, instrumentation=self.metrics)
+        rest_adapter.get("users")
+        self.assertEqual(_Handler.received[0][0]["Accept-Encoding"], "identity")
+        stats = self.metrics.snapshot()["users"]
+        self.assertEqual(stats["wire_bytes_in"], stats["bytes_in"])
+
+    def test_large_request_bodies_are_gzipped(self):
+        rest_adapter = RestAdapter(self.host, "token", compress_requests=1024, instrumentation=self.metrics)
+        data = {"users": [{"username": f"user{i}"} for i in range(200)]}
+        result = rest_adapter.post("users/bulk", data=data)
+        rest_adapter.post("users/small", data={"username": "jdoe"})
+        self.assertEqual(result.data, data)
+        (large_headers, large_body), (small_headers, small_body) = _Handler.received
+        self.assertEqual(large_headers["Content-Encoding"], "gzip")
+        self.assertEqual(large_headers["Content-Type"], "application/json")
+        self.assertEqual(json.loads(gzip.decompress(large_body)), data)
+        self.assertNotIn("Content-Encoding", small_headers)
+        self.assertEqual(json.loads(small_body), {"username": "jdoe"})
+        stats = self.metrics.snapshot()["users/bulk"]
+        self.assertEqual(stats["wire_bytes_out"], len(large_body))
+        self.assertGreater(stats["bytes_out"], stats["wire_bytes_out"] * 5)
+
+    @unittest.skipUnless(transport.HTTP2_AVAILABLE, "httpx and h2 are not installed")
+    def test_http2_adapter_counts_compressed_bytes(self):
+        rest_adapter = RestAdapter(self.host, "token", http2=True, instrumentation=self.metrics)
+        try:
+            self.assertEqual(len(rest_adapter.get("users").data["users"]), 500)
+        finally:
+            rest_adapter.close()
+        self.assertIn("gzip", _Handler.received[0][0]["Accept-Encoding"])
+        self.assertEqual(self.metrics.snapshot()["users"]["wire_bytes_in"], len(gzip.compress(USERS)))
+
+    def test_invalid_threshold(self):
+        with self.assertRaises(ValueError):
+            RestAdapter(self.host, "token", compress_requests=-1)
+
+
+class TestHelpers(TestCase):
+    def test_compress_is_deterministic(self):
+        self.assertEqual(compress(b"{}" * 100), compress(b"{}" * 100))
+        self.assertEqual(gzip.decompress(compress(b"{}" * 100)), b"{}" * 100)
+
+    def test_wire_bytes_falls_back_to_decoded_length(self):
+        self.assertEqual(wire_bytes(None, 10), 10)
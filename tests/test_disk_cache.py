@@ -0,0 +1,155 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from unittest import TestCase, mock
+
+import requests
+
+from src.graylog_api_client.data_structures import GraylogApiResult
+from src.graylog_api_client.disk_cache import DiskCache, default_path
+from src.graylog_api_client.rest_adapter import RestAdapter
+
+
+class TestDiskCache(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "cache", "responses.sqlite")
+        self.cache = DiskCache(self.path, default_ttl=60, ttls={"cluster": 5})
+        self.key = DiskCache.make_key("h/", "streams", {"page": 1})
+
+    def tearDown(self):
+        self.cache.close()
+        self.directory.cleanup()
+
+    def test_entries_survive_a_new_instance(self):
+        data = {"streams": [{"id": str(i), "title": "stream " * 50} for i in range(100)]}
+        self.cache.set(self.key, GraylogApiResult(200, "OK", data), etag='"v1"')
+        with DiskCache(self.path) as cache:
+            entry = cache.get(self.key)
+            self.assertTrue(entry.fresh)
+            self.assertEqual((entry.result.status_code, entry.result.message, entry.result.data), (200, "OK", data))
+            self.assertEqual(entry.etag, '"v1"')
+            self.assertEqual((cache.hits, cache.misses, cache.disk_hits), (1, 0, 1))
+            cache.get(self.key)
+            self.assertEqual(cache.disk_hits, 1)
+        self.assertLess(self.cache.disk_bytes, 2000)
+
+    def test_file_is_private(self):
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o600)
+
+    def test_expired_entries_are_misses_unless_revalidatable(self):
+        self.cache.set(self.key, GraylogApiResult(200))
+        revalidatable = DiskCache.make_key("h/", "views")
+        self.cache.set(revalidatable, GraylogApiResult(200), last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+        later = time.time() + 3600
+        with DiskCache(self.path) as cache, mock.patch("time.time", return_value=later):
+            self.assertIsNone(cache.get(self.key))
+            entry = cache.get(revalidatable)
+        self.assertFalse(entry.fresh)
+        self.assertEqual(entry.validators, {"If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"})
+
+    def test_ttl_per_prefix_is_stored(self):
+        self.cache.set(DiskCache.make_key("h/", "cluster"), GraylogApiResult(200))
+        (expires, accessed), = self.cache._execute("SELECT expires, accessed FROM responses")
+        self.assertAlmostEqual(expires - accessed, 5, places=3)
+
+    def test_invalidate_and_clear_reach_the_disk(self):
+        self.cache.set(self.key, GraylogApiResult(200))
+        self.cache.set(DiskCache.make_key("h/", "streams/abc"), GraylogApiResult(200))
+        self.cache.set(DiskCache.make_key("h/", "users"), GraylogApiResult(200))
+        self.cache.invalidate("h/", "streams/abc/pause")
+        self.assertEqual(self.cache.disk_entries, 1)
+        self.cache.clear()
+        self.assertEqual(self.cache.disk_entries, 0)
+
+    def test_size_cap_evicts_least_recently_used(self):
+        cache = DiskCache(self.path, max_bytes=400)
+        try:
+            for index in range(10):
+                with mock.patch("time.time", return_value=1e9 + index * 100):
+                    cache.set(DiskCache.make_key("h/", f"users/{index}"), GraylogApiResult(200, data={"i": index}))
+            self.assertLessEqual(cache.disk_bytes, 400)
+            keys = [DiskCache.make_key("h/", f"users/{index}") for index in range(10)]
+            stored = [key for key in keys if cache._execute("SELECT 1 FROM responses WHERE key = ?",
+                                                            (cache._digest(key),))]
+            self.assertEqual(stored, keys[-len(stored):])
+        finally:
+            cache.close()
+
+    def test_concurrent_writers_and_readers(self):
+        errors = []
+
+        def work(worker):
+            try:
+                with DiskCache(self.path) as cache:
+                    for index in range(50):
+                        key = DiskCache.make_key("h/", f"users/{index}")
+                        cache.set(key, GraylogApiResult(200, data={"worker": worker, "i": index}))
+                        cache.get(DiskCache.make_key("h/", f"users/{49 - index}"))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=work, args=(worker,)) for worker in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(self.cache.disk_entries, 50)
+
+    def test_disk_failures_are_misses(self):
+        logger = mock.Mock()
+        self.cache._logger = logger
+        self.cache._db = mock.Mock(execute=mock.Mock(side_effect=sqlite3.OperationalError("database is locked")))
+        self.assertIsNone(self.cache.get(self.key))
+        self.cache.set(self.key, GraylogApiResult(200))
+        self.assertIsNotNone(self.cache.get(self.key))
+        logger.warning.assert_called()
+
+    def test_corrupt_entries_are_dropped(self):
+        self.cache.set(self.key, GraylogApiResult(200))
+        self.cache._execute("UPDATE responses SET value = ?", (b"\x00",))
+        with DiskCache(self.path) as cache:
+            self.assertIsNone(cache.get(self.key))
+            self.assertEqual(cache.disk_entries, 0)
+
+    def test_default_path_follows_xdg(self):
+        with mock.patch.dict(os.environ, {"XDG_CACHE_HOME": "/var/cache/me"}):
+            self.assertEqual(default_path(), "/var/cache/me/graylog-api-client/responses.sqlite")
+
+
+class TestRestAdapterWithDiskCache(TestCase):
+    def test_second_process_starts_warm(self):
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b'{"roles": [{"name": "Admin"}]}'
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "responses.sqlite")
+            with mock.patch("requests.Session.request", return_value=response) as request:
+                with DiskCache(path) as cache:
+                    RestAdapter("https://graylog/api", "", cache=cache).get("authz/roles")
+                with DiskCache(path) as cache:
+                    result = RestAdapter("https://graylog/api", "", cache=cache).get("authz/roles")
+            self.assertEqual(request.call_count, 1)
+            self.assertEqual(result.data, {"roles": [{"name": "Admin"}]})
+
+    def test_api_keys_do_not_share_entries(self):
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b'{"users": [{"username": "admin"}]}'
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "responses.sqlite")
+            with mock.patch("requests.Session.request", return_value=response) as request:
+                with DiskCache(path) as cache:
+                    RestAdapter("https://graylog/api", "admin-token", cache=cache).get("users")
+                with DiskCache(path) as cache:
+                    RestAdapter("https://graylog/api", "reader-token", cache=cache).get("users")
+                    self.assertEqual(cache.disk_hits, 0)
+                with DiskCache(path) as cache:
+                    RestAdapter("https://graylog/api", "admin-token", cache=cache).get("users")
+                    self.assertEqual(cache.disk_hits, 1)
+            self.assertEqual(request.call_count, 2)
+            with sqlite3.connect(path) as db:
+                self.assertNotIn(b"admin-token", b"".join(row[0] for row in db.execute("SELECT key FROM responses")))
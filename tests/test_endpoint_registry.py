@@ -0,0 +1,118 @@
+import asyncio
+from unittest import TestCase, mock
+
+from src.graylog_api_client import endpoint_registry
+from src.graylog_api_client.async_graylog_api_client import AsyncGraylogAPI
+from src.graylog_api_client.data_structures import GraylogApiResult
+from src.graylog_api_client.endpoint_registry import Endpoint, endpoint_name, endpoints_from_spec
+from src.graylog_api_client.graylog_api_client import GraylogAPI
+
+
+class TestEndpoint(TestCase):
+    def setUp(self):
+        self.endpoint = Endpoint("get_messages_by_index_and_message_id", "GET", "messages/{index}/{messageId}")
+
+    def test_endpoint_name(self):
+        self.assertEqual(endpoint_name("GET", "/system/inputs/{inputId}/extractors"),
+                         "get_system_inputs_extractors_by_input_id")
+        self.assertEqual(endpoint_name("DELETE", "authz/roles/{roleId}/assignee/{username}"),
+                         "delete_authz_roles_assignee_by_role_id_and_username")
+        self.assertEqual(endpoint_name("GET", "authz/shares/entities/{entityGRN}"),
+                         "get_authz_shares_entities_by_entity_grn")
+
+    def test_render_positional_keyword_and_quoted(self):
+        self.assertEqual(self.endpoint.render(("graylog_0", "abc"), {}), "messages/graylog_0/abc")
+        self.assertEqual(self.endpoint.render(("graylog_0",), {"message_id": "a/b"}), "messages/graylog_0/a%2Fb")
+
+    def test_render_invalid_arguments(self):
+        for args, kwargs in [(("a",), {}), (("a", "b", "c"), {}), (("a",), {"index": "b"}), ((), {"foo": "a"})]:
+            with self.subTest(args=args, kwargs=kwargs):
+                with self.assertRaises(TypeError):
+                    self.endpoint.render(args, kwargs)
+        with self.assertRaises(ValueError):
+            self.endpoint.render(("", "b"), {})
+
+    def test_check_validates_query_parameters_and_body(self):
+        endpoint = Endpoint("get_dashboards", "GET", "dashboards", query=["page", "per_page"])
+        endpoint.check({"page": 1}, None)
+        with self.assertRaises(ValueError):
+            endpoint.check({"pgae": 1}, None)
+        with self.assertRaises(ValueError):
+            endpoint.check(None, {"foo": "bar"})
+
+
+class TestEndpointTable(TestCase):
+    def test_table_is_consistent(self):
+        for name in endpoint_registry.names():
+            with self.subTest(name=name):
+                endpoint = endpoint_registry.lookup(name)
+                self.assertIsInstance(endpoint, Endpoint)
+                # Hand-written methods always win, the table must not contain their names
+                function = GraylogAPI.__dict__.get(name)
+                self.assertTrue(function is None or function.__qualname__ == name)
+
+    def test_private_and_unknown_names(self):
+        self.assertIsNone(endpoint_registry.lookup("_rest_adapter"))
+        self.assertIsNone(endpoint_registry.lookup("does_not_exist"))
+
+    def test_endpoints_from_swagger_spec(self):
+        spec = {"apis": [{"path": "/streams/{streamId}", "operations": [
+            {"method": "GET", "summary": "Get a stream", "parameters": [{"name": "streamId", "paramType": "path"}]},
+            {"method": "PUT", "summary": "Update", "parameters": [{"name": "JSON body", "paramType": "body"}]},
+        ]}, {"path": "/streams", "operations": [
+            {"method": "GET", "parameters": [{"name": "query", "paramType": "query"}]}]}]}
+        rows = endpoints_from_spec(spec, known={("PUT", "streams/{streamId}"): "update_stream"})
+        self.assertEqual(rows, [["get_streams", "GET", "streams", ["query"], 0, ""],
+                                ["get_streams_by_stream_id", "GET", "streams/{streamId}", [], 0, "Get a stream"],
+                                ["update_stream", "PUT", "streams/{streamId}", [], 1, "Update"]])
+
+    def test_endpoints_from_openapi_spec(self):
+        spec = {"paths": {"/system/inputs/{inputId}": {
+            "delete": {"summary": "Terminate", "parameters": [{"name": "inputId", "in": "path"}]},
+            "put": {"requestBody": {}, "parameters": [{"name": "force", "in": "query"}]},
+            "parameters": [],
+        }}}
+        rows = endpoints_from_spec(spec)
+        self.assertEqual([row[:5] for row in rows], [
+            ["delete_system_inputs_by_input_id", "DELETE", "system/inputs/{inputId}", [], 0],
+            ["put_system_inputs_by_input_id", "PUT", "system/inputs/{inputId}", ["force"], 1]])
+
+
+class TestLazyEndpointMethods(TestCase):
+    def setUp(self):
+        self.graylog_api = GraylogAPI("", "")
+        self.graylog_api._rest_adapter.get = mock.Mock(return_value=GraylogApiResult(200))
+        self.graylog_api._rest_adapter.post = mock.Mock(return_value=GraylogApiResult(200))
+
+    def test_method_is_bound_to_the_class_on_first_access(self):
+        result = self.graylog_api.get_system_inputs_by_input_id("foo")
+        self.assertIsInstance(result, GraylogApiResult)
+        self.graylog_api._rest_adapter.get.assert_called_once_with("system/inputs/foo", None)
+        self.assertIn("get_system_inputs_by_input_id", GraylogAPI.__dict__)
+        self.assertNotIn("get_system_inputs_by_input_id", vars(self.graylog_api))
+
+    def test_post_with_body_and_query_validation(self):
+        self.graylog_api.post_events_definitions(parameters={"schedule": True}, data={"title": "foo"})
+        self.graylog_api._rest_adapter.post.assert_called_once_with("events/definitions", {"schedule": True},
+                                                                    {"title": "foo"})
+        with self.assertRaises(ValueError):
+            self.graylog_api.get_dashboards(parameters={"foo": "bar"})
+
+    def test_unknown_attribute_raises_AttributeError(self):
+        with self.assertRaises(AttributeError):
+            self.graylog_api.get_does_not_exist()
+        self.assertIn("get_system_jvm", dir(self.graylog_api))
+
+    def test_fetch_many_resolves_table_endpoints(self):
+        results = list(self.graylog_api.fetch_many("get_streams_by_stream_id", ["a", "b"]))
+        self.assertTrue(all(result.ok for result in results))
+
+    def test_async_client_returns_coroutines(self):
+        graylog_api = AsyncGraylogAPI("", "")
+        graylog_api._rest_adapter.get = mock.AsyncMock(return_value=GraylogApiResult(200))
+        try:
+            result = asyncio.run(graylog_api.get_system_cluster_nodes_by_node_id("foo"))
+        finally:
+            graylog_api.close()
+        self.assertIsInstance(result, GraylogApiResult)
+        graylog_api._rest_adapter.get.assert_awaited_once_with("system/cluster/nodes/foo", None)
@@ -0,0 +1,80 @@
+import os
+import tempfile
+from unittest import TestCase, mock
+
+from src.graylog_api_client.async_graylog_api_client import AsyncGraylogAPI
+from src.graylog_api_client.data_structures import GraylogApiResult
+from src.graylog_api_client.entity_store import EntityStore
+
+
+class TestEntityStore(TestCase):
+    def setUp(self):
+        self.users = [{"id": "u1", "username": "alice", "roles": ["Admin", "Reader"]},
+                      {"id": "u2", "username": "bob", "roles": ["Reader"]}]
+        self.views = [{"id": "v2", "title": "New", "last_updated_at": "2024-02-01T00:00:00.000Z"},
+                      {"id": "v1", "title": "Old", "last_updated_at": "2024-01-01T00:00:00.000Z"}]
+        self.grants = [{"grantee": "grn::::user:u2", "capability": "own", "target": "grn::::stream:s1"},
+                       {"grantee": "grn::::team:t1", "capability": "own", "target": "grn::::stream:s1"},
+                       {"grantee": "grn::::user:u1", "capability": "view", "target": "grn::::stream:s1"}]
+        self.api = mock.Mock()
+        self.api.iter_users.side_effect = lambda **kwargs: iter(list(self.users))
+        self.api.iter_auth_roles.side_effect = lambda **kwargs: iter([{"id": "r1", "name": "Admin"}])
+        self.api.iter_streams.side_effect = lambda: iter([{"id": "s1", "title": "All messages"}])
+        self.api.iter_views.side_effect = lambda **kwargs: iter(list(self.views))
+        self.api.get_auth_grants_overview.side_effect = lambda: GraylogApiResult(200, data={"grants": self.grants})
+        self.store = EntityStore(self.api)
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_indexes(self):
+        self.store.refresh()
+        self.assertEqual(self.store.roles_of_user("alice"), ["Admin", "Reader"])
+        self.assertEqual(self.store.assignees_of_role("Reader"), ["alice", "bob"])
+        self.assertEqual(self.store.owners_of_stream("s1"), ["bob", "grn::::team:t1"])
+        self.assertEqual(self.store.grants_of("grn::::user:u1"), [("view", "grn::::stream:s1")])
+        self.assertEqual(self.store.find("views", "Old")[0]["id"], "v1")
+        self.assertEqual(self.store.count("streams"), 1)
+
+    def test_refresh_writes_only_changes_and_deletes_gone_entities(self):
+        self.store.refresh()
+        self.users = [{"id": "u1", "username": "alice", "roles": ["Reader"]}, {"id": "u3", "username": "carol"}]
+        stats = self.store.refresh(["users", "grants"])["users"]
+        self.assertEqual((stats.added, stats.updated, stats.deleted, stats.unchanged), (1, 1, 1, 0))
+        self.assertEqual(self.store.assignees_of_role("Reader"), ["alice"])
+        self.assertIsNone(self.store.get("users", "u2"))
+
+    def test_incremental_views_stop_at_watermark(self):
+        self.store.refresh(["views"])
+        self.api.iter_views.assert_called_with(parameters=None, per_page=200)
+        self.views = [{"id": "v3", "title": "Newest", "last_updated_at": "2024-03-01T00:00:00.000Z"}] + self.views
+        stats = self.store.refresh(["views"])["views"]
+        self.api.iter_views.assert_called_with(parameters={"sort": "last_updated_at", "order": "desc"}, per_page=200)
+        self.assertEqual((stats.added, stats.unchanged, stats.deleted), (1, 1, 0))
+        self.assertEqual(self.store.count("views"), 3)
+
+    def test_unchanged_grants_are_not_rewritten(self):
+        self.store.refresh(["grants"])
+        stats = self.store.refresh(["grants"])["grants"]
+        self.assertEqual((stats.added, stats.unchanged), (0, 3))
+
+    def test_unknown_kind_raises_ValueError(self):
+        with self.assertRaises(ValueError):
+            self.store.refresh(["dashboards"])
+
+    def test_async_client_raises_TypeError(self):
+        api = AsyncGraylogAPI("", "")
+        try:
+            with self.assertRaises(TypeError):
+                api.entity_store()
+        finally:
+            api.close()
+
+    def test_store_persists_on_disk(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "graylog.sqlite")
+            with EntityStore(self.api, path) as store:
+                store.refresh(["users"])
+            with EntityStore(self.api, path) as store:
+                self.assertEqual(store.roles_of_user("bob"), ["Reader"])
+                self.assertIsNotNone(store.synced_at("users"))
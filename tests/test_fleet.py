@@ -0,0 +1,90 @@
+import threading
+import time
+from unittest import TestCase, mock
+
+from src.graylog_api_client.data_structures import GraylogApiResult
+from src.graylog_api_client.exceptions import GraylogApiException
+from src.graylog_api_client.fleet import GraylogFleet
+
+
+class TestGraylogFleet(TestCase):
+    def setUp(self):
+        self.fleet = GraylogFleet({"eu": ("https://eu/api", "eu-key"),
+                                   "us": {"host": "https://us/api", "api_key": "us-key"},
+                                   "ap": ("https://ap/api", "ap-key")}, max_workers=8)
+
+    def tearDown(self):
+        self.fleet.close()
+
+    def mock_get(self, name, side_effect):
+        self.fleet[name]._rest_adapter.get = mock.Mock(side_effect=side_effect)
+
+    def test_clients_share_one_transport_adapter_but_not_credentials(self):
+        sessions = [self.fleet[name]._rest_adapter._session for name in self.fleet.names]
+        self.assertEqual(len({id(session.get_adapter("https://x/")) for session in sessions}), 1)
+        self.assertEqual([session.auth[0] for session in sessions], ["eu-key", "us-key", "ap-key"])
+
+    def test_run_concurrently_with_partial_failures(self):
+        barrier = threading.Barrier(3, timeout=2)
+
+        def get(endpoint, parameters=None):
+            barrier.wait()
+            return GraylogApiResult(200, data={"endpoint": endpoint})
+
+        def fail(endpoint, parameters=None):
+            barrier.wait()
+            raise GraylogApiException("404: Not Found")
+
+        self.mock_get("eu", get)
+        self.mock_get("us", fail)
+        self.mock_get("ap", get)
+        results = self.fleet.get_user_by_username("jdoe")
+        self.assertEqual(list(results), ["eu", "us", "ap"])
+        self.assertEqual(results["eu"].result.data, {"endpoint": "users/jdoe"})
+        self.assertIsInstance(results["us"].error, GraylogApiException)
+
+    def test_per_cluster_deadline(self):
+        self.mock_get("eu", lambda endpoint, parameters=None: GraylogApiResult(200))
+        self.mock_get("us", lambda endpoint, parameters=None: time.sleep(0.3) or GraylogApiResult(200))
+        results = self.fleet.run("get_streams", clusters=["eu", "us"], timeout={"us": 0.05})
+        self.assertTrue(results["eu"].ok)
+        self.assertIsInstance(results["us"].error, TimeoutError)
+
+    def test_iterators_are_collected(self):
+        for name in self.fleet.names:
+            self.mock_get(name, lambda endpoint, parameters=None: GraylogApiResult(200, data={"roles": [{"id": "r"}]}))
+        results = self.fleet.run("iter_auth_roles", clusters=["ap"])
+        self.assertEqual(results["ap"].result, [{"id": "r"}])
+
+    def test_run_callable(self):
+        results = self.fleet.run(lambda client, suffix: client._rest_adapter.host + suffix, "x", clusters=["eu"])
+        self.assertEqual(results["eu"].result, "https://eu/api/x")
+
+    def test_unknown_cluster_or_method_raises(self):
+        with self.assertRaises(ValueError):
+            self.fleet.run("get_streams", clusters=["mars"])
+        with self.assertRaises(ValueError):
+            self.fleet.run("does_not_exist")
+        with self.assertRaises(AttributeError):
+            self.fleet.does_not_exist()
+
+    def test_pools_are_sized_for_max_clusters(self):
+        self.assertEqual(self.fleet._http_adapter._pool_connections, 10)
+        with GraylogFleet({"eu": ("https://eu/api", "eu-key")}, max_clusters=1) as fleet:
+            with self.assertLogs("src.graylog_api_client.fleet", level="WARNING"):
+                fleet.add("us", "https://us/api", "us-key")
+
+    def test_closing_one_client_keeps_the_shared_pools_open(self):
+        adapter = self.fleet._http_adapter
+        adapter.poolmanager.connection_from_url("https://us/api")
+        self.fleet["eu"].close()
+        self.assertEqual(len(adapter.poolmanager.pools), 1)
+        self.assertIs(self.fleet["us"]._rest_adapter._session.get_adapter("https://us/api"), adapter)
+
+    def test_add_and_remove(self):
+        self.fleet.add("sa", "https://sa/api", "sa-key")
+        self.assertIn("sa", self.fleet)
+        with self.assertRaises(ValueError):
+            self.fleet.add("sa", "https://sa/api", "sa-key")
+        self.fleet.remove("sa")
+        self.assertEqual(len(self.fleet), 3)
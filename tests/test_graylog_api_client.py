@@ -1,6 +1,11 @@
+import os
+import subprocess
+import sys
 from unittest import TestCase, mock
 
+from src.graylog_api_client.bulk import UserOperation
 from src.graylog_api_client.data_structures import GraylogApiResult
+from src.graylog_api_client.exceptions import GraylogApiException
 from src.graylog_api_client.graylog_api_client import GraylogAPI
 
 
@@ -77,6 +82,24 @@ class TestGraylogApiClient(TestCase):
         self.assertIsInstance(jvm_info, GraylogApiResult)
         self.graylog_api._rest_adapter.get.assert_called_once_with(f"cluster/{dummy_id}/jvm")
 
+    def test_get_buffers(self):
+        dummy_id = "foo"
+        buffers = self.graylog_api.get_buffers(dummy_id)
+        self.assertIsInstance(buffers, GraylogApiResult)
+        self.graylog_api._rest_adapter.get.assert_called_once_with(f"cluster/{dummy_id}/buffers")
+
+    def test_get_journal(self):
+        dummy_id = "foo"
+        journal = self.graylog_api.get_journal(dummy_id)
+        self.assertIsInstance(journal, GraylogApiResult)
+        self.graylog_api._rest_adapter.get.assert_called_once_with(f"cluster/{dummy_id}/journal")
+
+    def test_get_node_metrics(self):
+        dummy_id = "foo"
+        metrics = self.graylog_api.get_node_metrics(dummy_id, ("a", "b"))
+        self.assertIsInstance(metrics, GraylogApiResult)
+        self.graylog_api._rest_adapter.post.assert_called_once_with(f"cluster/{dummy_id}/metrics/multiple", data={"metrics": ["a", "b"]})
+
     # /contentstream
     # /dashboards
     # /datanodes
@@ -149,6 +172,12 @@ class TestGraylogApiClient(TestCase):
         self.assertIsInstance(user, GraylogApiResult)
         self.graylog_api._rest_adapter.get.assert_called_once_with(f"users/{dummy_id}/tokens")
 
+    def test_update_user(self):
+        dummy_id = "foo"
+        result = self.graylog_api.update_user(dummy_id, {"email": "foo@example.com"})
+        self.assertIsInstance(result, GraylogApiResult)
+        self.graylog_api._rest_adapter.put.assert_called_once_with(f"users/{dummy_id}", data={"email": "foo@example.com"})
+
     def test_delete_user_by_id(self):
         dummy_id = "foo"
         result = self.graylog_api.delete_user_by_id(dummy_id)
@@ -186,3 +215,183 @@ class TestGraylogApiClient(TestCase):
         view = self.graylog_api.get_view_by_id(dummy_id)
         self.assertIsInstance(view, GraylogApiResult)
         self.graylog_api._rest_adapter.get.assert_called_once_with(f"views/{dummy_id}")
+
+
+class TestGraylogApiClientIterators(TestCase):
+    def setUp(self):
+        self.graylog_api = GraylogAPI("", "")
+
+    @staticmethod
+    def _pages(key, total):
+        def fetch(endpoint, parameters=None):
+            page, per_page = parameters["page"], parameters["per_page"]
+            entities = [{"id": str(i)} for i in range((page - 1) * per_page, min(page * per_page, total))]
+            return GraylogApiResult(200, data={key: entities, "total": total})
+        return fetch
+
+    def test_iter_users_walks_all_pages(self):
+        self.graylog_api._rest_adapter.get = mock.Mock(side_effect=self._pages("users", 7))
+        users = list(self.graylog_api.iter_users(per_page=3))
+        self.assertEqual([user["id"] for user in users], [str(i) for i in range(7)])
+        self.assertEqual(self.graylog_api._rest_adapter.get.call_count, 3)
+        self.graylog_api._rest_adapter.get.assert_called_with("users/paginated", {"per_page": 3, "page": 3})
+
+    def test_iter_views_keeps_parameters_and_stops_at_max_items(self):
+        self.graylog_api._rest_adapter.get = mock.Mock(side_effect=self._pages("views", 100))
+        views = list(self.graylog_api.iter_views(parameters={"query": "foo"}, per_page=10, max_items=15))
+        self.assertEqual(len(views), 15)
+        self.assertEqual(self.graylog_api._rest_adapter.get.call_count, 2)
+        self.graylog_api._rest_adapter.get.assert_called_with("views", {"query": "foo", "per_page": 10, "page": 2})
+
+    def test_iter_auth_assignees_of_role(self):
+        dummy_id = "foo"
+        self.graylog_api._rest_adapter.get = mock.Mock(side_effect=self._pages("users", 2))
+        assignees = list(self.graylog_api.iter_auth_assignees_of_role(dummy_id))
+        self.assertEqual(len(assignees), 2)
+        self.graylog_api._rest_adapter.get.assert_called_once_with(f"authz/roles/{dummy_id}/assignees", {"per_page": 50, "page": 1})
+
+    def test_iter_auth_roles_empty(self):
+        self.graylog_api._rest_adapter.get = mock.Mock(return_value=GraylogApiResult(200, data={"roles": []}))
+        self.assertEqual(list(self.graylog_api.iter_auth_roles()), [])
+
+
+class TestGraylogApiClientFetchMany(TestCase):
+    def setUp(self):
+        self.graylog_api = GraylogAPI("", "")
+
+        def get(endpoint, parameters=None):
+            if "bad" in endpoint:
+                raise GraylogApiException("404: Not Found")
+            return GraylogApiResult(200, data={"endpoint": endpoint})
+
+        self.graylog_api._rest_adapter.get = mock.Mock(side_effect=get)
+
+    def test_fetch_many_in_input_order(self):
+        ids = [str(i) for i in range(20)]
+        results = list(self.graylog_api.fetch_many("get_view_by_id", ids, max_workers=4))
+        self.assertEqual([result.key for result in results], ids)
+        self.assertTrue(all(result.ok for result in results))
+        self.assertEqual(results[3].result.data, {"endpoint": "views/3"})
+
+    def test_fetch_many_reports_failures_without_aborting(self):
+        results = list(self.graylog_api.fetch_many(self.graylog_api.get_jvminfo, ["a", "bad", "c"], ordered=False))
+        self.assertEqual(sorted(result.key for result in results), ["a", "bad", "c"])
+        failed = [result for result in results if not result.ok]
+        self.assertEqual(len(failed), 1)
+        self.assertIsInstance(failed[0].error, GraylogApiException)
+
+    def test_fetch_many_unknown_method_raises_ValueError(self):
+        for method in ["does_not_exist", "_rest_adapter"]:
+            with self.subTest(method=method):
+                with self.assertRaises(ValueError):
+                    self.graylog_api.fetch_many(method, ["a"])
+
+
+class TestGraylogApiClientBulkUsers(TestCase):
+    def setUp(self):
+        self.graylog_api = GraylogAPI("", "")
+        users = [{"id": "1", "username": "foo", "email": "foo@example.com", "account_status": "enabled"},
+                 {"id": "2", "username": "bar", "account_status": "disabled"}]
+        self.graylog_api._rest_adapter.get = mock.Mock(return_value=GraylogApiResult(200, data={"users": users}))
+        self.graylog_api._rest_adapter.post = mock.Mock(return_value=GraylogApiResult(201))
+        self.graylog_api._rest_adapter.put = mock.Mock(return_value=GraylogApiResult(204))
+        self.graylog_api._rest_adapter.delete = mock.Mock(return_value=GraylogApiResult(204))
+
+    def test_bulk_users_sends_only_changes(self):
+        operations = [UserOperation.create("new", "New", "User", "new@example.com", "secret", roles=["Reader"]),
+                      UserOperation.update("foo", email="foo@example.com"),
+                      UserOperation.disable("bar"),
+                      UserOperation.delete("foo")]
+        report = self.graylog_api.bulk_users(operations, max_workers=2, rate_limit=100)
+        self.assertEqual([item.status for item in report.items], ["created", "skipped", "skipped", "deleted"])
+        self.graylog_api._rest_adapter.get.assert_called_once_with("users/paginated", {"per_page": 500, "page": 1})
+        self.graylog_api._rest_adapter.post.assert_called_once_with("users", data={
+            "username": "new", "first_name": "New", "last_name": "User", "email": "new@example.com",
+            "password": "secret", "roles": ["Reader"]})
+        self.graylog_api._rest_adapter.put.assert_not_called()
+        self.graylog_api._rest_adapter.delete.assert_called_once_with("users/id/1")
+
+    def test_bulk_users_updates_by_id(self):
+        report = self.graylog_api.bulk_users([UserOperation.update("foo", email="new@example.com")])
+        self.assertTrue(report.ok)
+        self.graylog_api._rest_adapter.put.assert_called_once_with("users/1", data={"email": "new@example.com"})
+
+    def test_bulk_users_invalid_max_workers_raises_ValueError(self):
+        with self.assertRaises(ValueError):
+            self.graylog_api.bulk_users([], max_workers=0)
+
+
+class TestGraylogApiClientSearch(TestCase):
+    def setUp(self):
+        self.graylog_api = GraylogAPI("", "")
+
+    def test_search_absolute(self):
+        self.graylog_api._rest_adapter.get = mock.Mock(return_value=GraylogApiResult(200))
+        self.graylog_api.search_absolute("level:3", "2024-01-01", "2024-01-02", {"limit": 10})
+        self.graylog_api._rest_adapter.get.assert_called_once_with("search/universal/absolute", {
+            "query": "level:3", "from": "2024-01-01T00:00:00.000Z", "to": "2024-01-02T00:00:00.000Z", "limit": 10})
+
+    def test_search_polls_until_done(self):
+        self.graylog_api._rest_adapter.post = mock.Mock(side_effect=[
+            GraylogApiResult(200, data={"id": "search"}),
+            GraylogApiResult(201, data={"id": "job", "executing_node": "node", "execution": {"done": False}}),
+        ])
+        self.graylog_api._rest_adapter.get = mock.Mock(side_effect=[
+            GraylogApiResult(200, data={"id": "job", "execution": {"done": False}}),
+            GraylogApiResult(200, data={"id": "job", "execution": {"done": True}, "results": {}}),
+        ])
+        with mock.patch("time.sleep") as sleep:
+            status = self.graylog_api.search({"queries": []})
+        self.assertIn("results", status.data)
+        self.graylog_api._rest_adapter.post.assert_called_with("views/search/search/execute", data={})
+        self.graylog_api._rest_adapter.get.assert_called_with("views/searchjobs/node/job/status")
+        self.assertEqual([call.args[0] for call in sleep.call_args_list], [0.1, 0.2])
+
+    def test_wait_for_search_job_times_out(self):
+        self.graylog_api._rest_adapter.get = mock.Mock(return_value=GraylogApiResult(200, data={"execution": {}}))
+        with self.assertRaises(GraylogApiException):
+            self.graylog_api.wait_for_search_job({"id": "job"}, timeout=0.05, poll_interval=0.01)
+
+    def test_export_messages_streams_lines(self):
+        self.graylog_api._rest_adapter.iter_lines = mock.Mock(return_value=iter([b'{"message": "a"}\n']))
+        messages = list(self.graylog_api.export_messages("*", "2024-01-01", "2024-01-02", streams=["s1"]))
+        self.assertEqual(messages, [{"message": "a"}])
+        args = self.graylog_api._rest_adapter.iter_lines.call_args
+        self.assertEqual(args.args, ("POST", "views/search/messages"))
+        self.assertEqual(args.kwargs["accept"], "application/x-ndjson")
+        self.assertEqual(args.kwargs["data"]["streams"], ["s1"])
+        self.assertEqual(args.kwargs["data"]["sort"], [{"field": "timestamp", "order": "ASC"}])
+
+    def test_export_messages_parallel_merges_in_time_order(self):
+        def iter_lines(method, endpoint, data=None, accept=None, chunk_size=None):
+            return iter([f'{{"from": "{data["timerange"]["from"]}"}}\n'.encode()])
+
+        self.graylog_api._rest_adapter.iter_lines = mock.Mock(side_effect=iter_lines)
+        messages = list(self.graylog_api.export_messages_parallel("*", "2024-01-01T00:00:00Z", "2024-01-01T00:00:03.999Z",
+                                                                  slices=4, max_workers=2))
+        self.assertEqual([message["from"] for message in messages], [f"2024-01-01T00:00:0{i}.000Z" for i in range(4)])
+        sent = [call.kwargs["data"] for call in self.graylog_api._rest_adapter.iter_lines.call_args_list]
+        self.assertTrue(all(data["sort"] == [{"field": "timestamp", "order": "ASC"}] for data in sent))
+
+    def test_export_invalid_format_raises_ValueError(self):
+        with self.assertRaises(ValueError):
+            self.graylog_api.export_messages("*", "2024-01-01", "2024-01-02", export_format="xlsx")
+
+
+class TestGraylogApiClientStreaming(TestCase):
+    def test_iter_streams(self):
+        graylog_api = GraylogAPI("", "")
+        graylog_api._rest_adapter.iter_items = mock.Mock(return_value=iter([{"id": "a"}]))
+        self.assertEqual(list(graylog_api.iter_streams()), [{"id": "a"}])
+        graylog_api._rest_adapter.iter_items.assert_called_once_with("streams", key="streams")
+
+
+class TestPackageImport(TestCase):
+    def test_optional_components_are_imported_on_first_access(self):
+        code = ("import sys, graylog_api_client as package\n"
+                "assert not {'asyncio', 'sqlite3'} & set(sys.modules)\n"
+                "assert package.AsyncGraylogAPI.__name__ == 'AsyncGraylogAPI' and 'asyncio' in sys.modules\n"
+                "assert all(getattr(package, name) for name in package.__all__)\n"
+                "assert not hasattr(package, 'Missing')\n")
+        source = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+        subprocess.run([sys.executable, "-c", code], check=True, env=dict(os.environ, PYTHONPATH=source))
@@ -0,0 +1,147 @@
+import http.server
+import io
+import logging
+import threading
+import time
+from unittest import TestCase, mock
+
+import requests
+
+from src.graylog_api_client.cache import ResponseCache
+from src.graylog_api_client.exceptions import GraylogApiException
+from src.graylog_api_client.instrumentation import Histogram, InMemoryCollector, RequestInfo, endpoint_label
+from src.graylog_api_client.policies import RetryPolicy
+from src.graylog_api_client.rest_adapter import RestAdapter
+
+
+class TestInstrumentation(TestCase):
+    def test_endpoint_label_replaces_ids(self):
+        self.assertEqual(endpoint_label("views/5f1f0c0e2ab7a1f6c9b1d2e3"), "views/{id}")
+        self.assertEqual(endpoint_label("cluster/0f5b3e1c-9c2e-4f64-8f51-2b8f0a6f4c11/jvm"), "cluster/{id}/jvm")
+        self.assertEqual(endpoint_label("users/paginated"), "users/paginated")
+
+    def test_histogram_quantile(self):
+        histogram = Histogram(buckets=(1, 2, 4))
+        for value in (0.5, 1.5, 1.5, 3):
+            histogram.observe(value)
+        self.assertEqual(histogram.count, 4)
+        self.assertEqual(histogram.quantile(0.5), 1.5)
+        self.assertLessEqual(histogram.quantile(0.99), 4)
+        self.assertEqual(Histogram().quantile(0.5), 0.0)
+
+    def test_collector_snapshot_and_prometheus(self):
+        collector = InMemoryCollector()
+        info = RequestInfo("GET", "views/5f1f0c0e2ab7a1f6c9b1d2e3")
+        info.status_code, info.bytes_in, info.wait, info.total, info.retries = 200, 100, 0.02, 0.03, 1
+        collector.on_response(info)
+        hit = RequestInfo("GET", "views")
+        hit.cache = "hit"
+        collector.on_response(hit)
+        snapshot = collector.snapshot()
+        self.assertEqual(list(snapshot), ["views/{id}"])
+        self.assertEqual(snapshot["views/{id}"]["requests"], 1)
+        self.assertEqual(snapshot["views/{id}"]["retries"], 1)
+        self.assertEqual(collector.cache_hit_ratio, 1.0)
+        text = collector.to_prometheus()
+        self.assertIn('graylog_api_request_duration_seconds_count{endpoint="views/{id}",phase="total"} 1', text)
+        self.assertIn('graylog_api_requests_total{endpoint="views/{id}",method="GET",status="200"} 1', text)
+        self.assertIn('graylog_api_received_bytes_total{endpoint="views/{id}"} 100', text)
+
+
+class _SlowBodyHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b'{"streams": []}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.flush()
+        time.sleep(0.3)
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestRestAdapterInstrumentation(TestCase):
+    def setUp(self):
+        self.collector = InMemoryCollector()
+
+    @staticmethod
+    def _response(status_code, content=b'{"foo": "bar"}'):
+        response = requests.Response()
+        response.raw = io.BytesIO()
+        response.status_code = status_code
+        response._content = content
+        return response
+
+    def test_records_requests_retries_and_cache_hits(self):
+        rest_adapter = RestAdapter("", "", retry=RetryPolicy(total=2), cache=ResponseCache(),
+                                   instrumentation=self.collector)
+        with mock.patch("requests.Session.request", side_effect=[self._response(503), self._response(200)]), \
+                mock.patch("time.sleep"):
+            rest_adapter.get("streams")
+            rest_adapter.get("streams")
+        stats = self.collector.snapshot()["streams"]
+        self.assertEqual((stats["requests"], stats["retries"], stats["bytes_in"]), (1, 1, 14))
+        self.assertEqual(self.collector.cache, {"hit": 1, "miss": 1, "revalidated": 0})
+
+    def test_records_failures(self):
+        hooks = mock.Mock()
+        rest_adapter = RestAdapter("", "", instrumentation=hooks)
+        with mock.patch("requests.Session.request", return_value=self._response(404, b'')):
+            with self.assertRaises(GraylogApiException):
+                rest_adapter.get("users/foo")
+        hooks.on_request.assert_called_once()
+        info = hooks.on_response.call_args.args[0]
+        self.assertEqual(info.status_code, 404)
+        self.assertIsInstance(info.error, GraylogApiException)
+
+    def test_slow_body_is_recorded_as_transfer(self):
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _SlowBodyHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        hooks = mock.Mock()
+        rest_adapter = RestAdapter(f"http://127.0.0.1:{server.server_port}/api", "token", instrumentation=hooks)
+        try:
+            self.assertEqual(rest_adapter.get("streams").data, {"streams": []})
+        finally:
+            rest_adapter.close()
+            server.shutdown()
+            server.server_close()
+        info = hooks.on_response.call_args.args[0]
+        self.assertGreaterEqual(info.transfer, 0.25)
+        self.assertLess(info.wait, 0.25)
+        self.assertGreaterEqual(info.total, info.wait + info.transfer)
+
+    def test_records_streamed_requests(self):
+        rest_adapter = RestAdapter("", "", instrumentation=self.collector)
+        response = self._response(200)
+        response.raw = io.BytesIO(b'{"streams": [{"id": "a"}]}')
+        with mock.patch("requests.Session.request", return_value=response):
+            list(rest_adapter.iter_items("streams", key="streams", chunk_size=8))
+        stats = self.collector.snapshot()["streams"]
+        self.assertEqual((stats["requests"], stats["errors"], stats["bytes_in"]), (1, 0, 26))
+
+    def test_log_lines_are_formatted_lazily(self):
+        logger = mock.Mock()
+        rest_adapter = RestAdapter("", "", logger=logger)
+        with mock.patch("requests.Session.request", return_value=self._response(200)):
+            rest_adapter.get("streams", {"foo": "bar"})
+        self.assertEqual(logger.debug.call_args_list[0], mock.call("method=%s, url=%s, parameters=%s", "GET",
+                                                                   "/streams", {"foo": "bar"}))
+
+    def test_disabled_debug_does_not_format(self):
+        formatted = []
+
+        class Parameters(dict):
+            def __repr__(self):
+                formatted.append(True)
+                return super().__repr__()
+
+        rest_adapter = RestAdapter("", "", logger=logging.getLogger("graylog-api-test"))
+        rest_adapter._logger.setLevel(logging.INFO)
+        with mock.patch("requests.Session.request", return_value=self._response(200)):
+            rest_adapter.get("streams", Parameters(foo="bar"))
+        self.assertEqual(formatted, [])
@@ -0,0 +1,67 @@
+import json
+from unittest import TestCase, mock
+
+from src.graylog_api_client import json_codec
+from src.graylog_api_client.json_codec import get_loads, iter_json_items, iter_lines
+
+
+def chunked(document: str, size: int):
+    encoded = document.encode()
+    return [encoded[i:i + size] for i in range(0, len(encoded), size)]
+
+
+class TestJsonCodec(TestCase):
+    def test_get_loads_decodes_bytes(self):
+        self.assertEqual(get_loads()(b'{"a": [1, 2]}'), {"a": [1, 2]})
+        self.assertEqual(get_loads("json")(b'{"a": "\\u00e4"}'), {"a": "ä"})
+
+    def test_get_loads_unknown_backend_raises_ValueError(self):
+        with mock.patch.dict(json_codec._LOADS, {"json": json.loads}, clear=True):
+            with self.assertRaises(ValueError):
+                get_loads("orjson")
+
+    def test_iter_top_level_array_across_chunk_boundaries(self):
+        items = [{"id": i, "name": f"ä-{i}", "nested": {"list": [i, None, True]}} for i in range(50)] + [123456, "x"]
+        document = json.dumps(items, ensure_ascii=False)
+        for size in (1, 3, 7, 64, 10 ** 6):
+            with self.subTest(size=size):
+                self.assertEqual(list(iter_json_items(chunked(document, size))), items)
+
+    def test_iter_numbers_split_across_chunks(self):
+        self.assertEqual(list(iter_json_items([b'[3.', b'14]'])), [3.14])
+        self.assertEqual(list(iter_json_items([b'[1e', b'5, -', b'2]'])), [1e5, -2])
+        document = json.dumps({"total": 12.5, "ratio": -1.25e-3, "users": [{"id": "a"}, 0.5, 1e10, True, None]})
+        for size in range(1, 12):
+            with self.subTest(size=size):
+                self.assertEqual(list(iter_json_items(chunked(document, size), key="users")),
+                                 [{"id": "a"}, 0.5, 1e10, True, None])
+
+    def test_large_item_is_not_decoded_again_for_every_chunk(self):
+        document = json.dumps([{"values": list(range(20000))}])
+        decoder = mock.Mock(wraps=json_codec._DECODER)
+        with mock.patch.object(json_codec, "_DECODER", decoder):
+            self.assertEqual(len(list(iter_json_items(chunked(document, 100)))), 1)
+        # About a thousand chunks, but the failed attempts are only repeated once the buffer doubled
+        self.assertLess(decoder.raw_decode.call_count, 15)
+
+    def test_iter_keyed_list_skips_other_members(self):
+        document = json.dumps({"total": 2, "query": {"a": [1]}, "streams": [{"id": "a"}, {"id": "b"}], "after": 1})
+        self.assertEqual(list(iter_json_items(chunked(document, 5), key="streams")), [{"id": "a"}, {"id": "b"}])
+
+    def test_iter_missing_key_or_empty_array(self):
+        self.assertEqual(list(iter_json_items([b'{"total": 0}'], key="streams")), [])
+        self.assertEqual(list(iter_json_items([b' [ ] '])), [])
+
+    def test_iter_invalid_json_raises_ValueError(self):
+        for document in (b'[1, 2', b'{"streams": 1}', b'[1 2]'):
+            with self.subTest(document=document):
+                with self.assertRaises(ValueError):
+                    list(iter_json_items([document], key="streams" if document.startswith(b'{') else None))
+
+    def test_iter_lines_across_chunk_boundaries(self):
+        document = 'a,ä\n\n"multi\nline",x\nlast'
+        for size in (1, 2, 5, 100):
+            with self.subTest(size=size):
+                lines = list(iter_lines(chunked(document, size)))
+                self.assertEqual(b"".join(lines), document.encode())
+                self.assertEqual(len(lines), 5)
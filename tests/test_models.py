@@ -0,0 +1,60 @@
+import sys
+from unittest import TestCase
+
+from src.graylog_api_client.data_structures import GraylogApiResult
+from src.graylog_api_client.models import ClusterNode, Role, User, View
+
+
+class TestModels(TestCase):
+    def setUp(self):
+        self.user = {"id": "1", "username": "foo", "permissions": ["streams:read"], "roles": ["Reader"],
+                     "preferences": {"theme": "dark"}, "custom": 42}
+
+    def test_fields_are_slots(self):
+        user = User(self.user)
+        self.assertFalse(hasattr(user, "__dict__"))
+        self.assertEqual(user.username, "foo")
+        self.assertIsNone(user.email)
+
+    def test_lazy_field_is_decoded_on_access(self):
+        user = User(self.user)
+        self.assertIsInstance(user._preferences, bytes)
+        self.assertEqual(user.preferences, {"theme": "dark"})
+        self.assertIsNone(user.startpage)
+
+    def test_undeclared_fields_stay_reachable(self):
+        user = User(self.user)
+        self.assertEqual(user.custom, 42)
+        self.assertEqual(user.get("missing", "default"), "default")
+        with self.assertRaises(AttributeError):
+            user.missing
+
+    def test_permission_strings_are_interned(self):
+        permission = "".join(["streams:", "read"])
+        first, second = Role({"permissions": [permission]}), Role({"permissions": ["streams:" + "read"[:]]})
+        self.assertIs(first.permissions[0], second.permissions[0])
+        self.assertIs(first.permissions[0], sys.intern("streams:read"))
+
+    def test_to_dict_round_trip(self):
+        self.assertEqual({k: v for k, v in User(self.user).to_dict().items() if v is not None}, self.user)
+
+
+class TestGraylogApiResultAsModels(TestCase):
+    def test_detects_list_key(self):
+        result = GraylogApiResult(200, data={"total": 1, "views": [{"id": "v", "title": "Foo", "state": {}}]})
+        views = result.as_models()
+        self.assertIsInstance(views[0], View)
+        self.assertEqual(views[0].title, "Foo")
+
+    def test_cluster_node_map(self):
+        result = GraylogApiResult(200, data={"abc": {"node_id": "abc", "hostname": "node1"}})
+        nodes = result.as_models(ClusterNode)
+        self.assertEqual([node.hostname for node in nodes], ["node1"])
+
+    def test_single_entity(self):
+        users = GraylogApiResult(200, data={"id": "1", "username": "foo"}).as_models(User)
+        self.assertEqual(users[0].username, "foo")
+
+    def test_unknown_model_raises_ValueError(self):
+        with self.assertRaises(ValueError):
+            GraylogApiResult(200, data={"id": "1"}).as_models()
@@ -0,0 +1,75 @@
+from unittest import TestCase, mock
+
+from src.graylog_api_client.policies import CircuitBreaker, RateLimiter, RetryPolicy, TokenBucket
+
+
+class TestRetryPolicy(TestCase):
+    def setUp(self):
+        self.retry = RetryPolicy(total=2, backoff_factor=1, max_backoff=3)
+
+    def test_can_retry(self):
+        self.assertTrue(self.retry.can_retry("GET", 0))
+        self.assertTrue(self.retry.can_retry("GET", 1, 503))
+        self.assertFalse(self.retry.can_retry("GET", 2, 503))
+        self.assertFalse(self.retry.can_retry("GET", 0, 404))
+        self.assertFalse(self.retry.can_retry("POST", 0))
+        self.assertFalse(self.retry.can_retry("POST", 0, 503))
+        self.assertTrue(self.retry.can_retry("POST", 0, 429))
+
+    def test_backoff_is_capped(self):
+        for attempt in range(10):
+            self.assertLessEqual(self.retry.backoff(attempt), 3)
+
+    def test_retry_after(self):
+        self.assertEqual(self.retry.delay(0, "7"), 7)
+        self.assertIsNone(self.retry.delay(0, "3600"))
+        self.assertEqual(self.retry.parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0)
+        self.assertIsNone(self.retry.parse_retry_after("soon"))
+
+
+class TestRateLimiter(TestCase):
+    def test_token_bucket_waits_when_empty(self):
+        bucket = TokenBucket(rate=10, capacity=1)
+        with mock.patch("time.sleep") as sleep:
+            bucket.acquire()
+            sleep.assert_not_called()
+            bucket._updated = 0.0
+            with mock.patch("time.monotonic", side_effect=[0.0, 1.0]):
+                bucket.acquire()
+        sleep.assert_called_once()
+        self.assertAlmostEqual(sleep.call_args.args[0], 0.1)
+
+    def test_longest_prefix_wins(self):
+        limiter = RateLimiter({"": 100, "users": 5, "/users/paginated": 1})
+        self.assertEqual(limiter.bucket_for("streams").rate, 100)
+        self.assertEqual(limiter.bucket_for("users/id/foo").rate, 5)
+        self.assertEqual(limiter.bucket_for("users/paginated").rate, 1)
+        self.assertIsNone(RateLimiter({"users": 1}).bucket_for("streams"))
+
+    def test_invalid_rate_raises_ValueError(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0)
+
+    def test_burst_below_one_raises_ValueError(self):
+        with self.assertRaises(ValueError):
+            RateLimiter({"": 10}, burst={"": 0.5})
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=10, capacity=2).acquire(3)
+
+
+class TestCircuitBreaker(TestCase):
+    def test_opens_after_threshold_and_half_opens_after_timeout(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+        with mock.patch("time.monotonic", return_value=breaker._opened_at + 10):
+            self.assertTrue(breaker.allow())
+            self.assertFalse(breaker.allow())
+            breaker.record_failure()
+            self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        with mock.patch("time.monotonic", return_value=breaker._opened_at + 10):
+            self.assertTrue(breaker.allow())
+            breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
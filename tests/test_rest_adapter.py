@@ -1,9 +1,13 @@
+import io
+import threading
 from unittest import TestCase, mock
 
 import requests
 
+from src.graylog_api_client.cache import ResponseCache
 from src.graylog_api_client.data_structures import GraylogApiResult
-from src.graylog_api_client.exceptions import GraylogApiException
+from src.graylog_api_client.exceptions import GraylogApiException, GraylogCircuitOpenException
+from src.graylog_api_client.policies import CircuitBreaker, RetryPolicy
 from src.graylog_api_client.rest_adapter import RestAdapter
 
 
@@ -28,6 +32,39 @@ class TestRestAdapter(TestCase):
             with self.assertRaises(GraylogApiException):
                 self.rest_adapter._do(method="GET", endpoint="/")
 
+    def test__do_uses_configured_json_backend(self):
+        self.response.status_code = 200
+        self.response._content = b'{"foo": 1}'
+        rest_adapter = RestAdapter("", "", json_backend="json")
+        with mock.patch("requests.Session.request", return_value=self.response):
+            result = rest_adapter._do(method="GET", endpoint="/")
+        self.assertEqual(result.data, {"foo": 1})
+
+    def test_iter_items_streams_keyed_list(self):
+        self.response.status_code = 200
+        self.response.raw = io.BytesIO(b'{"total": 2, "streams": [{"id": "a"}, {"id": "b"}]}')
+        with mock.patch("requests.Session.request", return_value=self.response) as request:
+            streams = list(self.rest_adapter.iter_items("streams", key="streams", chunk_size=4))
+        self.assertEqual(streams, [{"id": "a"}, {"id": "b"}])
+        self.assertTrue(request.call_args.kwargs["stream"])
+
+    def test_iter_items_bad_status_raises_GraylogApiException(self):
+        self.response.status_code = 403
+        self.response.raw = io.BytesIO(b'')
+        with mock.patch("requests.Session.request", return_value=self.response):
+            with self.assertRaises(GraylogApiException):
+                list(self.rest_adapter.iter_items("streams", key="streams"))
+
+    def test_iter_lines_posts_with_accept_header(self):
+        self.response.status_code = 200
+        self.response.raw = io.BytesIO(b'{"a": 1}\n{"a": 2}\n')
+        with mock.patch("requests.Session.request", return_value=self.response) as request:
+            lines = list(self.rest_adapter.iter_lines("POST", "views/search/messages", data={"foo": "bar"},
+                                                      accept="text/csv", chunk_size=3))
+        self.assertEqual(lines, [b'{"a": 1}\n', b'{"a": 2}\n'])
+        self.assertEqual(request.call_args.kwargs["headers"], {"Accept": "text/csv"})
+        self.assertEqual(request.call_args.kwargs["json"], {"foo": "bar"})
+
     def test_get(self):
         self.rest_adapter._do = mock.Mock(spec=["method", "endpoint", "parameters"])
         self.rest_adapter.get(endpoint="/get", parameters={"foo": "bar"})
@@ -55,3 +92,116 @@ class TestRestAdapter(TestCase):
         assert self.rest_adapter._do.call_count == 1
         assert self.rest_adapter._do.call_args == mock.call(method="PUT", endpoint="/put",
                                                             parameters={"foo": "bar"}, data={"foo": "baz"})
+
+
+class TestRestAdapterCache(TestCase):
+    def setUp(self):
+        self.cache = ResponseCache(default_ttl=60)
+        self.rest_adapter = RestAdapter("", "", cache=self.cache)
+
+    @staticmethod
+    def _response(status_code, content=b'', headers=None):
+        response = requests.Response()
+        response.raw = io.BytesIO()
+        response.status_code = status_code
+        response._content = content
+        response.headers.update(headers or {})
+        return response
+
+    def test_get_is_served_from_cache(self):
+        with mock.patch("requests.Session.request", return_value=self._response(200, b'{"streams": []}')) as request:
+            first = self.rest_adapter.get("streams")
+            second = self.rest_adapter.get("streams")
+        self.assertIs(first, second)
+        self.assertEqual(request.call_count, 1)
+
+    def test_stale_entry_is_revalidated_with_etag(self):
+        with mock.patch("requests.Session.request", return_value=self._response(200, b'[]', {"ETag": '"v1"'})):
+            first = self.rest_adapter.get("authz/roles")
+        with mock.patch("time.monotonic", return_value=10 ** 9):
+            with mock.patch("requests.Session.request", return_value=self._response(304)) as request:
+                second = self.rest_adapter.get("authz/roles")
+        self.assertIs(first, second)
+        self.assertEqual(request.call_args.kwargs["headers"], {"If-None-Match": '"v1"'})
+        self.assertEqual(self.cache.revalidations, 1)
+
+    def test_write_invalidates_resource(self):
+        with mock.patch("requests.Session.request", return_value=self._response(200, b'{}')) as request:
+            self.rest_adapter.get("users")
+            self.rest_adapter.delete("users/id/foo")
+            self.rest_adapter.get("users")
+        self.assertEqual(request.call_count, 3)
+
+    def test_errors_are_not_cached(self):
+        with mock.patch("requests.Session.request", return_value=self._response(500)) as request:
+            for _ in range(2):
+                with self.assertRaises(GraylogApiException):
+                    self.rest_adapter.get("cluster")
+        self.assertEqual(request.call_count, 2)
+
+    def test_coalesce_merges_concurrent_identical_gets(self):
+        rest_adapter = RestAdapter("", "", coalesce=True)
+        release = threading.Event()
+        response = self._response(200, b'{"username": "foo"}')
+
+        def slow_request(*args, **kwargs):
+            release.wait(timeout=5)
+            return response
+
+        results = []
+        with mock.patch("requests.Session.request", side_effect=slow_request) as request:
+            threads = [threading.Thread(target=lambda: results.append(rest_adapter.get("users/foo"))) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            while rest_adapter.single_flight.merged < 3:
+                pass
+            release.set()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(request.call_count, 1)
+        self.assertEqual(len({id(result) for result in results}), 1)
+
+
+class TestRestAdapterPolicies(TestCase):
+    @staticmethod
+    def _response(status_code, content=b'{}', headers=None):
+        response = requests.Response()
+        response.raw = io.BytesIO()
+        response.status_code = status_code
+        response._content = content
+        response.headers.update(headers or {})
+        return response
+
+    def test_retries_503_then_succeeds(self):
+        rest_adapter = RestAdapter("", "", retry=RetryPolicy(total=3))
+        responses = [self._response(503), self._response(429, headers={"Retry-After": "2"}), self._response(200)]
+        with mock.patch("requests.Session.request", side_effect=responses) as request, mock.patch("time.sleep") as sleep:
+            result = rest_adapter.get("streams")
+        self.assertEqual(result.status_code, 200)
+        self.assertEqual(request.call_count, 3)
+        self.assertEqual(sleep.call_args_list[-1], mock.call(2.0))
+
+    def test_gives_up_after_total_retries(self):
+        rest_adapter = RestAdapter("", "", retry=RetryPolicy(total=2))
+        with mock.patch("requests.Session.request", side_effect=requests.exceptions.ConnectionError()) as request, \
+                mock.patch("time.sleep"):
+            with self.assertRaises(GraylogApiException):
+                rest_adapter.get("streams")
+        self.assertEqual(request.call_count, 3)
+
+    def test_post_is_not_retried_on_503(self):
+        rest_adapter = RestAdapter("", "", retry=RetryPolicy(total=2))
+        with mock.patch("requests.Session.request", return_value=self._response(503)) as request:
+            with self.assertRaises(GraylogApiException):
+                rest_adapter.post("users", data={})
+        self.assertEqual(request.call_count, 1)
+
+    def test_circuit_breaker_fails_fast(self):
+        rest_adapter = RestAdapter("", "", circuit_breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+        with mock.patch("requests.Session.request", return_value=self._response(500)) as request:
+            for _ in range(2):
+                with self.assertRaises(GraylogApiException):
+                    rest_adapter.get("cluster")
+            with self.assertRaises(GraylogCircuitOpenException):
+                rest_adapter.get("cluster")
+        self.assertEqual(request.call_count, 2)
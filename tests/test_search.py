@@ -0,0 +1,112 @@
+import threading
+import time
+from datetime import datetime, timezone
+from unittest import TestCase
+
+from src.graylog_api_client.exceptions import GraylogApiException
+from src.graylog_api_client.search import (decode_messages, format_timestamp, messages_request, ordered_prefetch,
+                                           split_time_range)
+
+
+class TestSearchHelpers(TestCase):
+    def test_format_timestamp(self):
+        self.assertEqual(format_timestamp(datetime(2024, 1, 31, 23, 59, 59, 999999)), "2024-01-31T23:59:59.999Z")
+        self.assertEqual(format_timestamp("2024-01-01T01:00:00+01:00"), "2024-01-01T00:00:00.000Z")
+
+    def test_split_time_range_has_no_gaps_or_overlaps(self):
+        ranges = split_time_range("2024-01-01T00:00:00Z", "2024-01-01T00:00:10Z", 3)
+        self.assertEqual([(format_timestamp(start), format_timestamp(end)) for start, end in ranges], [
+            ("2024-01-01T00:00:00.000Z", "2024-01-01T00:00:03.333Z"),
+            ("2024-01-01T00:00:03.334Z", "2024-01-01T00:00:06.667Z"),
+            ("2024-01-01T00:00:06.668Z", "2024-01-01T00:00:10.000Z"),
+        ])
+
+    def test_split_short_range_into_fewer_slices(self):
+        moment = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        self.assertEqual(split_time_range(moment, moment, 4), [(moment, moment)])
+
+    def test_split_invalid_range_raises_ValueError(self):
+        with self.assertRaises(ValueError):
+            split_time_range("2024-01-02", "2024-01-01", 2)
+        with self.assertRaises(ValueError):
+            split_time_range("2024-01-01", "2024-01-02", 0)
+
+    def test_messages_request(self):
+        request = messages_request("level:3", "2024-01-01", "2024-01-02", streams=["s1"], fields=["timestamp"], limit=5)
+        self.assertEqual(request["timerange"], {"type": "absolute", "from": "2024-01-01T00:00:00.000Z",
+                                                "to": "2024-01-02T00:00:00.000Z"})
+        self.assertEqual((request["streams"], request["fields_in_order"], request["limit"]), (["s1"], ["timestamp"], 5))
+
+    def test_decode_messages(self):
+        ndjson = [b'{"message": "a"}\n', b'\n', b'{"message": "b"}']
+        self.assertEqual(list(decode_messages(ndjson, "ndjson")), [{"message": "a"}, {"message": "b"}])
+        csv_lines = ['﻿timestamp,message\n', '2024,"multi\n', 'line"\n']
+        self.assertEqual(list(decode_messages([line.encode() for line in csv_lines], "csv")),
+                         [{"timestamp": "2024", "message": "multi\nline"}])
+        with self.assertRaises(GraylogApiException):
+            list(decode_messages([b'{"broken"\n'], "ndjson"))
+
+
+class TestOrderedPrefetch(TestCase):
+    def test_items_in_producer_order_while_running_concurrently(self):
+        running, peak, lock = [0], [0], threading.Lock()
+
+        def producer(start):
+            def produce():
+                with lock:
+                    running[0] += 1
+                    peak[0] = max(peak[0], running[0])
+                time.sleep(0.02 if start == 0 else 0)
+                yield from range(start, start + 3)
+                with lock:
+                    running[0] -= 1
+            return produce
+
+        items = list(ordered_prefetch([producer(i * 3) for i in range(4)], max_workers=3, buffer=1))
+        self.assertEqual(items, list(range(12)))
+        self.assertGreater(peak[0], 1)
+
+    def test_producers_start_only_within_max_workers_of_the_consumer(self):
+        started = []
+
+        def producer(index):
+            def produce():
+                started.append(index)
+                yield from range(5)
+            return produce
+
+        # Every producer fits into its buffer, so a free worker alone must not be a reason to start the next one
+        results = ordered_prefetch([producer(index) for index in range(20)], max_workers=3, buffer=10)
+        for consumed in range(20):
+            self.assertEqual(next(results), 0)
+            time.sleep(0.02)
+            self.assertLessEqual(len(started), consumed + 3)
+            for _ in range(4):
+                next(results)
+        self.assertEqual(sorted(started), list(range(20)))
+
+    def test_producer_error_is_raised_in_order(self):
+        def failing():
+            yield "x"
+            raise GraylogApiException("500: Internal Server Error")
+
+        results = ordered_prefetch([lambda: iter(["a"]), failing, lambda: iter(["b"])], max_workers=2)
+        self.assertEqual(next(results), "a")
+        self.assertEqual(next(results), "x")
+        with self.assertRaises(GraylogApiException):
+            next(results)
+
+    def test_closing_early_stops_producers(self):
+        closed = threading.Event()
+
+        def endless():
+            try:
+                while True:
+                    yield 1
+            finally:
+                closed.set()
+
+        results = ordered_prefetch([endless], buffer=2)
+        self.assertEqual(next(results), 1)
+        results.close()
+        self.assertTrue(closed.wait(2))
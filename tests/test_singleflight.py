@@ -0,0 +1,58 @@
+import threading
+from unittest import TestCase
+
+from src.graylog_api_client.singleflight import SingleFlight
+
+
+class TestSingleFlight(TestCase):
+    def setUp(self):
+        self.single_flight = SingleFlight()
+        self.release = threading.Event()
+        self.calls = 0
+
+    def _slow_call(self, value=None, error=None):
+        def fn():
+            self.calls += 1
+            self.release.wait(timeout=5)
+            if error is not None:
+                raise error
+            return value
+        return fn
+
+    def _run_concurrently(self, fn, count=5):
+        results = []
+
+        def worker():
+            try:
+                results.append(self.single_flight.do("key", fn))
+            except Exception as e:
+                results.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        while self.single_flight.stats["executed"] + self.single_flight.stats["merged"] < count:
+            pass
+        self.release.set()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_identical_calls_share_one_execution(self):
+        result = object()
+        results = self._run_concurrently(self._slow_call(value=result))
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(r is result for r in results))
+        self.assertEqual(self.single_flight.stats, {"executed": 1, "merged": 4, "in_flight": 0})
+
+    def test_errors_are_shared(self):
+        results = self._run_concurrently(self._slow_call(error=ValueError("boom")), count=3)
+        self.assertEqual(self.calls, 1)
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+
+    def test_sequential_calls_are_not_merged(self):
+        self.release.set()
+        self.single_flight.do("key", self._slow_call(value=1))
+        self.single_flight.do("key", self._slow_call(value=2))
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(self.single_flight.merged, 0)
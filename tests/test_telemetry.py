@@ -0,0 +1,74 @@
+import asyncio
+from unittest import TestCase, mock
+
+from src.graylog_api_client.async_graylog_api_client import AsyncGraylogAPI
+from src.graylog_api_client.data_structures import GraylogApiResult
+from src.graylog_api_client.exceptions import GraylogApiException
+from src.graylog_api_client.telemetry import ClusterPoller
+
+
+class TestClusterPoller(TestCase):
+    def setUp(self):
+        self.graylog_api = AsyncGraylogAPI("", "", max_connections=20)
+        self.nodes = {f"node-{i}": {"node_id": f"node-{i}"} for i in range(50)}
+        self.delay = 0.01
+
+        async def get(endpoint, parameters=None):
+            if endpoint == "cluster":
+                return GraylogApiResult(200, data=self.nodes)
+            await asyncio.sleep(self.delay)
+            if endpoint == "cluster/node-3/journal":
+                raise GraylogApiException("500: Internal Server Error")
+            return GraylogApiResult(200, data={"endpoint": endpoint})
+
+        async def post(endpoint, parameters=None, data=None):
+            return GraylogApiResult(200, data={"endpoint": endpoint, "metrics": data["metrics"]})
+
+        self.graylog_api._rest_adapter.get = mock.AsyncMock(side_effect=get)
+        self.graylog_api._rest_adapter.post = mock.AsyncMock(side_effect=post)
+
+    def tearDown(self):
+        self.graylog_api.close()
+
+    def test_poll_once_fans_out_to_all_nodes(self):
+        poller = self.graylog_api.cluster_poller(interval=1, jitter=0.05)
+        samples = asyncio.run(poller.poll_once())
+        self.assertEqual(len(samples), 50)
+        self.assertEqual(sorted(samples[0].data), ["buffers", "journal", "jvm", "throughput"])
+        self.assertEqual(samples[0].data["jvm"], {"endpoint": "cluster/node-0/jvm"})
+        self.assertIsInstance(poller.latest("node-3").errors["journal"], GraylogApiException)
+        self.assertEqual(self.graylog_api._rest_adapter.get.await_count, 1 + 50 * 3)
+
+    def test_slow_requests_time_out(self):
+        self.delay = 0.5
+        poller = ClusterPoller(self.graylog_api, interval=1, timeout=0.05, jitter=0)
+        sample = asyncio.run(poller.poll_once())[0]
+        self.assertEqual(sorted(sample.errors), ["buffers", "journal", "jvm"])
+        self.assertIsInstance(sample.errors["jvm"], TimeoutError)
+        self.assertIn("throughput", sample.data)
+
+    def test_ring_buffer_queue_and_callback(self):
+        received = []
+        poller = ClusterPoller(self.graylog_api, interval=0.05, jitter=0, history=60, callback=received.append)
+
+        async def run():
+            subscription = poller.subscribe(maxsize=10)
+            await poller.run(iterations=2)
+            return subscription
+
+        subscription = asyncio.run(run())
+        self.assertEqual(poller.polls, 2)
+        self.assertEqual(len(poller.samples()), 60)
+        self.assertEqual(len(poller.samples("node-0")), 1)
+        self.assertEqual(len(received), 100)
+        self.assertEqual(subscription.qsize(), 10)
+
+    def test_discovery_failure_keeps_known_nodes(self):
+        poller = ClusterPoller(self.graylog_api, jitter=0)
+        asyncio.run(poller.discover())
+        self.graylog_api._rest_adapter.get = mock.AsyncMock(side_effect=GraylogApiException("503: Service Unavailable"))
+        self.assertEqual(len(asyncio.run(poller.discover())), 50)
+
+    def test_invalid_interval_raises_ValueError(self):
+        with self.assertRaises(ValueError):
+            ClusterPoller(self.graylog_api, interval=0)
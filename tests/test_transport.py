@@ -0,0 +1,151 @@
+import base64
+import gzip
+import http.server
+import threading
+import unittest
+from unittest import TestCase, mock
+
+import requests
+
+from src.graylog_api_client import transport
+from src.graylog_api_client.exceptions import GraylogApiException
+from src.graylog_api_client.rest_adapter import RestAdapter
+from src.graylog_api_client.transport import HTTP2Adapter, make_http_adapter
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+@unittest.skipUnless(transport.HTTP2_AVAILABLE, "httpx and h2 are not installed")
+class TestHTTP2Adapter(TestCase):
+    def setUp(self):
+        self.requests = []
+        self.handler = lambda request: httpx.Response(200, json={"total": 1})
+        mock_transport = httpx.MockTransport(lambda request: self.requests.append(request) or self.handler(request))
+        self.http_adapter = HTTP2Adapter(transport=mock_transport)
+        self.rest_adapter = RestAdapter("https://graylog.test/api", "token", http_adapter=self.http_adapter)
+
+    def tearDown(self):
+        self.rest_adapter.close()
+        self.http_adapter.close()
+
+    def test_request_carries_auth_and_session_headers(self):
+        result = self.rest_adapter.get("users", {"page": 2})
+        self.assertEqual(result.data, {"total": 1})
+        request = self.requests[0]
+        self.assertEqual(str(request.url), "https://graylog.test/api/users?page=2")
+        self.assertEqual(request.headers["Authorization"], "Basic " + base64.b64encode(b"token:token").decode())
+        self.assertEqual(request.headers["X-Requested-By"], "python-graylog-api-client")
+
+    def test_post_sends_json_body(self):
+        self.rest_adapter.post("streams", data={"title": "foo"})
+        self.assertEqual(self.requests[0].method, "POST")
+        self.assertEqual(self.requests[0].content, b'{"title": "foo"}')
+
+    def test_error_status_raises_GraylogApiException(self):
+        self.handler = lambda request: httpx.Response(404)
+        with self.assertRaisesRegex(GraylogApiException, "404"):
+            self.rest_adapter.get("users/missing")
+
+    def test_connection_error_raises_GraylogApiException(self):
+        def fail(request):
+            raise httpx.ConnectError("refused", request=request)
+        self.handler = fail
+        with self.assertRaisesRegex(GraylogApiException, "Invalid API Response"):
+            self.rest_adapter.get("users")
+
+    def test_compressed_body_is_decoded(self):
+        body = gzip.compress(b'{"users": []}')
+        self.handler = lambda request: httpx.Response(200, content=body, headers={"Content-Encoding": "gzip"})
+        self.assertEqual(self.rest_adapter.get("users").data, {"users": []})
+
+    def test_streamed_lines(self):
+        self.handler = lambda request: httpx.Response(200, content=b'{"a": 1}\n{"a": 2}\n')
+        lines = list(self.rest_adapter.iter_lines("POST", "views/search/messages", data={}))
+        self.assertEqual(lines, [b'{"a": 1}\n', b'{"a": 2}\n'])
+
+    def test_one_client_per_tls_configuration(self):
+        self.assertIs(self.http_adapter._client(True, None), self.http_adapter._client(True, None))
+        self.assertIsNot(self.http_adapter._client(True, None), self.http_adapter._client(False, None))
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b'{"version": "6.3"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@unittest.skipUnless(transport.HTTP2_AVAILABLE, "httpx and h2 are not installed")
+class TestHTTP2AdapterFallback(TestCase):
+    def test_server_without_http2_is_spoken_to_with_http1(self):
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        rest_adapter = RestAdapter(f"http://127.0.0.1:{server.server_port}/api", "token", http2=True)
+        try:
+            session = rest_adapter._session
+            results = [rest_adapter.get("system") for _ in range(3)]
+            response = session.get(f"http://127.0.0.1:{server.server_port}/api/system")
+        finally:
+            rest_adapter.close()
+            server.shutdown()
+            server.server_close()
+        self.assertEqual([result.data for result in results], [{"version": "6.3"}] * 3)
+        self.assertEqual(response.http_version, "HTTP/1.1")
+
+
+class _ProxyHandler(_Handler):
+    requested = []
+
+    def do_GET(self):
+        # A forward proxy receives the absolute URL of the target
+        self.requested.append(self.path)
+        super().do_GET()
+
+
+@unittest.skipUnless(transport.HTTP2_AVAILABLE, "httpx and h2 are not installed")
+class TestHTTP2AdapterProxy(TestCase):
+    def test_session_proxy_is_used(self):
+        proxy = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _ProxyHandler)
+        threading.Thread(target=proxy.serve_forever, daemon=True).start()
+        rest_adapter = RestAdapter("http://graylog.invalid/api", "token", http2=True)
+        rest_adapter._session.proxies = {"http": f"http://127.0.0.1:{proxy.server_port}"}
+        try:
+            result = rest_adapter.get("system")
+        finally:
+            rest_adapter.close()
+            proxy.shutdown()
+            proxy.server_close()
+        self.assertEqual(result.data, {"version": "6.3"})
+        self.assertEqual(_ProxyHandler.requested, ["http://graylog.invalid/api/system"])
+
+
+class TestMakeHttpAdapter(TestCase):
+    def test_defaults_to_requests(self):
+        self.assertIsNone(make_http_adapter())
+        self.assertIsInstance(make_http_adapter(pool_maxsize=5), requests.adapters.HTTPAdapter)
+
+    @unittest.skipUnless(transport.HTTP2_AVAILABLE, "httpx and h2 are not installed")
+    def test_http2(self):
+        self.assertIsInstance(make_http_adapter(http2=True), HTTP2Adapter)
+        rest_adapter = RestAdapter("https://graylog.test/api", "token", http2=True)
+        self.assertIsInstance(rest_adapter._session.get_adapter("https://graylog.test/api"), HTTP2Adapter)
+
+    def test_falls_back_to_http1_without_httpx(self):
+        logger = mock.Mock()
+        with mock.patch.object(transport, "HTTP2_AVAILABLE", False):
+            http_adapter = make_http_adapter(http2=True, pool_maxsize=5, logger=logger)
+            with self.assertRaises(ImportError):
+                HTTP2Adapter()
+        self.assertIsInstance(http_adapter, requests.adapters.HTTPAdapter)
+        logger.warning.assert_called_once()
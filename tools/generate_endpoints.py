@@ -0,0 +1,71 @@
+"""Regenerate src/graylog_api_client/endpoints.json from the API spec of a Graylog server
+
+Reads the Swagger 1.2 resource listing served under /api-docs (or an OpenAPI 3 document) either from a running
+server or from a file, keeps the names of endpoints already in the table and drops endpoints that are covered by a
+hand-written GraylogAPI method of the same name.
+
+    PYTHONPATH=src python tools/generate_endpoints.py --host https://localhost:9000/api --api-key <token>
+    PYTHONPATH=src python tools/generate_endpoints.py --spec openapi.json
+"""
+import argparse
+import json
+import sys
+from typing import Dict, List
+
+import requests
+
+from graylog_api_client.endpoint_registry import ENDPOINTS_FILE, endpoints_from_spec
+from graylog_api_client.graylog_api_client import GraylogAPI
+
+
+def fetch_spec(host: str, api_key: str, ssl_verify: bool = True) -> Dict:
+    """Download the resource listing and merge the APIs of all resources into one {"apis": [...]} document."""
+    session = requests.Session()
+    session.auth = (api_key, "token")
+    session.headers.update({"Accept": "application/json", "X-Requested-By": "python-graylog-api-client"})
+    listing = session.get(f"{host}/api-docs", verify=ssl_verify)
+    listing.raise_for_status()
+    listing = listing.json()
+    if "paths" in listing:
+        return listing
+    apis = []
+    for resource in listing.get("apis") or []:
+        response = session.get(f"{host}/api-docs{resource['path']}", verify=ssl_verify)
+        response.raise_for_status()
+        apis.extend(response.json().get("apis") or [])
+    return {"apis": apis}
+
+
+def write_table(rows: List[List], graylog: str, path: str = ENDPOINTS_FILE):
+    # One endpoint per line keeps the file small and its diffs readable
+    lines = ",\n".join("  " + json.dumps(row, separators=(", ", ": ")) for row in rows)
+    with open(path, "w") as file:
+        file.write(f'{{"graylog": {json.dumps(graylog)}, "endpoints": [\n{lines}\n]}}\n')
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--host", help="API root of a Graylog server. Example: https://localhost:9000/api")
+    source.add_argument("--spec", help="spec file instead of a server")
+    parser.add_argument("--api-key", help="API token for --host")
+    parser.add_argument("--insecure", action="store_true", help="do not verify the TLS certificate of --host")
+    parser.add_argument("--graylog", default="", help="Graylog version the spec is from")
+    parser.add_argument("--output", default=ENDPOINTS_FILE)
+    options = parser.parse_args(argv)
+
+    if options.spec:
+        with open(options.spec) as file:
+            spec = json.load(file)
+    else:
+        spec = fetch_spec(options.host, options.api_key, not options.insecure)
+    with open(ENDPOINTS_FILE) as file:
+        known = {(row[1], row[2]): row[0] for row in json.load(file)["endpoints"]}
+    rows = [row for row in endpoints_from_spec(spec, known) if not hasattr(GraylogAPI, row[0])]
+    write_table(rows, options.graylog, options.output)
+    print(f"{len(rows)} endpoints written to {options.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())